@@ -1,8 +1,26 @@
+import argparse
 import math
+import os
 import pyxel
 
 from dataclasses import dataclass
-from constants import WIDTH, HEIGHT, FPS, GRAVITY, BALL_RADIUS, BALL_COLOR, PADDLE_WIDTH, PADDLE_HEIGHT, PADDLE_COLOR, BALL_SPEED, PADDLE_SPEED, JUMP_SPEED, PADDLE_SECTIONS
+from typing import Optional
+
+import paths
+from common.collision import Hit, sweep_circle_rect
+from common.fixed import quantize
+from common.governor import FrameGovernor
+from common.inputs import InputSnapshot
+from common.latency import LatencyProbe
+from common.response import ResponseCurve, compile_curve
+from common.services import Services, add_arguments, open_simulation_services, open_window_services
+from common.simworker import SimWorker
+from particles import ParticlePool
+from predictor import predict_landing, paddle_target, reach
+from config import ArkanoidConfig, DEFAULT_CONFIG
+from constants import WIDTH, HEIGHT, BALL_RADIUS, BALL_COLOR, PADDLE_HEIGHT, PADDLE_COLOR
+from constants import PARTICLE_CAPACITY, PARTICLE_GRAVITY, PARTICLE_SPEED, PARTICLE_LIFE, PARTICLES_PER_HIT, TELEMETRY_PATH
+from constants import LEADERBOARD_PATH
 
 
 @dataclass
@@ -12,87 +30,163 @@ class Vector2D:
 
 
 class Paddle:
-    def __init__(self, x: int, y: int, width: int, height: int, color: int) -> None:
+    def __init__(self, x: int, y: int, width: int, height: int, color: int, config: ArkanoidConfig = DEFAULT_CONFIG, response: Optional[ResponseCurve] = None) -> None:
         self.x = x
         self.y = y
         self.width = width
         self.height = height
         self.color = color
+        self.config = config
 
         # Create a velocity vector
-        self.velocity = Vector2D(PADDLE_SPEED, 0)
+        self.velocity = Vector2D(config.paddle_speed, 0)
+        self.direction = 0  # -1 left, 1 right, for spin
 
-    def update(self) -> None:
-        self.move()
+        # How the ball leaves the paddle, compiled to a table once
+        self.response = compile_curve(response or config.paddle_response, config.fixed_point)
+
+    def update(self, snapshot: InputSnapshot) -> None:
+        self.move(snapshot)
 
     def draw(self) -> None:
         pyxel.rect(self.x, self.y, self.width, self.height, self.color)
 
-    def move(self) -> None:
+    def reset(self) -> None:
+        self.x = self.config.width//2 - self.width//2
+
+    def move(self, snapshot: InputSnapshot) -> None:
+        self.direction = 0
+
         # Move left
-        if pyxel.btn(pyxel.KEY_A) and self.x > 0:
+        if snapshot.is_held(pyxel.KEY_A) and self.x > 0:
             self.x -= self.velocity.x
+            self.direction -= 1
 
         # Move right
-        if pyxel.btn(pyxel.KEY_D) and self.x + self.width < WIDTH:
+        if snapshot.is_held(pyxel.KEY_D) and self.x + self.width < self.config.width:
             self.x += self.velocity.x
+            self.direction += 1
+
+    def get_offset(self, ball_x: float) -> float:
+        # -1 at the left end, 1 at the right end
+        return (ball_x - self.x) / (self.width / 2) - 1
 
-    def get_bounce_angle(self, ball_x: int) -> float:
-        angle_map = {
-            0: 5*math.pi / 6,  # 150 degrees
-            1: 2*math.pi / 3,  # 120 degrees
-            2: math.pi,  # 180 degrees
-            3: math.pi / 6,  # 30 degrees
-            4: math.pi / 3  # 60 degrees
-        }
+    def get_bounce_angle(self, ball_x: float) -> float:
+        # Away from straight up, positive to the right
+        return self.response.angles[self.response.get_index(self.get_offset(ball_x))]
 
-        section = self.get_section(ball_x)
+    def get_bounce_velocity(self, ball_x: float) -> float:
+        # Horizontal speed the ball leaves with, the bounce height stays the same
+        response = self.response
+        index = response.get_index(self.get_offset(ball_x))
+        velocity_x = response.along[index] * self.config.ball_speed + response.spin * self.direction * self.velocity.x
 
-        return angle_map[section]
+        return quantize(velocity_x) if self.config.fixed_point else velocity_x
 
     def get_section(self, ball_x: int) -> int:
         # 10, -> 10 // (100 / 5) = 0, 20 -> 20 // (100 / 5) = 1, relative x, then divide it by the SECTION WIDTH
         relative_x = ball_x - self.x
-        section = int(relative_x // (self.width / PADDLE_SECTIONS))
+        section = int(relative_x // (self.width / self.config.paddle_sections))
+
+        return max(0, min(section, self.config.paddle_sections - 1))
+
+    def find_hit(self, start_x: float, start_y: float, end_x: float, end_y: float, radius: float) -> Optional[Hit]:
+        # Where a ball moving from start to end first touches the paddle
+        hit = sweep_circle_rect(start_x, start_y, end_x, end_y, radius,
+                                self.x, self.y, self.width, self.height)
+
+        # Only the top of the paddle bounces, ignore hits from the sides or behind
+        if hit is None or hit.normal_y >= 0:
+            return None
+
+        return hit
+
+
+class AutopilotPaddle(Paddle):
+    def __init__(self, x: int, y: int, width: int, height: int, color: int, ball: "Ball", config: ArkanoidConfig = DEFAULT_CONFIG, aim: float = 0.8) -> None:
+        super().__init__(x, y, width, height, color, config)
+        self.ball = ball
+
+        # Where along the paddle to take the ball, -1 left end to 1 right end. The ends score most
+        self.aim = aim
+
+    def update(self, snapshot: InputSnapshot) -> None:
+        # Ignores the keys, steps toward where the ball comes down next
+        self.direction = 0
+
+        ball = self.ball
+        landing = predict_landing(ball.x, ball.y, ball.velocity.x, ball.velocity.y,
+                                  ball.radius, self.y, self.config)
+        if landing is None:
+            return
+
+        target = paddle_target(landing.x, self.aim, self.width, self.config)
+        self.x, self.direction = reach(self.x, target, self.velocity.x, 1)
 
-        return max(0, min(section, 4))
+
+def section_score(section: int, sections: int) -> tuple[int, int]:
+    # Points and burst color, you get less score for hitting ball in the middle
+    from_end = min(section, sections - 1 - section)
+
+    if from_end == 0:
+        return 100, 10
+    elif from_end == 1:
+        return 80, 9
+
+    return 20, 6
 
 
 class Ball:
-    def __init__(self, x: int, y: int, radius: int, color: int) -> None:
+    def __init__(self, x: int, y: int, radius: int, color: int, config: ArkanoidConfig = DEFAULT_CONFIG) -> None:
         self.x = x
         self.y = y
         self.radius = radius
         self.color = color
+        self.config = config
 
         # Create a velocity vector
         self.velocity = Vector2D(0, 0)
 
     def update(self) -> None:
-        self.apply_gravity(GRAVITY)
+        self.apply_gravity(self.config.gravity)
         self.move()
         self.handle_border_collision()
 
     def draw(self) -> None:
         pyxel.circ(self.x, self.y, self.radius, self.color)
 
+    def reset(self) -> None:
+        self.x = self.config.width//2
+        self.y = self.config.height//2
+        self.velocity = Vector2D(0, 0)
+
     def move(self) -> None:
         self.x += self.velocity.x
         self.y += self.velocity.y
 
+    def advance(self, fraction: float) -> None:
+        # Finish the rest of the frame's motion after a mid-frame bounce
+        self.x += self.velocity.x * fraction
+        self.y += self.velocity.y * fraction
+
+        # Back onto the grid, neither the impact point nor the fraction is on it
+        if self.config.fixed_point:
+            self.x, self.y = quantize(self.x), quantize(self.y)
+
+        self.handle_border_collision()
+
     def apply_gravity(self, gravity: float) -> None:
         self.velocity.y += gravity
 
-    def bounce(self, section: int, angle: float) -> None:
-        self.velocity.x = math.cos(angle) * BALL_SPEED
-        self.velocity.y = JUMP_SPEED
+    def bounce(self, velocity_x: float) -> None:
+        self.velocity.x = velocity_x
+        self.velocity.y = self.config.jump_speed
 
-        if section < 2:
-            self.velocity.x = -abs(self.velocity.x)
-        elif section > 2:
-            self.velocity.x = abs(self.velocity.x)
-        else:
-            self.velocity.x = 0
+    def bounce_off(self, paddle: Paddle, hit: Hit) -> None:
+        # Bounce from the impact point, then finish the frame's motion
+        self.x, self.y = hit.x, hit.y
+        self.bounce(paddle.get_bounce_velocity(hit.x))
+        self.advance(1 - hit.t)
 
     def handle_border_collision(self) -> None:
         # Left border
@@ -101,8 +195,8 @@ class Ball:
             self.velocity.x *= -1
 
         # Right border
-        elif self.x + self.radius >= WIDTH:
-            self.x = WIDTH - self.radius
+        elif self.x + self.radius >= self.config.width:
+            self.x = self.config.width - self.radius
             self.velocity.x *= -1
 
         # Top border
@@ -111,50 +205,115 @@ class Ball:
             self.velocity.y *= -1
 
 
+# Every button the game reads
+INPUT_KEYS = (pyxel.KEY_A, pyxel.KEY_D, pyxel.KEY_R)
+
+# What the simulation worker publishes for the window to draw
+STATE_LAYOUT = {
+    "ball": 2,
+    "paddle": 1,
+    "status": 2,  # Score, game over
+    "rank": 2,  # Rank of the last score, scores on the leaderboard
+    "particle_x": PARTICLE_CAPACITY,
+    "particle_y": PARTICLE_CAPACITY,
+    "particle_life": PARTICLE_CAPACITY,
+    "particle_color": PARTICLE_CAPACITY,
+}
+
+
 class Game:
-    def __init__(self, title: str, paddle: Paddle, ball: Ball) -> None:
+    def __init__(self, title: str, paddle: Paddle, ball: Ball, config: ArkanoidConfig = DEFAULT_CONFIG, services: Optional[Services] = None, worker: Optional[SimWorker] = None) -> None:
+        self.config = config
+        self.services = services if services is not None else Services()
+        self.worker = worker  # Simulates in another process, this one only draws
+
         # Setup game window
-        pyxel.init(WIDTH, HEIGHT, title=title, fps=FPS)
+        pyxel.init(config.width, config.height, title=title, fps=config.fps)
 
         # Game objects
         self.paddle = paddle
         self.ball = ball
+        self.particles = ParticlePool(
+            PARTICLE_CAPACITY, config.width, config.height, PARTICLE_GRAVITY)
 
         self.is_game_over = False
         self.score = 0
+        self.round_start_frame = pyxel.frame_count
+
+        # Where the last finished game placed, 0 until it is ranked
+        self.rank = 0
+        self.ranked_count = 0
+
+        # Frames from pressing a move key until the paddle visibly moves
+        self.latency_probe = LatencyProbe(
+            [pyxel.KEY_A, pyxel.KEY_D], lambda: round(self.paddle.x))
+
+        # Sheds the debug overlay, then effects, then skips draws when frames run long
+        self.governor = FrameGovernor(config.fps, ["debug", "particles"])
 
         # Run the game
-        pyxel.run(self.update, self.draw)
+        update = self.update if self.worker is None else self.update_worker
+        # The profiler goes outside, so the governor's own time is sampled too
+        pyxel.run(*self.services.wrap(*self.governor.wrap(update, self.draw)))
 
     def update(self) -> None:
+        # Sample input first so the paddle moves before this tick's collision check
+        snapshot = InputSnapshot.sample(INPUT_KEYS)
+        self.latency_probe.on_input(pyxel.frame_count, snapshot)
+
+        # Effects keep fading out even after game over, and while the governor sheds
+        # their drawing, so they don't freeze mid-air and come back stale
+        self.particles.update()
+
         if not self.is_game_over:
-            self.handle_paddle_collision()
+            self.paddle.update(snapshot)
+
+            # Remember where the ball started so the whole frame's motion is checked
+            start_x, start_y = self.ball.x, self.ball.y
+
             self.ball.update()
-            self.paddle.update()
+            self.handle_paddle_collision(start_x, start_y)
 
             # Game over once ball reaches bottom
-            if self.ball.y + self.ball.radius >= HEIGHT:
+            if self.ball.y + self.ball.radius >= self.config.height:
                 self.is_game_over = True
+                self.record("round_length", value=pyxel.frame_count - self.round_start_frame)
+                self.record("score", value=self.score)
+                self.submit_score()
         else:
             # Restart the game
-            if pyxel.btnp(pyxel.KEY_R):
+            if snapshot.is_pressed(pyxel.KEY_R):
                 self.restart_game()
 
+        latency = self.latency_probe.on_tick_end(pyxel.frame_count)
+        if latency is not None:
+            self.record("input_latency", value=latency)
+
+        if self.services.state_hash is not None:
+            self.services.state_hash.update(self.state_values())
+
+    def update_worker(self) -> None:
+        # Hand this tick's input to the worker, draw() picks up its state
+        self.worker.step(InputSnapshot.sample(INPUT_KEYS).held)
+
     def restart_game(self) -> None:
         self.is_game_over = False
 
-        # Reset ball
-        self.ball.x = WIDTH//2
-        self.ball.y = HEIGHT//2
-        self.ball.velocity = Vector2D(0, 0)
+        self.ball.reset()
+        self.paddle.reset()
 
-        # Reset paddle
-        self.paddle.x = WIDTH//2 - PADDLE_WIDTH//2
-
-        # Reset score
+        # Reset score and effects
         self.score = 0
+        self.rank = 0
+        self.round_start_frame = pyxel.frame_count
+        self.particles.clear()
 
     def draw(self) -> None:
+        if self.worker is not None:
+            state = self.worker.latest()
+            if state is not None:
+                self.load_state(state)
+
         # Clear the screen
         pyxel.cls(0)
 
@@ -162,23 +321,35 @@ class Game:
         self.ball.draw()
         self.paddle.draw()
 
-        self.debug()
+        if self.governor.is_enabled("particles"):
+            self.particles.draw()
+
+        if self.governor.is_enabled("debug"):
+            self.debug()
 
         # Display game over
         if self.is_game_over:
             self.display_game_over()
 
+        if self.services.capture is not None:
+            self.services.capture.capture()
+
     def display_score(self) -> None:
         score_txt = f"Score: {self.score}"
-        pyxel.text(WIDTH//2 - (len(score_txt) * 4 // 2), 10, score_txt, 7)
+        pyxel.text(self.config.width//2 - (len(score_txt) * 4 // 2), 10, score_txt, 7)
 
     def display_game_over(self) -> None:
         txt1 = "Game Over"
         txt2 = "'Press R to restart'"
 
         # Draw them in center (1 char = 4px)
-        pyxel.text(WIDTH//2 - (len(txt1) * 4 // 2), HEIGHT//2 - 10, txt1, 7)
-        pyxel.text(WIDTH//2 - (len(txt2) * 4 // 2), HEIGHT//2 + 10, txt2, 7)
+        mid_width, mid_height = self.config.width//2, self.config.height//2
+        pyxel.text(mid_width - (len(txt1) * 4 // 2), mid_height - 10, txt1, 7)
+        pyxel.text(mid_width - (len(txt2) * 4 // 2), mid_height + 10, txt2, 7)
+
+        if self.rank:
+            txt3 = f"Rank {self.rank} of {self.ranked_count}"
+            pyxel.text(mid_width - (len(txt3) * 4 // 2), mid_height, txt3, 10)
 
     def debug(self) -> None:
         dbc = 3  # Debug text color
@@ -195,34 +366,108 @@ class Game:
         pyxel.text(10, 30, f"Section: {section}", dbc)
         pyxel.text(10, 40, f"Angle: {angle:.2f}", dbc)
 
-    def handle_paddle_collision(self) -> None:
+    def handle_paddle_collision(self, start_x: float, start_y: float) -> None:
         # Make sure ball is going down
-        if self.ball.velocity.y > 0:
-            # Check if bottom of the ball is at the same level as the paddle
-            if self.ball.y + self.ball.radius >= self.paddle.y:
-                # Check if the ball is within the paddle's width
-                if self.ball.x >= self.paddle.x and self.ball.x <= self.paddle.x + self.paddle.width:
-                    # Get the bounce data
-                    section = self.paddle.get_section(self.ball.x)
-                    angle = self.paddle.get_bounce_angle(self.ball.x)
-
-                    # Bounce the ball and update score
-                    self.ball.bounce(section, angle)
-                    self.update_score(section)
+        if self.ball.velocity.y <= 0:
+            return
+
+        # Check this frame's whole motion
+        hit = self.paddle.find_hit(start_x, start_y, self.ball.x, self.ball.y, self.ball.radius)
+        if hit is None:
+            return
+
+        # Get the bounce data
+        section = self.paddle.get_section(hit.x)
+
+        # Bounce the ball and update score
+        self.ball.bounce_off(self.paddle, hit)
+        self.update_score(section)
+        self.record("paddle_section", section)
+
+        # Sparks where the ball hit the paddle
+        self.particles.emit(hit.x, hit.y + self.ball.radius, PARTICLES_PER_HIT,
+                            PARTICLE_SPEED, PARTICLE_LIFE, self.paddle.color)
 
     def update_score(self, section: int) -> None:
-        # You get less score for hitting ball in the middle
-        if section in (0, 4):
-            self.score += 100
-        elif section in (1, 3):
-            self.score += 80
-        else:
-            self.score += 20
+        points, color = section_score(section, self.config.paddle_sections)
+        self.score += points
 
+        # Bigger burst around the score for better hits
+        self.particles.emit(self.config.width//2, 12, points // 4,
+                            PARTICLE_SPEED, PARTICLE_LIFE, color)
 
-if __name__ == "__main__":
-    ball = Ball(WIDTH//2, HEIGHT//2, BALL_RADIUS, BALL_COLOR)
-    paddle = Paddle(WIDTH//2 - PADDLE_WIDTH//2, HEIGHT -
-                    20, PADDLE_WIDTH, PADDLE_HEIGHT, PADDLE_COLOR)
+    def submit_score(self) -> None:
+        leaderboard = self.services.leaderboard
+        if leaderboard is not None:
+            self.rank = leaderboard.submit(self.score)
+            self.ranked_count = len(leaderboard)
+
+    def record(self, kind: str, key: Optional[int] = None, value: Optional[float] = None) -> None:
+        self.services.record(pyxel.frame_count, kind, key, value)
+
+    def save_state(self, state: dict) -> None:
+        state["ball"][:] = (self.ball.x, self.ball.y)
+        state["paddle"][0] = self.paddle.x
+        state["status"][:] = (self.score, self.is_game_over)
+        state["rank"][:] = (self.rank, self.ranked_count)
+        self.particles.save_state(state)
+
+    def load_state(self, state: dict) -> None:
+        self.ball.x, self.ball.y = float(state["ball"][0]), float(state["ball"][1])
+        self.paddle.x = float(state["paddle"][0])
+        self.score = int(state["status"][0])
+        self.is_game_over = bool(state["status"][1])
+        self.rank, self.ranked_count = int(state["rank"][0]), int(state["rank"][1])
+        self.particles.load_state(state)
+
+    def state_values(self) -> tuple[float, ...]:
+        # What a desync would show up in, particles are only effects
+        ball = self.ball
+        return (ball.x, ball.y, ball.velocity.x, ball.velocity.y,
+                self.paddle.x, self.score, self.is_game_over)
+
+    def close(self) -> None:
+        self.services.close()
+
+
+def create_paddle(config: ArkanoidConfig, ball: Ball, autopilot: bool = False) -> Paddle:
+    x, y = config.width//2 - config.paddle_width//2, config.height - 20
+
+    if autopilot:
+        return AutopilotPaddle(x, y, config.paddle_width, PADDLE_HEIGHT, PADDLE_COLOR, ball, config)
 
-    Game("Arkanoid", paddle, ball)
+    return Paddle(x, y, config.paddle_width, PADDLE_HEIGHT, PADDLE_COLOR, config)
+
+
+def build_simulation(config: ArkanoidConfig, args: argparse.Namespace) -> Game:
+    # Runs inside the worker, against the headless pyxel
+    ball = Ball(config.width//2, config.height//2, BALL_RADIUS, BALL_COLOR, config)
+    paddle = create_paddle(config, ball, args.autopilot)
+
+    return Game("Arkanoid", paddle, ball, config, open_services(args))
+
+
+def open_services(args: argparse.Namespace) -> Services:
+    folder = os.path.dirname(os.path.abspath(__file__))
+    return open_simulation_services(args, "Arkanoid", os.path.join(folder, TELEMETRY_PATH),
+                                    os.path.join(folder, LEADERBOARD_PATH))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arkanoid")
+    add_arguments(parser)
+    parser.add_argument("--autopilot", action="store_true",
+                        help="let the paddle play itself, following the landing predictor")
+    args = parser.parse_args()
+
+    config = DEFAULT_CONFIG.with_fixed_point() if args.fixed_point else DEFAULT_CONFIG
+    ball = Ball(WIDTH//2, HEIGHT//2, BALL_RADIUS, BALL_COLOR, config)
+    paddle = create_paddle(config, ball, args.autopilot)
+
+    # The worker owns the game state, the telemetry, the state hashes and the leaderboard
+    if args.worker:
+        worker = SimWorker("arkanoid", "build_simulation", STATE_LAYOUT, (config, args))
+        Game("Arkanoid", paddle, ball, config, open_window_services(args, WIDTH, HEIGHT, config.fps), worker)
+    else:
+        services = open_window_services(args, WIDTH, HEIGHT, config.fps, open_services(args))
+        Game("Arkanoid", paddle, ball, config, services)
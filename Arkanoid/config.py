@@ -0,0 +1,37 @@
+from dataclasses import dataclass, replace
+import paths
+from common.fixed import quantize
+from common.response import ResponseCurve
+from constants import WIDTH, HEIGHT, FPS, GRAVITY, BALL_SPEED, JUMP_SPEED, PADDLE_WIDTH, PADDLE_SPEED, PADDLE_SECTIONS
+from constants import PADDLE_MAX_ANGLE, PADDLE_SPEED_UP, PADDLE_SPIN
+
+
+@dataclass(frozen=True)
+class ArkanoidConfig:
+    # Window
+    width: int = WIDTH
+    height: int = HEIGHT
+    fps: int = FPS
+
+    # Physics
+    gravity: float = GRAVITY
+    ball_speed: float = BALL_SPEED
+    jump_speed: float = JUMP_SPEED
+    paddle_width: int = PADDLE_WIDTH
+    paddle_speed: float = PADDLE_SPEED
+    paddle_sections: int = PADDLE_SECTIONS
+    paddle_response: ResponseCurve = ResponseCurve(
+        PADDLE_MAX_ANGLE, speed_up=PADDLE_SPEED_UP, spin=PADDLE_SPIN)
+
+    # Integer fixed-point physics, see common/fixed.py
+    fixed_point: bool = False
+
+    def with_fixed_point(self) -> "ArkanoidConfig":
+        return replace(self, fixed_point=True,
+                       gravity=quantize(self.gravity),
+                       ball_speed=quantize(self.ball_speed),
+                       jump_speed=quantize(self.jump_speed),
+                       paddle_speed=quantize(self.paddle_speed))
+
+
+DEFAULT_CONFIG = ArkanoidConfig()
@@ -18,3 +18,23 @@ PADDLE_HEIGHT = 2
 PADDLE_SPEED = 3
 PADDLE_COLOR = 7
 PADDLE_SECTIONS = 5
+
+# Paddle response curve, see common/response.py. The curve is symmetric: both outer
+# sections send the ball sideways at 1.73 px/frame (about 0.87x BALL_SPEED) and the
+# inner ones at 1.0 px/frame (0.5x). The old section table had the right side swapped
+PADDLE_MAX_ANGLE = 75  # Degrees from straight up at the paddle ends
+PADDLE_SPEED_UP = 0.0
+PADDLE_SPIN = 0.0
+
+# Particle Properties
+PARTICLE_CAPACITY = 4096
+PARTICLE_GRAVITY = 0.1
+PARTICLE_SPEED = 3
+PARTICLE_LIFE = 30
+PARTICLES_PER_HIT = 12
+
+# Telemetry database, relative to the game folder
+TELEMETRY_PATH = "telemetry.db"
+
+# High scores, relative to the game folder, without extension
+LEADERBOARD_PATH = "leaderboard"
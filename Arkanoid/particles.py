@@ -0,0 +1,103 @@
+import math
+import numpy as np
+import pyxel
+
+
+class ParticlePool:
+    def __init__(self, capacity: int, width: int, height: int, gravity: float) -> None:
+        self.capacity = capacity
+        self.width = width
+        self.height = height
+        self.gravity = gravity
+
+        # Preallocated particle state, a particle is alive while life > 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.int16)
+        self.color = np.zeros(capacity, dtype=np.uint8)
+
+        # Scratch buffers reused every frame
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.floor = np.zeros(capacity, dtype=np.float64)
+        self.px = np.zeros(capacity, dtype=np.int32)
+        self.py = np.zeros(capacity, dtype=np.int32)
+
+        # Next slot to write, oldest particles get recycled when the pool is full
+        self.cursor = 0
+        self.rng = np.random.default_rng()
+
+    def emit(self, x: float, y: float, amount: int, speed: float, life: int, color: int) -> None:
+        amount = min(amount, self.capacity)
+        start = self.cursor
+        end = start + amount
+
+        # Write into at most two contiguous slices when wrapping around
+        if end <= self.capacity:
+            self.spawn(slice(start, end), x, y, speed, life, color)
+        else:
+            self.spawn(slice(start, self.capacity), x, y, speed, life, color)
+            self.spawn(slice(0, end - self.capacity), x, y, speed, life, color)
+
+        self.cursor = end % self.capacity
+
+    def spawn(self, span: slice, x: float, y: float, speed: float, life: int, color: int) -> None:
+        amount = span.stop - span.start
+        angles = self.rng.uniform(0, 2 * math.pi, amount)
+        speeds = self.rng.uniform(speed * 0.25, speed, amount)
+
+        self.x[span] = x
+        self.y[span] = y
+        np.multiply(np.cos(angles), speeds, out=self.vx[span])
+        np.multiply(np.sin(angles), speeds, out=self.vy[span])
+        self.life[span] = life
+        self.color[span] = color
+
+    def update(self) -> None:
+        # Step live slots in place, dead ones would fall forever
+        alive = np.greater(self.life, 0, out=self.alive)
+        np.add(self.vy, self.gravity, out=self.vy, where=alive)
+        np.add(self.x, self.vx, out=self.x, where=alive)
+        np.add(self.y, self.vy, out=self.y, where=alive)
+
+        np.subtract(self.life, 1, out=self.life, where=alive)
+
+    def clear(self) -> None:
+        self.life.fill(0)
+        self.cursor = 0
+
+    def count(self) -> int:
+        return int(np.count_nonzero(self.life))
+
+    def save_state(self, state: dict[str, np.ndarray]) -> None:
+        state["particle_x"][:] = self.x
+        state["particle_y"][:] = self.y
+        state["particle_life"][:] = self.life
+        state["particle_color"][:] = self.color
+
+    def load_state(self, state: dict[str, np.ndarray]) -> None:
+        # Draw straight from the published buffers
+        self.x = state["particle_x"]
+        self.y = state["particle_y"]
+        self.life = state["particle_life"]
+        self.color = state["particle_color"]
+
+    def draw(self) -> None:
+        # Only keep live particles that are on screen
+        np.greater(self.life, 0, out=self.alive)
+
+        # Floor first, a plain cast truncates -0.5 to pixel 0
+        np.copyto(self.px, np.floor(self.x, out=self.floor), casting="unsafe")
+        np.copyto(self.py, np.floor(self.y, out=self.floor), casting="unsafe")
+
+        self.alive &= (self.px >= 0) & (self.px < self.width)
+        self.alive &= (self.py >= 0) & (self.py < self.height)
+
+        if not self.alive.any():
+            return
+
+        # Write all pixels into the screen buffer at once instead of a pset per particle
+        screen = np.ctypeslib.as_array(
+            pyxel.screen.data_ptr(), shape=(self.height, self.width))
+        screen[self.py[self.alive], self.px[self.alive]] = self.color[self.alive]
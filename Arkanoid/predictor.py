@@ -0,0 +1,134 @@
+# Closed-form ball prediction. Between bounces the ball's height follows the
+# game's own integration (gravity first, then move), which sums to an exact
+# parabola in ticks, and its x runs at constant speed between wall clamps.
+# So when and where it next reaches the paddle is a square root and a divmod
+# instead of stepping frame by frame, and it matches the game tick for tick.
+import math
+
+from dataclasses import dataclass
+from typing import Optional
+
+from config import ArkanoidConfig
+
+
+@dataclass
+class Landing:
+    ticks: int  # Ball updates until the one that reaches the paddle
+    t: float  # Fraction of that update's motion before it does, like a sweep Hit
+    x: float  # Ball center then
+    velocity_x: float  # Walls flip it on the way
+
+    # Ball center at the start and end of that update, the segment the game sweeps
+    start_x: float
+    start_y: float
+    end_x: float
+    end_y: float
+
+
+def step_x(x: float, velocity_x: float, ticks: int, low: float, high: float) -> tuple[float, float]:
+    # x and velocity after some ticks, clamping at the walls like Ball.handle_border_collision
+    if velocity_x == 0 or ticks <= 0:
+        return x, velocity_x
+
+    wall, other = (high, low) if velocity_x > 0 else (low, high)
+    first = max(1, math.ceil((wall - x) / velocity_x))
+    if ticks < first:
+        return x + velocity_x * ticks, velocity_x
+
+    # Clamped onto the wall, from there every crossing takes the same number of ticks
+    ticks -= first
+    crossing = max(1, math.ceil((high - low) / abs(velocity_x)))
+    crossings, ticks = divmod(ticks, crossing)
+
+    if crossings % 2:
+        wall, velocity_x = other, -velocity_x
+
+    return wall - velocity_x * ticks, -velocity_x
+
+
+def height_after(y: float, velocity_y: float, gravity: float, ticks: int) -> float:
+    # Velocity grows by gravity before every move, so the moves sum to a parabola
+    return y + velocity_y * ticks + gravity * ticks * (ticks + 1) / 2
+
+
+def first_tick_below(y: float, velocity_y: float, gravity: float, target: float) -> Optional[int]:
+    # First tick whose height reaches target or lower on the screen, None if it never does
+    b = velocity_y + gravity / 2
+    c = y - target
+    discriminant = b * b - 2 * gravity * c
+
+    if gravity <= 0 or discriminant < 0:
+        return None
+
+    ticks = max(1, math.ceil((-b + math.sqrt(discriminant)) / gravity))
+
+    # Rounding can leave the root a tick off either way
+    if height_after(y, velocity_y, gravity, ticks - 1) >= target and ticks > 1:
+        ticks -= 1
+    elif height_after(y, velocity_y, gravity, ticks) < target:
+        ticks += 1
+
+    return ticks
+
+
+def first_tick_above(y: float, velocity_y: float, gravity: float, target: float) -> Optional[int]:
+    # First tick that ends above target, only a rising ball can get there
+    if velocity_y >= 0:
+        return None
+
+    b = velocity_y + gravity / 2
+    c = y - target
+    discriminant = b * b - 2 * gravity * c
+    if discriminant <= 0:
+        return None
+
+    ticks = max(1, math.floor((-b - math.sqrt(discriminant)) / gravity) + 1)
+    return ticks if height_after(y, velocity_y, gravity, ticks) < target else None
+
+
+def predict_landing(x: float, y: float, velocity_x: float, velocity_y: float, radius: float,
+                    paddle_y: float, config: ArkanoidConfig) -> Optional[Landing]:
+    # None when the ball is already past the paddle's top
+    gravity = config.gravity
+    low, high = radius, config.width - radius
+    target = paddle_y - radius
+    ticks = 0
+
+    if y > target:
+        return None
+
+    # Off the top border first, which flips the velocity it has by then
+    top = first_tick_above(y, velocity_y, gravity, radius)
+    if top is not None:
+        x, velocity_x = step_x(x, velocity_x, top, low, high)
+        y, velocity_y = radius, -(velocity_y + gravity * top)
+        ticks = top
+
+    down = first_tick_below(y, velocity_y, gravity, target)
+    if down is None:
+        return None
+
+    # Where the ball starts and ends the update that crosses the paddle's top
+    start_y = height_after(y, velocity_y, gravity, down - 1)
+    end_y = height_after(y, velocity_y, gravity, down)
+    start_x, _ = step_x(x, velocity_x, down - 1, low, high)
+    end_x, end_velocity_x = step_x(x, velocity_x, down, low, high)
+
+    t = (target - start_y) / (end_y - start_y)
+    return Landing(ticks + down, t, start_x + (end_x - start_x) * t, end_velocity_x,
+                   start_x, start_y, end_x, end_y)
+
+
+def paddle_target(landing_x: float, offset: float, paddle_width: float, config: ArkanoidConfig) -> float:
+    # Paddle x that puts the landing at offset along it, -1 left end to 1 right end
+    x = landing_x - (offset + 1) * paddle_width / 2
+    return max(0.0, min(config.width - paddle_width, x))
+
+
+def reach(x: float, target: float, speed: float, ticks: int) -> tuple[float, int]:
+    # Where a paddle stepping toward target ends up, and the direction it still moves in
+    distance = target - x
+    direction = 1 if distance > 0 else -1
+    steps = min(max(ticks, 0), int(abs(distance) // speed))
+
+    return x + direction * steps * speed, direction if steps == ticks and steps > 0 else 0
@@ -0,0 +1,137 @@
+# Monte Carlo survival odds for paddle balancing. Rallies are played bounce
+# to bounce with the landing predictor instead of frame by frame: a bounce is
+# one prediction, one closed-form paddle move and the game's own bounce code,
+# so a rally costs a fraction of a millisecond and millions of them can be
+# spread over a process pool. The autopilot plays like a person would: it
+# starts moving some ticks late and misjudges where the ball comes down, so
+# narrow or slow paddles come up short.
+#
+#     python survival.py paddle_width=30,40,50 paddle_speed=2,3 --rallies 1000000
+import argparse
+import csv
+import random
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+
+import paths
+from common import headless, sweep
+
+# Must happen before the game modules import pyxel
+headless.install()
+
+from arkanoid import Ball, create_paddle, section_score
+from config import ArkanoidConfig, DEFAULT_CONFIG
+from constants import BALL_RADIUS, BALL_COLOR
+from predictor import predict_landing, paddle_target, reach
+
+
+def play_rallies(config: ArkanoidConfig, rallies: int, seed: int, reaction: int = 12,
+                 misjudge: float = 6.0, max_hits: int = 1000) -> dict:
+    rng = random.Random(seed)
+    ball = Ball(config.width//2, config.height//2, BALL_RADIUS, BALL_COLOR, config)
+    paddle = create_paddle(config, ball)
+
+    hits, survived, score = 0, 0, 0
+
+    for _ in range(rallies):
+        ball.reset()
+        paddle.reset()
+
+        for _ in range(max_hits):
+            landing = predict_landing(ball.x, ball.y, ball.velocity.x, ball.velocity.y,
+                                      ball.radius, paddle.y, config)
+            if landing is None:
+                break
+
+            # Aims anywhere along the paddle, wherever it thinks the ball lands
+            guess = landing.x + rng.gauss(0, misjudge)
+            target = paddle_target(guess, rng.uniform(-0.9, 0.9), paddle.width, config)
+            paddle.x, paddle.direction = reach(paddle.x, target, paddle.velocity.x, landing.ticks - reaction)
+
+            # The game's own check over the update that reaches the paddle
+            hit = paddle.find_hit(landing.start_x, landing.start_y, landing.end_x, landing.end_y, ball.radius)
+            if hit is None:
+                break
+
+            hits += 1
+            score += section_score(paddle.get_section(hit.x), config.paddle_sections)[0]
+            ball.bounce_off(paddle, hit)
+        else:
+            survived += 1
+
+    return {"rallies": rallies, "hits": hits, "survived": survived, "score": score}
+
+
+def merge(results: list[dict]) -> dict:
+    total = {key: sum(result[key] for result in results) for key in results[0]}
+    rallies, hits = total["rallies"], total["hits"]
+
+    # A rally ends with one miss unless it hit the cap
+    misses = rallies - total["survived"]
+
+    return {
+        "rallies": rallies,
+        "hit_odds": hits / max(hits + misses, 1),
+        "rally_length": hits / rallies,
+        "survived": total["survived"] / rallies,
+        "score": total["score"] / rallies,
+    }
+
+
+def run(configs: list[ArkanoidConfig], rallies: int, chunk: int, seed: int,
+        processes: Optional[int] = None, **player) -> list[dict]:
+    # Every config split into chunks so one config also uses every core. Configs share the
+    # chunk seeds, so differences between them come from the config and not the dice
+    chunks = [(index, min(chunk, rallies - start), seed + start)
+              for index in range(len(configs)) for start in range(0, rallies, chunk)]
+
+    with ProcessPoolExecutor(processes) as pool:
+        results = list(pool.map(partial(play_rallies, **player),
+                                [configs[index] for index, _, _ in chunks],
+                                [size for _, size, _ in chunks],
+                                [chunk_seed for _, _, chunk_seed in chunks]))
+
+    grouped: list[list[dict]] = [[] for _ in configs]
+    for (index, _, _), result in zip(chunks, results):
+        grouped[index].append(result)
+
+    return [merge(group) for group in grouped]
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Estimate autopilot survival odds for a grid of configs")
+    parser.add_argument("axes", nargs="*",
+                        help="config field and values to sweep, e.g. paddle_width=30,40")
+    parser.add_argument("--rallies", type=int, default=100_000,
+                        help="rallies played per config")
+    parser.add_argument("--chunk", type=int, default=10_000,
+                        help="rallies per pool task")
+    parser.add_argument("--reaction", type=int, default=12,
+                        help="ticks the autopilot waits before moving")
+    parser.add_argument("--misjudge", type=float, default=6.0,
+                        help="standard deviation of its landing guess in pixels")
+    parser.add_argument("--max-hits", type=int, default=1000,
+                        help="hits after which a rally counts as survived")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    axes = sweep.parse_axes(DEFAULT_CONFIG, args.axes)
+    configs = sweep.grid(DEFAULT_CONFIG, axes)
+    results = run(configs, args.rallies, args.chunk, args.seed, args.processes,
+                  reaction=args.reaction, misjudge=args.misjudge, max_hits=args.max_hits)
+
+    # One csv row per config, swept fields first then the odds
+    writer = csv.writer(sys.stdout)
+    writer.writerow(list(axes) + list(results[0]))
+
+    for config, result in zip(configs, results):
+        writer.writerow([getattr(config, name) for name in axes] + list(result.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import random
+
+import paths
+from common import headless, sweep
+
+# Must happen before the game modules import pyxel
+headless.install()
+
+from arkanoid import Game, AutopilotPaddle, Ball, create_paddle
+from config import ArkanoidConfig, DEFAULT_CONFIG
+from constants import BALL_RADIUS, BALL_COLOR
+
+
+class SweepGame(Game):
+    def __init__(self, paddle: AutopilotPaddle, ball: Ball, config: ArkanoidConfig) -> None:
+        self.hits = 0
+        self.rallies = 0
+        super().__init__("Arkanoid", paddle, ball, config)
+
+    def update_score(self, section: int) -> None:
+        super().update_score(section)
+        self.hits += 1
+
+        # Aim for a random paddle section after every bounce
+        self.paddle.aim = random.uniform(-0.9, 0.9)
+
+    def restart_game(self) -> None:
+        super().restart_game()
+        self.rallies += 1
+
+
+def restart_keys(frame: int) -> list[int]:
+    # Keep tapping restart so a lost rally starts a new one, the paddle plays itself
+    return [headless.KEY_R] if frame % 2 else []
+
+
+def evaluate(config: ArkanoidConfig, frames: int, seed: int) -> dict:
+    random.seed(seed)
+
+    ball = Ball(config.width//2, config.height//2,
+                BALL_RADIUS, BALL_COLOR, config)
+    paddle = create_paddle(config, ball, autopilot=True)
+
+    headless.set_frame_limit(frames)
+    headless.set_draw_enabled(False)
+    headless.set_input_source(restart_keys)
+
+    game = SweepGame(paddle, ball, config)
+
+    # The unfinished last rally counts too
+    rallies = game.rallies + 1
+
+    return {
+        "rallies": rallies,
+        "rally_length": game.hits / rallies,
+        "score": game.score,
+    }
+
+
+if __name__ == "__main__":
+    sweep.main(evaluate, DEFAULT_CONFIG)
@@ -1,17 +1,15 @@
 import pyxel
 import random
+import bisect
 
 from dataclasses import dataclass
+from typing import Optional
+import paths
+from common.fixed import quantize
+from config import EggRiseConfig, DEFAULT_CONFIG
 from constants import (
     PLATFORM_COLOR,
-    WIDTH,
-    HEIGHT,
-    PLATFORM_GAP,
-    PLATFORM_WIDTH,
-    PLATFORM_MAX_SPEED,
-    PLATFORM_MIN_SPEED,
     LAST_PLATFORM_COLOR,
-    PLATFORM_HEIGHT,
 )
 
 
@@ -21,6 +19,12 @@ class Vector2D:
     y: float
 
 
+@dataclass
+class Clock:
+    # Ticks the platforms have moved for, shared by every platform of a generator
+    tick: int = 0
+
+
 class Egg:
     def __init__(self, x: float, y: float, radius: float, color: int, velocity: Vector2D) -> None:
         self.x = x
@@ -34,8 +38,16 @@ class Egg:
         self.is_grounded = False
         self.is_jumping = False
 
-    def move(self, direction: int) -> None:
-        self.x += self.velocity.x * direction
+        # Where on its platform the egg stands while grounded
+        self.offset = 0.0
+
+    def move(self, platform_x: Optional[float]) -> None:
+        # A grounded egg rides its platform, so it is wherever the platform is
+        if platform_x is not None:
+            self.x = platform_x + self.offset
+        else:
+            self.x += self.velocity.x
+
         self.y += self.velocity.y
 
     def jump(self, force: float) -> None:
@@ -56,23 +68,45 @@ class Egg:
 
 
 class Platform:
-    def __init__(self, index: int, x: float, y: float, width: float, height: float, color: int, velocity: Vector2D, direction: int) -> None:
+    def __init__(self, index: int, x: float, y: float, width: float, height: float, color: int, velocity: Vector2D, direction: int, config: EggRiseConfig = DEFAULT_CONFIG, clock: Optional[Clock] = None) -> None:
         self.index = index
-        self.x = x
         self.y = y
         self.width = width
         self.height = height
         self.color = color
+        self.config = config
 
-        # Movement
+        # Movement is a triangle wave between the walls: x is looked up from the clock, never stepped.
+        # A lap is to the right wall and back, phase is where on it the platform starts
         self.velocity = velocity
-        self.direction = direction
+        self.clock = clock if clock is not None else Clock()
+        self.start = self.clock.tick
+        self.travel = max(config.width - width, 0)
+        self.phase = x if direction > 0 else 2 * self.travel - x
 
-    def move(self) -> None:
-        if self.y - 50 > HEIGHT:
-            return
+    @property
+    def x(self) -> float:
+        return self.x_at(self.clock.tick)
+
+    @property
+    def direction(self) -> int:
+        return self.direction_at(self.clock.tick)
+
+    def lap_position(self, tick: float) -> float:
+        lap = 2 * self.travel
+        if not lap:
+            return 0.0
+
+        # Grid values times whole ticks stay on the grid, so fixed-point mode stays exact
+        return (self.phase + self.velocity.x * (tick - self.start)) % lap
+
+    def x_at(self, tick: float) -> float:
+        # Any tick, past or future, costs the same
+        position = self.lap_position(tick)
+        return position if position <= self.travel else 2 * self.travel - position
 
-        self.x += self.velocity.x * self.direction
+    def direction_at(self, tick: float) -> int:
+        return 1 if self.lap_position(tick) < self.travel else -1
 
     def draw(self) -> None:
         pyxel.rect(self.x, self.y, self.width, self.height, self.color)
@@ -118,15 +152,25 @@ class Platform:
 
 
 class PlatformGenerator:
-    def __init__(self, _max: int, is_infinite: bool) -> None:
+    def __init__(self, _max: int, is_infinite: bool, config: EggRiseConfig = DEFAULT_CONFIG, seed: Optional[int] = None) -> None:
         self.max = _max
         self.platforms: list[Platform] = []
         self.current_idx = 0
         self.is_infinite = is_infinite
+        self.config = config
+
+        # Own random stream so a seed always gives the same level, whatever else uses random
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        # Moves every platform this generator makes
+        self.clock = Clock()
 
     def generate(self) -> list[Platform]:
+        config = self.config
+
         # Find the possible highest y pos of platform
-        highest_y = HEIGHT * 0.9
+        highest_y = config.height * 0.9
 
         if self.platforms:
             # higher platform is negative y
@@ -135,29 +179,34 @@ class PlatformGenerator:
 
         # Continously generate new platforms until max limit
         while len(self.platforms) < self.max:
-            pf_x = random.randrange(0, WIDTH - PLATFORM_WIDTH)
+            pf_x = self.random.randrange(0, int(config.width - config.platform_width))
 
             # New pf_y should be last platform y - platform gap
             if self.platforms:
-                pf_y = highest_y - PLATFORM_GAP
+                pf_y = highest_y - config.platform_gap
             else:
                 # For first platform
-                pf_y = HEIGHT * 0.9 - (PLATFORM_GAP * self.current_idx)
+                pf_y = config.height * 0.9 - (config.platform_gap * self.current_idx)
 
             # Set new highest y
             highest_y = pf_y
 
             # Randomize speed of platform and starting direction
-            random_velocity = Vector2D(random.uniform(
-                PLATFORM_MIN_SPEED, PLATFORM_MAX_SPEED), 0)
-            random_direction = random.choice([1, -1])
+            random_velocity = Vector2D(self.random.uniform(
+                config.platform_min_speed, config.platform_max_speed), 0)
+            random_direction = self.random.choice([1, -1])
+
+            # Everything after this only adds and subtracts, so it stays on the grid
+            if config.fixed_point:
+                pf_y = quantize(pf_y)
+                random_velocity.x = quantize(random_velocity.x)
 
             # Make last platform color different if not infinite
             color = PLATFORM_COLOR if self.current_idx < self.max - \
                 1 or self.is_infinite else LAST_PLATFORM_COLOR
 
-            platform = Platform(self.current_idx, pf_x, pf_y, PLATFORM_WIDTH, PLATFORM_HEIGHT,
-                                color, random_velocity, random_direction)
+            platform = Platform(self.current_idx, pf_x, pf_y, config.platform_width, config.platform_height,
+                                color, random_velocity, random_direction, config, self.clock)
 
             self.platforms.append(platform)
             self.current_idx += 1
@@ -171,3 +220,27 @@ class PlatformGenerator:
     def reset(self) -> None:
         self.platforms.clear()
         self.current_idx = 0
+
+        # Restarting a seeded level replays the same platforms
+        if self.seed is not None:
+            self.random.seed(self.seed)
+
+
+class PlatformIndex:
+    def __init__(self) -> None:
+        # Platform tops in world space, sorted from highest (smallest y) to lowest
+        self.keys: list[float] = []
+        self.platforms: list[Platform] = []
+
+    def rebuild(self, platforms: list[Platform], camera_y: float) -> None:
+        # Platforms only move sideways, so the order holds until the list changes
+        ordered = sorted(platforms, key=lambda pf: pf.y)
+        self.keys = [platform.y - camera_y for platform in ordered]
+        self.platforms = ordered
+
+    def query(self, top: float, bottom: float) -> list[Platform]:
+        # Platforms whose top lies in the world y range, highest first
+        start = bisect.bisect_left(self.keys, top)
+        end = bisect.bisect_right(self.keys, bottom)
+
+        return self.platforms[start:end]
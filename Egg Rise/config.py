@@ -0,0 +1,70 @@
+from dataclasses import dataclass, replace
+import paths
+from common import fixed
+from constants import (
+    WIDTH,
+    HEIGHT,
+    GRAVITY,
+    JUMP_MULTIPLIER,
+    PLATFORM_GAP,
+    PLATFORM_WIDTH,
+    PLATFORM_HEIGHT,
+    PLATFORM_MIN_SPEED,
+    PLATFORM_MAX_SPEED,
+    CAMERA_SPEED,
+    CAMERA_OFFSET,
+    RESPAWN_TIME,
+    REMOVE_AMOUNT,
+)
+
+
+@dataclass(frozen=True)
+class EggRiseConfig:
+    # World size
+    width: int = WIDTH
+    height: int = HEIGHT
+
+    # Jump properties
+    gravity: float = GRAVITY
+    jump_multiplier: float = JUMP_MULTIPLIER
+
+    # Platform properties
+    platform_gap: float = PLATFORM_GAP
+    platform_width: float = PLATFORM_WIDTH
+    platform_height: float = PLATFORM_HEIGHT
+    platform_min_speed: float = PLATFORM_MIN_SPEED
+    platform_max_speed: float = PLATFORM_MAX_SPEED
+    remove_amount: int = REMOVE_AMOUNT
+
+    # Game properties
+    camera_speed: float = CAMERA_SPEED
+    camera_offset: float = CAMERA_OFFSET
+    respawn_time: float = RESPAWN_TIME
+
+    # Integer fixed-point physics, see common/fixed.py
+    fixed_point: bool = False
+
+    @property
+    def jump_force(self) -> float:
+        # Depends on platform gap, same formula as JUMP_FORCE
+        height = 2 * self.gravity * self.platform_gap * self.jump_multiplier
+
+        if self.fixed_point:
+            return -fixed.sqrt(fixed.quantize(height))
+
+        return -(height ** 0.5)
+
+    def with_fixed_point(self) -> "EggRiseConfig":
+        return replace(self, fixed_point=True,
+                       gravity=fixed.quantize(self.gravity),
+                       jump_multiplier=fixed.quantize(self.jump_multiplier),
+                       platform_gap=fixed.quantize(self.platform_gap),
+                       platform_width=fixed.quantize(self.platform_width),
+                       platform_height=fixed.quantize(self.platform_height),
+                       platform_min_speed=fixed.quantize(self.platform_min_speed),
+                       platform_max_speed=fixed.quantize(self.platform_max_speed),
+                       camera_speed=fixed.quantize(self.camera_speed),
+                       camera_offset=fixed.quantize(self.camera_offset))
+
+
+DEFAULT_CONFIG = EggRiseConfig()
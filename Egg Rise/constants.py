@@ -35,3 +35,15 @@ WIN_COLOR = 10
 LOSE_COLOR = 8
 BG_COLOR = 5
 DEBUG_COLOR = 10
+
+# Telemetry database, relative to the game folder
+TELEMETRY_PATH = "telemetry.db"
+
+# High scores, relative to the game folder, without extension. Infinite and finite levels rank apart
+LEADERBOARD_PATH = "leaderboard-{mode}"
+
+# Ghost races, one archive of recorded runs per level seed
+GHOST_PATH = "ghosts-{seed}.npz"
+GHOST_COLOR = 6
+MAX_GHOSTS = 5000
+GHOST_SEED = 0  # Level raced when no seed is given
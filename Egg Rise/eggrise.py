@@ -1,36 +1,47 @@
 import pyxel
 import random
 
-from classes import Egg, Platform, PlatformGenerator
+from typing import Optional
+
+import paths
+from common.governor import FrameGovernor
+from common.inputs import InputSnapshot
+from common.latency import LatencyProbe
+from common.services import Services
+from common.simworker import Layout, SimWorker
+from common.telemetry import Telemetry
+from classes import Egg, Vector2D, Platform, PlatformGenerator, PlatformIndex
+from ghosts import GhostRace, GhostRecorder
+from config import EggRiseConfig, DEFAULT_CONFIG
 from constants import (
-    JUMP_FORCE,
-    GRAVITY,
-    RESPAWN_TIME,
     MID_WIDTH,
     MID_HEIGHT,
     WIN_COLOR,
     LOSE_COLOR,
-    CAMERA_SPEED,
     BG_COLOR,
-    CAMERA_OFFSET,
-    REMOVE_AMOUNT,
     DEBUG_COLOR,
 )
 
 
 class EggRiseModel:
-    def __init__(self, title: str, width: int, height: int, fps: int, egg: Egg, max_eggs: int, num_platforms: int, platform_generator: PlatformGenerator, is_infinite: bool) -> None:
+    def __init__(self, title: str, width: int, height: int, fps: int, egg: Egg, max_eggs: int, num_platforms: int, platform_generator: PlatformGenerator, is_infinite: bool, config: EggRiseConfig = DEFAULT_CONFIG, telemetry: Optional[Telemetry] = None) -> None:
         # Properties
         self.title = title
         self.width = width
         self.height = height
         self.fps = fps
         self.num_platforms = num_platforms
+        self.config = config
+        self.telemetry = telemetry
 
         # Game objects
         self.egg = egg
         self.platforms: list[Platform] = []
         self.platform_generator = platform_generator
+        self.platform_index = PlatformIndex()
+
+        # Platform positions are a function of this clock
+        self.clock = platform_generator.clock
 
         # Game state
         self.is_game_over = False
@@ -38,34 +49,45 @@ class EggRiseModel:
         self.max_eggs = max_eggs
         self.eggs_left = self.max_eggs
         self.score = 0
+        self.best_index = 0  # Highest platform reached, drops don't score again
         self.is_respawning = False
         self.is_camera_moving = False
         self.is_infinite = is_infinite
 
         self.last_removed_index = 0
+        self.spawn_frame = 0
+
+        # How far the camera has scrolled, egg.y - camera_y is a world position
+        self.camera_y = 0.0
+
+        # Own tick counter so the model runs without a pyxel window
+        self.frame_count = 0
 
     def update(self) -> None:
+        self.frame_count += 1
+
         # Don't do anything if game is over or has won
         if self.is_game_over:
             return
 
         # Continuously generate if infinite
         if self.is_infinite:
-            self.generate_new_platforms(REMOVE_AMOUNT)
+            self.generate_new_platforms(self.config.remove_amount)
 
-        # Move egg horizontally if on platform
-        egg_direction = self.current_platform.direction if self.current_platform else 0
-        self.egg.move(egg_direction)
-        self.egg.apply_gravity(GRAVITY)
+        # Platforms move by the clock ticking, they stand still once the game is over
+        self.clock.tick += 1
 
-        # Move platforms and check if egg is out of bounds
+        # Egg rides the platform it is on
+        self.egg.move(self.current_platform.x if self.egg.is_grounded else None)
+        self.egg.apply_gravity(self.config.gravity)
+
+        # Check if egg is out of bounds or landed
         self.check_out_of_bounds()
-        self.move_platforms()
         self.handle_platform_collision()
 
         # Move the camera if egg is on a platform and reaches at least the 2nd platform
         if self.egg.is_grounded and self.has_reached_platform_k(1):
-            self.move_camera(CAMERA_SPEED)
+            self.move_camera(self.config.camera_speed)
 
     def generate_new_platforms(self, amount: int) -> None:
         if self.current_platform.index >= self.last_removed_index + amount:
@@ -79,11 +101,13 @@ class EggRiseModel:
 
                 self.platform_generator.remove(amount)
                 self.platforms = self.platform_generator.generate()
+                self.platform_index.rebuild(self.platforms, self.camera_y)
 
     def check_out_of_bounds(self) -> None:
         # Game over if we have no eggs left
         if self.eggs_left <= 0:
             self.is_game_over = True
+            self.record("game_over", value=self.score)
             return
 
         # Check if egg falls at the bottom
@@ -95,24 +119,29 @@ class EggRiseModel:
             if not self.is_respawning:
                 self.eggs_left -= 1
                 self.is_respawning = True
+                self.record("death", self.current_platform.index,
+                            self.frame_count - self.spawn_frame)
 
             # Wait some time before respawning the egg
-            if self.has_time_elapsed(RESPAWN_TIME):
+            if self.has_time_elapsed(self.config.respawn_time):
                 self.is_respawning = False
                 self.reset(self.current_platform.index)
 
     def has_time_elapsed(self, seconds: float) -> bool:
-        return pyxel.frame_count % (self.fps * seconds) == 0
+        return self.frame_count % (self.fps * seconds) == 0
 
     def start_game(self) -> None:
         self.is_game_over = False
         self.has_won = False
         self.eggs_left = self.max_eggs
         self.score = 0
+        self.best_index = 0
         self.is_respawning = False
+        self.camera_y = 0.0
 
         self.clear_platforms()
         self.platforms = self.platform_generator.generate()
+        self.platform_index.rebuild(self.platforms, self.camera_y)
         self.last_removed_index = 0
         # print("New: ", len(self.platforms))
         self.reset(0)
@@ -127,12 +156,14 @@ class EggRiseModel:
             platform_index)]
 
         # Set egg position depending on platform
-        self.egg.x = self.current_platform.x + self.current_platform.width // 2
+        self.egg.offset = self.current_platform.width // 2
+        self.egg.x = self.current_platform.x + self.egg.offset
         self.egg.y = self.current_platform.y - self.egg.radius
         self.egg.is_grounded = True
         self.egg.is_jumping = False
         self.egg.velocity.y = 0
         self.egg.velocity.x = self.current_platform.velocity.x
+        self.spawn_frame = self.frame_count
 
         # Randomize egg color
         self.randomize_egg()
@@ -154,6 +185,7 @@ class EggRiseModel:
     def teleport(self) -> None:
         self.reset(self.current_platform.index + 1)
         self.score += 1
+        self.best_index = max(self.best_index, self.current_platform.index)
 
     def randomize_egg(self) -> None:
         while True:
@@ -167,63 +199,99 @@ class EggRiseModel:
         self.egg.jump(force)
         self.egg.velocity.x = 0
 
-    def move_platforms(self) -> None:
-        if not self.platforms:
-            raise ValueError("No platforms to update")
-
-        for platform in self.platforms:
-            platform.move()
-
-            # Change platform direction on borders
-            if platform.x <= 0:
-                platform.x = 0
-                platform.direction = 1
-
-            elif platform.x + platform.width >= self.width:
-                platform.x = self.width - platform.width
-                platform.direction = -1
-
     def handle_platform_collision(self) -> None:
         assert self.current_platform is not None
 
         # Check if egg has reached the top
         if self.has_reached_platform_k(self.num_platforms - 1) and not self.is_infinite:
+            if not self.has_won:
+                self.record("win", value=self.score)
+
             self.has_won = True
             return
 
-        # Only check for collision on next platform
-        target_platform = self.platforms[self.get_platform_index(
-            self.current_platform.index + 1)]
+        # Only a falling egg can land
+        if self.egg.is_grounded or self.egg.velocity.y < 0:
+            return
+
+        # Platforms whose top the egg's bottom crossed, in world space so the camera doesn't matter.
+        # Small offset for better collision, like creating a box instead of a point
         egg_bottom = self.egg.y + self.egg.radius
+        candidates = self.platform_index.query(
+            egg_bottom - self.config.platform_height - self.camera_y,
+            egg_bottom + self.egg.velocity.y - self.camera_y)
+
+        # Land on the highest one that is under the egg, only candidates' positions are computed
+        tick = self.clock.tick
+        target_platform = next((platform for platform in candidates
+                                if 0 <= self.egg.x - platform.x_at(tick) <= platform.width), None)
+        if target_platform is None:
+            return
 
-        # If egg is going down and within platform bounds
-        if (self.egg.velocity.y >= 0 and
-                egg_bottom <= target_platform.y + target_platform.height and  # Egg is above platform
-                # Small offset for better collision, like creating a box instead of a point
-                egg_bottom >= target_platform.y - self.egg.velocity.y and
-                self.egg.x >= target_platform.x and
-                self.egg.x <= target_platform.x + target_platform.width
-                ):
+        # Position egg on platform and adjust state
+        self.egg.y = target_platform.y - self.egg.radius
+        self.egg.offset = self.egg.x - target_platform.x_at(tick)
+        self.egg.is_grounded = True
+        self.egg.is_jumping = False
 
-            # Position egg on platform and adjust state
-            self.egg.y = target_platform.y - self.egg.radius
-            self.egg.is_grounded = True
-            self.egg.is_jumping = False
+        # Can't move down and set egg speed same as new platform
+        self.egg.velocity.y = 0
+        self.egg.velocity.x = target_platform.velocity.x
+        self.current_platform = target_platform
+
+        # Score every platform climbed past the best so far, skips included
+        if target_platform.index > self.best_index:
+            self.score += target_platform.index - self.best_index
+            self.best_index = target_platform.index
+            self.record("platform_reached", target_platform.index)
+
+    def record(self, kind: str, key: Optional[int] = None, value: Optional[float] = None) -> None:
+        if self.telemetry is not None:
+            self.telemetry.event(self.frame_count, kind, key, value)
+
+    def save_state(self, state: dict) -> None:
+        egg = self.egg
+        state["egg"][:] = (egg.x, egg.y, egg.color, egg.is_grounded)
+        state["game"][:] = (self.eggs_left, self.score, self.is_game_over, self.has_won,
+                            self.is_camera_moving, self.camera_y, self.current_platform.index, len(self.platforms))
+
+        for row, platform in enumerate(self.platforms):
+            state["platforms"][row] = (platform.index, platform.x, platform.y,
+                                       platform.width, platform.height, platform.color)
+
+    def load_state(self, state: dict) -> None:
+        egg_x, egg_y, color, is_grounded = state["egg"]
+        self.egg.x, self.egg.y = float(egg_x), float(egg_y)
+        self.egg.color, self.egg.is_grounded = int(color), bool(is_grounded)
+
+        eggs_left, score, is_game_over, has_won, is_camera_moving, camera_y, current, count = state["game"]
+        self.eggs_left, self.score = int(eggs_left), int(score)
+        self.is_game_over, self.has_won = bool(is_game_over), bool(has_won)
+        self.is_camera_moving, self.camera_y = bool(is_camera_moving), float(camera_y)
+
+        # Only what drawing needs, the platforms don't move here
+        self.platforms = [Platform(int(index), float(x), float(y), float(width), float(height), int(color),
+                                   Vector2D(0, 0), 1, self.config)
+                          for index, x, y, width, height, color in state["platforms"][:int(count)]]
+        self.current_platform = self.platforms[self.get_platform_index(int(current))]
+
+    def state_values(self) -> list[float]:
+        # What a desync would show up in, the egg's color is only looks
+        egg = self.egg
+        values = [egg.x, egg.y, egg.velocity.x, egg.velocity.y, egg.is_grounded, egg.is_jumping,
+                  self.camera_y, self.score, self.eggs_left, self.current_platform.index]
 
-            # Can't move down and set egg speed same as new platform
-            self.egg.velocity.y = 0
-            self.egg.velocity.x = target_platform.velocity.x
+        for platform in self.platforms:
+            values += (platform.index, platform.x, platform.y, platform.direction)
 
-            # We move to next platform and add score
-            self.current_platform = target_platform
-            self.score += 1
+        return values
 
     def has_reached_platform_k(self, index: int) -> bool:
         return self.current_platform.index >= index
 
     def move_camera(self, speed: float) -> None:
         # Target position is based on a multiplier of screen height
-        target_y = self.height * CAMERA_OFFSET
+        target_y = self.height * self.config.camera_offset
 
         # Keep moving until egg position is higher than target
         if self.egg.y < target_y:
@@ -231,6 +299,7 @@ class EggRiseModel:
 
             # Move egg and platforms down together
             self.egg.y += speed
+            self.camera_y += speed
 
             for platform in self.platforms:
                 platform.y += speed
@@ -244,9 +313,13 @@ class EggRiseView:
         self.model = model
         self.text_amount = 0
 
-    def draw(self) -> None:
+    def draw(self, ghost_race: Optional[GhostRace] = None) -> None:
         self.clear_screen()
 
+        # Ghosts go under everything else
+        if ghost_race is not None:
+            ghost_race.draw(self.model.camera_y)
+
         # Draw game objects
         self.model.egg.draw()
 
@@ -303,37 +376,117 @@ class EggRiseView:
         pyxel.text(MID_WIDTH - len(text) * 4 // 2,
                    MID_HEIGHT, text, LOSE_COLOR)
 
+    def display_rank(self, rank: int, count: int) -> None:
+        text = f"Rank {rank} of {count}"
+        pyxel.text(MID_WIDTH - len(text) * 4 // 2,
+                   MID_HEIGHT + 20, text, 7)
+
     def display_restart(self, color: int) -> None:
         text = "Press 'R' to restart"
         pyxel.text(MID_WIDTH - len(text) * 4 // 2,
                    MID_HEIGHT + 10, text, color)
 
 
+# Every button the controller reads
+INPUT_KEYS = (pyxel.KEY_Q, pyxel.KEY_R, pyxel.KEY_SPACE, pyxel.KEY_C)
+
+
+def state_layout(num_platforms: int, num_ghosts: int) -> Layout:
+    # What the simulation worker publishes for the window to draw
+    return {
+        "egg": 4,
+        "game": 8,
+        "platforms": (num_platforms, 6),
+        "ghost_x": num_ghosts,
+        "ghost_y": num_ghosts,
+        "ghost_frame": 1,
+        "rank": 2,
+    }
+
+
 class EggRiseController:
-    def __init__(self, model: EggRiseModel, view: EggRiseView) -> None:
+    def __init__(self, model: EggRiseModel, view: EggRiseView, ghost_race: Optional[GhostRace] = None, recorder: Optional[GhostRecorder] = None, worker: Optional[SimWorker] = None, services: Optional[Services] = None) -> None:
         self.model = model
         self.view = view
+        self.worker = worker  # Simulates in another process, this one only draws
+        self.services = services if services is not None else Services()
+
+        # Where the last finished run placed, 0 until it is ranked
+        self.rank = 0
+        self.ranked_count = 0
+
+        # Ghost mode, races recorded runs and records this one
+        self.ghost_race = ghost_race
+        self.recorder = recorder
+
+        # Frames from pressing jump until the egg visibly moves
+        self.latency_probe = LatencyProbe(
+            [pyxel.KEY_SPACE], lambda: round(self.model.egg.y))
+
+        # Sheds optional displays first (debug first) when frames run long
+        self.governor = FrameGovernor(
+            self.model.fps, ["debug", "cheat_help", "num_platforms", "ghosts"])
 
         # Setup game window
         pyxel.init(self.model.width, self.model.height,
                    title=self.model.title, fps=self.model.fps)
 
     def run(self) -> None:
-        self.model.start_game()
-        pyxel.run(self.update, self.draw)
+        self.start_game()
+
+        update = self.update if self.worker is None else self.update_worker
+        # The profiler goes outside, so the governor's own time is sampled too
+        pyxel.run(*self.services.wrap(*self.governor.wrap(update, self.draw)))
 
     def update(self) -> None:
+        # Sample input first so a press acts on this tick, not the next one
+        snapshot = InputSnapshot.sample(INPUT_KEYS)
+
+        # Only time presses that can actually make the egg jump
+        if self.can_jump() and self.model.egg.is_grounded:
+            self.latency_probe.on_input(self.model.frame_count, snapshot)
+
+        self.handle_input(snapshot)
         self.model.update()
-        self.handle_input()
+        self.update_ghosts()
+        self.submit_score()
+
+        if self.services.state_hash is not None:
+            self.services.state_hash.update(self.model.state_values())
+
+        latency = self.latency_probe.on_tick_end(self.model.frame_count - 1)
+        if latency is not None:
+            self.model.record("input_latency", value=latency)
+
+    def update_worker(self) -> None:
+        snapshot = InputSnapshot.sample(INPUT_KEYS)
+
+        # The window belongs to this process
+        if snapshot.is_pressed(pyxel.KEY_Q):
+            pyxel.quit()
+
+        # Hand this tick's input to the worker, draw() picks up its state
+        self.worker.step(snapshot.held)
 
     def draw(self) -> None:
-        self.view.draw()
+        if self.worker is not None:
+            state = self.worker.latest()
+            if state is not None:
+                self.load_state(state)
+
+        # Ghosts are simulated every tick even when drawing them is shed
+        self.view.draw(self.ghost_race if self.governor.is_enabled("ghosts") else None)
         self.view.display_status(self.model.eggs_left, self.model.score)
 
         # Optional displays
-        self.view.display_num_platforms(self.model.num_platforms)
-        self.view.display_cheat_help()
-        self.view.display_debug()
+        if self.governor.is_enabled("num_platforms"):
+            self.view.display_num_platforms(self.model.num_platforms)
+
+        if self.governor.is_enabled("cheat_help"):
+            self.view.display_cheat_help()
+
+        if self.governor.is_enabled("debug"):
+            self.view.display_debug()
 
         if self.model.is_game_over:
             self.view.display_game_over()
@@ -343,18 +496,78 @@ class EggRiseController:
             self.view.display_win()
             self.view.display_restart(WIN_COLOR)
 
-    def handle_input(self) -> None:
+        if self.rank and (self.model.is_game_over or self.model.has_won):
+            self.view.display_rank(self.rank, self.ranked_count)
+
+        if self.services.capture is not None:
+            self.services.capture.capture()
+
+    def handle_input(self, snapshot: InputSnapshot) -> None:
         # Quit game
-        if pyxel.btnp(pyxel.KEY_Q):
+        if snapshot.is_pressed(pyxel.KEY_Q):
             pyxel.quit()
 
         # Restart game
-        if pyxel.btnp(pyxel.KEY_R):
-            self.model.start_game()
+        if snapshot.is_pressed(pyxel.KEY_R):
+            self.start_game()
 
         # Jump
-        if pyxel.btnp(pyxel.KEY_SPACE) and not (self.model.is_game_over or self.model.has_won or self.model.is_camera_moving):
-            self.model.jump(JUMP_FORCE)
+        if snapshot.is_pressed(pyxel.KEY_SPACE) and self.can_jump():
+            self.model.jump(self.model.config.jump_force)
 
-        if pyxel.btn(pyxel.KEY_C) and self.model.has_time_elapsed(0.5) and not (self.model.is_game_over or self.model.has_won):
+        if snapshot.is_held(pyxel.KEY_C) and self.model.has_time_elapsed(0.5) and not (self.model.is_game_over or self.model.has_won):
             self.model.teleport()
+
+    def start_game(self) -> None:
+        self.model.start_game()
+        self.rank = 0
+
+        # An unfinished run is dropped, not saved
+        if self.recorder is not None:
+            self.recorder.start(self.model)
+
+        if self.ghost_race is not None:
+            self.ghost_race.restart()
+
+    def update_ghosts(self) -> None:
+        if self.ghost_race is not None:
+            self.ghost_race.update()
+
+        if self.recorder is None:
+            return
+
+        self.recorder.record(self.model)
+
+        # Save the run once it is over
+        if self.model.is_game_over or self.model.has_won:
+            self.recorder.finish(self.model.score)
+
+    def submit_score(self) -> None:
+        # Once per run, the tick it ends
+        leaderboard = self.services.leaderboard
+        if leaderboard is None or self.rank:
+            return
+
+        if self.model.is_game_over or self.model.has_won:
+            self.rank = leaderboard.submit(self.model.score)
+            self.ranked_count = len(leaderboard)
+
+    def save_state(self, state: dict) -> None:
+        self.model.save_state(state)
+        state["rank"][:] = (self.rank, self.ranked_count)
+
+        if self.ghost_race is not None:
+            self.ghost_race.save_state(state)
+
+    def load_state(self, state: dict) -> None:
+        self.model.load_state(state)
+        self.rank, self.ranked_count = int(state["rank"][0]), int(state["rank"][1])
+
+        if self.ghost_race is not None:
+            self.ghost_race.load_state(state)
+
+    def close(self) -> None:
+        self.services.close()
+
+    def can_jump(self) -> bool:
+        return not (self.model.is_game_over or self.model.has_won or self.model.is_camera_moving)
@@ -0,0 +1,236 @@
+# Ghost races. A run is recorded as keyframes of the egg's world position and
+# per-tick motion, taken only on ticks where simple motion (vy += ay, x += vx,
+# y += vy) stops predicting the egg: jumps, landings, wall bounces, respawns.
+# Playback advances every ghost with that same motion in one vectorized pass,
+# then lands the ghosts that have a keyframe on this tick.
+import os
+import numpy as np
+import pyxel
+
+from typing import TYPE_CHECKING
+
+import paths
+from common.files import atomic_write
+
+if TYPE_CHECKING:
+    from eggrise import EggRiseModel
+
+
+# Pixels drawn around each ghost's position, a small plus
+GHOST_SHAPE = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Next keyframe tick of a ghost with no keyframes left
+NO_KEYFRAME = np.iinfo(np.int64).max
+
+
+def load_archive(path: str) -> dict[str, np.ndarray]:
+    if not os.path.exists(path):
+        return {
+            "frames": np.zeros(0, dtype=np.int64),
+            "states": np.zeros((0, 5)),
+            "offsets": np.zeros(1, dtype=np.int64),
+            "lengths": np.zeros(0, dtype=np.int64),
+            "scores": np.zeros(0, dtype=np.int64),
+        }
+
+    with np.load(path) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def top_runs(archive: dict[str, np.ndarray], limit: int) -> dict[str, np.ndarray]:
+    # Best scores first, older runs win ties
+    order = np.argsort(-archive["scores"], kind="stable")[:limit]
+    offsets = archive["offsets"]
+    keep = [np.arange(offsets[run], offsets[run + 1]) for run in order]
+    rows = np.concatenate(keep) if keep else np.zeros(0, dtype=np.int64)
+    counts = offsets[order + 1] - offsets[order]
+
+    return {
+        "frames": archive["frames"][rows],
+        "states": archive["states"][rows],
+        "offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        "lengths": archive["lengths"][order],
+        "scores": archive["scores"][order],
+    }
+
+
+def save_archive(path: str, archive: dict[str, np.ndarray]) -> None:
+    with atomic_write(path) as file:
+        np.savez(file, **archive)
+
+
+class GhostRecorder:
+    def __init__(self, path: str, limit: int, tolerance: float = 0.5) -> None:
+        self.path = path
+        self.limit = limit  # Runs kept in the archive
+        self.tolerance = tolerance  # Pixels playback may drift before a keyframe
+
+        self.frames: list[int] = []
+        self.states: list[tuple[float, float, float, float, float]] = []
+        self.frame = 0
+        self.is_recording = False
+
+        # What playback shows this tick, and where the egg actually was
+        self.state = (0.0, 0.0, 0.0, 0.0, 0.0)
+        self.last_x = 0.0
+        self.last_y = 0.0
+
+    def start(self, model: "EggRiseModel") -> None:
+        self.frames.clear()
+        self.states.clear()
+        self.frame = 0
+        self.is_recording = True
+
+        self.last_x, self.last_y = model.egg.x, model.egg.y - model.camera_y
+        self.add_keyframe(model, 0.0, 0.0)
+
+    def record(self, model: "EggRiseModel") -> None:
+        # Call once after every model tick
+        if not self.is_recording:
+            return
+
+        self.frame += 1
+        x, y, vx, vy, ay = self.state
+        vy += ay
+        x += vx
+        y += vy
+        self.state = (x, y, vx, vy, ay)
+
+        egg_x, egg_y = model.egg.x, model.egg.y - model.camera_y
+        if abs(egg_x - x) > self.tolerance or abs(egg_y - y) > self.tolerance:
+            self.add_keyframe(model, egg_x - self.last_x, egg_y - self.last_y)
+
+        self.last_x, self.last_y = egg_x, egg_y
+
+    def add_keyframe(self, model: "EggRiseModel", vx: float, vy: float) -> None:
+        # Falling eggs speed up, grounded or respawning ones keep their motion
+        is_falling = not (model.egg.is_grounded or model.is_respawning)
+        ay = model.config.gravity if is_falling else 0.0
+
+        self.state = (model.egg.x, model.egg.y - model.camera_y, vx, vy, ay)
+        self.frames.append(self.frame)
+        self.states.append(self.state)
+
+    def finish(self, score: int) -> None:
+        if not self.is_recording:
+            return
+
+        self.is_recording = False
+
+        archive = load_archive(self.path)
+        offsets = archive["offsets"]
+        archive["frames"] = np.concatenate([archive["frames"], self.frames])
+        archive["states"] = np.concatenate([archive["states"], self.states])
+        archive["offsets"] = np.append(offsets, offsets[-1] + len(self.frames))
+        archive["lengths"] = np.append(archive["lengths"], self.frame)
+        archive["scores"] = np.append(archive["scores"], score)
+
+        save_archive(self.path, top_runs(archive, self.limit))
+
+
+class GhostRace:
+    def __init__(self, archive: dict[str, np.ndarray], width: int, height: int, color: int) -> None:
+        self.width = width
+        self.height = height
+        self.color = color
+
+        # All runs' keyframes back to back, run i owns rows offsets[i]:offsets[i + 1]
+        self.keyframes = archive["frames"].astype(np.int64)
+        self.states = archive["states"].astype(np.float64)
+        self.start = archive["offsets"][:-1].astype(np.int64)
+        self.end = archive["offsets"][1:].astype(np.int64)
+        self.lengths = archive["lengths"].astype(np.int64)
+        self.count = len(self.lengths)
+
+        # Columnar ghost state, one entry per ghost
+        self.x = np.zeros(self.count)
+        self.y = np.zeros(self.count)
+        self.vx = np.zeros(self.count)
+        self.vy = np.zeros(self.count)
+        self.ay = np.zeros(self.count)
+        self.next = np.zeros(self.count, dtype=np.int64)
+        self.next_frame = np.zeros(self.count, dtype=np.int64)
+
+        # Scratch buffers for drawing
+        self.alive = np.zeros(self.count, dtype=bool)
+        self.visible = np.zeros(self.count, dtype=bool)
+        self.px = np.zeros(self.count, dtype=np.int32)
+        self.py = np.zeros(self.count, dtype=np.int32)
+        self.sx = np.zeros(self.count, dtype=np.int32)
+        self.sy = np.zeros(self.count, dtype=np.int32)
+
+        self.restart()
+
+    @classmethod
+    def load(cls, path: str, limit: int, width: int, height: int, color: int) -> "GhostRace":
+        return cls(top_runs(load_archive(path), limit), width, height, color)
+
+    def restart(self) -> None:
+        self.frame = 0
+        self.next[:] = self.start
+        self.update_next_frame(np.arange(self.count))
+        self.land()
+
+    def update(self) -> None:
+        self.frame += 1
+
+        # Advance everyone, then snap the ones with a keyframe this tick
+        self.vy += self.ay
+        self.x += self.vx
+        self.y += self.vy
+        self.land()
+
+    def land(self) -> None:
+        due = np.flatnonzero(self.next_frame == self.frame)
+        if not len(due):
+            return
+
+        state = self.states[self.next[due]]
+        self.x[due] = state[:, 0]
+        self.y[due] = state[:, 1]
+        self.vx[due] = state[:, 2]
+        self.vy[due] = state[:, 3]
+        self.ay[due] = state[:, 4]
+
+        self.next[due] += 1
+        self.update_next_frame(due)
+
+    def update_next_frame(self, ghosts: np.ndarray) -> None:
+        has_next = self.next[ghosts] < self.end[ghosts]
+        rows = np.minimum(self.next[ghosts], len(self.keyframes) - 1)
+        self.next_frame[ghosts] = np.where(
+            has_next, self.keyframes[rows] if len(self.keyframes) else 0, NO_KEYFRAME)
+
+    def save_state(self, state: dict[str, np.ndarray]) -> None:
+        state["ghost_x"][:] = self.x
+        state["ghost_y"][:] = self.y
+        state["ghost_frame"][0] = self.frame
+
+    def load_state(self, state: dict[str, np.ndarray]) -> None:
+        # Draw straight from the published buffers
+        self.x = state["ghost_x"]
+        self.y = state["ghost_y"]
+        self.frame = int(state["ghost_frame"][0])
+
+    def draw(self, camera_y: float) -> None:
+        if not self.count:
+            return
+
+        # Finished runs disappear
+        np.less_equal(self.frame, self.lengths, out=self.alive)
+        np.copyto(self.px, self.x, casting="unsafe")
+        np.copyto(self.py, self.y + camera_y, casting="unsafe")
+
+        screen = np.ctypeslib.as_array(
+            pyxel.screen.data_ptr(), shape=(self.height, self.width))
+
+        # One batched write per pixel of the shape instead of a draw call per ghost
+        for dx, dy in GHOST_SHAPE:
+            np.add(self.px, dx, out=self.sx)
+            np.add(self.py, dy, out=self.sy)
+
+            np.copyto(self.visible, self.alive)
+            self.visible &= (self.sx >= 0) & (self.sx < self.width)
+            self.visible &= (self.sy >= 0) & (self.sy < self.height)
+
+            screen[self.sy[self.visible], self.sx[self.visible]] = self.color
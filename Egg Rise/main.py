@@ -1,32 +1,97 @@
-from eggrise import EggRiseModel, EggRiseView, EggRiseController
+import os
+import argparse
+
+import paths
+from eggrise import EggRiseModel, EggRiseView, EggRiseController, state_layout
 from classes import Egg, Vector2D, PlatformGenerator
+from ghosts import GhostRace, GhostRecorder
+from config import DEFAULT_CONFIG
+from common.services import Services, add_arguments, open_simulation_services, open_window_services
+from common.simworker import SimWorker
 from constants import (
     WIDTH,
     HEIGHT,
     FPS,
     EGG_RADIUS,
     EGG_COLOR,
-    REMOVE_AMOUNT,
+    TELEMETRY_PATH,
+    LEADERBOARD_PATH,
+    GHOST_PATH,
+    GHOST_COLOR,
+    MAX_GHOSTS,
+    GHOST_SEED,
 )
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Egg Rise")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="play the same level every time")
+    parser.add_argument("--ghosts", action="store_true",
+                        help="race the best recorded runs of the level and record yours")
+    parser.add_argument("--max-ghosts", type=int, default=MAX_GHOSTS)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    controller = build_controller(args, is_drawing_only=args.worker)
+
+    # Captures and profiles whichever process runs the window, the drawing side in worker mode
+    open_window_services(args, WIDTH, HEIGHT, FPS, controller.services)
+    controller.run()
+
+
+def build_controller(args: argparse.Namespace, is_drawing_only: bool = False) -> EggRiseController:
+    # Ghosts only make sense on a fixed level
+    seed = args.seed
+    if args.ghosts and seed is None:
+        seed = GHOST_SEED
+
+    config = DEFAULT_CONFIG.with_fixed_point() if args.fixed_point else DEFAULT_CONFIG
     egg = Egg(0, 0, EGG_RADIUS, EGG_COLOR, Vector2D(0, 0))
 
-    generator = PlatformGenerator(5, True)  # Set to False for limited pf
+    generator = PlatformGenerator(5, True, config, seed)  # Set to False for limited pf
     check_platform_amount(generator)
 
+    # The worker owns the game state, the telemetry, the recording, the state hashes and the leaderboard
+    folder = os.path.dirname(os.path.abspath(__file__))
+    services = Services()
+    if not is_drawing_only:
+        mode = "infinite" if generator.is_infinite else "finite"
+        services = open_simulation_services(args, "Egg Rise", os.path.join(folder, TELEMETRY_PATH),
+                                            os.path.join(folder, LEADERBOARD_PATH.format(mode=mode)))
+
     model = EggRiseModel("Egg Rise", WIDTH, HEIGHT, FPS,
-                         egg, 3, generator.max, generator, generator.is_infinite)
+                         egg, 3, generator.max, generator, generator.is_infinite, config, services.telemetry)
     view = EggRiseView(model)
-    controller = EggRiseController(model, view)
 
-    controller.run()
+    ghost_race, recorder = None, None
+    if args.ghosts:
+        ghost_path = os.path.join(folder, GHOST_PATH.format(seed=seed))
+        ghost_race = GhostRace.load(
+            ghost_path, args.max_ghosts, config.width, config.height, GHOST_COLOR)
+
+        if not is_drawing_only:
+            recorder = GhostRecorder(ghost_path, args.max_ghosts)
+
+    worker = None
+    if is_drawing_only:
+        layout = state_layout(generator.max, ghost_race.count if ghost_race else 0)
+        worker = SimWorker("main", "build_simulation", layout, (args,))
+
+    return EggRiseController(model, view, ghost_race, recorder, worker, services)
+
+
+def build_simulation(args: argparse.Namespace) -> EggRiseController:
+    # Runs inside the worker, against the headless pyxel
+    controller = build_controller(args)
+    controller.start_game()
+
+    return controller
 
 
 def check_platform_amount(generator: PlatformGenerator) -> None:
     # Max platform at a time should at least be twice the amount to be removed
-    MIN_PLATFORMS = REMOVE_AMOUNT * 2
+    MIN_PLATFORMS = generator.config.remove_amount * 2
 
     if generator.is_infinite and generator.max < MIN_PLATFORMS:
         raise ValueError(
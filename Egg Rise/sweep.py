@@ -0,0 +1,64 @@
+import random
+
+import paths
+from common import headless, sweep
+
+# Must happen before the game modules import pyxel
+headless.install()
+
+from eggrise import EggRiseModel
+from classes import Egg, Vector2D, PlatformGenerator
+from config import EggRiseConfig, DEFAULT_CONFIG
+from constants import FPS, EGG_RADIUS, EGG_COLOR
+
+
+def should_jump(model: EggRiseModel) -> bool:
+    if not model.egg.is_grounded or model.is_camera_moving:
+        return False
+
+    config = model.config
+    next_pf = model.platforms[model.get_platform_index(
+        model.current_platform.index + 1)]
+
+    # Frames until the egg falls back onto the next platform's height
+    rise = next_pf.y - model.egg.radius - model.egg.y
+    discriminant = config.jump_force ** 2 + 2 * config.gravity * rise
+    if discriminant < 0:
+        return False
+    frames = (-config.jump_force + discriminant ** 0.5) / config.gravity
+
+    # Where the platform will be by then, bouncing off the walls
+    x = next_pf.x_at(model.clock.tick + frames)
+
+    # Jump if the egg would land near the middle of it
+    return abs(model.egg.x - (x + next_pf.width / 2)) < next_pf.width / 4
+
+
+def evaluate(config: EggRiseConfig, frames: int, seed: int) -> dict:
+    random.seed(seed)
+
+    egg = Egg(0, 0, EGG_RADIUS, EGG_COLOR, Vector2D(0, 0))
+    generator = PlatformGenerator(5, True, config, seed)
+    model = EggRiseModel("Egg Rise", config.width, config.height, FPS,
+                         egg, 3, generator.max, generator, generator.is_infinite, config)
+
+    headless.init(config.width, config.height)
+    model.start_game()
+
+    while headless.frame_count < frames and not model.is_game_over:
+        headless.step(model.update)
+
+        if should_jump(model):
+            model.jump(config.jump_force)
+
+    eggs_used = model.max_eggs - model.eggs_left + (0 if model.is_game_over else 1)
+
+    return {
+        "platforms": model.score,
+        "eggs_used": eggs_used,
+        "platforms_per_egg": model.score / max(eggs_used, 1),
+    }
+
+
+if __name__ == "__main__":
+    sweep.main(evaluate, DEFAULT_CONFIG)
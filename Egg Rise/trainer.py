@@ -0,0 +1,158 @@
+import os
+import random
+import argparse
+import multiprocessing
+import numpy as np
+
+import paths
+from common import headless
+from common.files import atomic_write
+
+# The view imports pyxel, the model itself never touches it
+headless.install()
+
+from eggrise import EggRiseModel
+from classes import Egg, Vector2D, PlatformGenerator
+from config import EggRiseConfig, DEFAULT_CONFIG
+from constants import FPS, EGG_RADIUS, EGG_COLOR
+
+
+# Policy network size
+NUM_FEATURES = 8
+NUM_HIDDEN = 8
+NUM_WEIGHTS = NUM_FEATURES * NUM_HIDDEN + NUM_HIDDEN + NUM_HIDDEN + 1
+
+
+def get_features(model: EggRiseModel) -> np.ndarray:
+    config = model.config
+    egg = model.egg
+    next_pf = model.platforms[model.get_platform_index(
+        model.current_platform.index + 1)]
+
+    # Everything roughly scaled to -1..1
+    return np.array([
+        egg.x / model.width,
+        egg.velocity.x * model.current_platform.direction / config.platform_max_speed,
+        egg.velocity.y / config.jump_force,
+        next_pf.x / model.width,
+        (egg.y - next_pf.y) / config.platform_gap,
+        next_pf.velocity.x * next_pf.direction / config.platform_max_speed,
+        (next_pf.x + next_pf.width / 2 - egg.x) / model.width,
+        1.0,
+    ])
+
+
+class Policy:
+    def __init__(self, weights: np.ndarray) -> None:
+        split = NUM_FEATURES * NUM_HIDDEN
+        self.w1 = weights[:split].reshape(NUM_FEATURES, NUM_HIDDEN)
+        self.b1 = weights[split:split + NUM_HIDDEN]
+        self.w2 = weights[split + NUM_HIDDEN:split + NUM_HIDDEN * 2]
+        self.b2 = weights[-1]
+
+    def should_jump(self, model: EggRiseModel) -> bool:
+        # Only ask the network when a jump is actually possible
+        if not model.egg.is_grounded or model.is_camera_moving:
+            return False
+
+        hidden = np.tanh(get_features(model) @ self.w1 + self.b1)
+        return float(hidden @ self.w2 + self.b2) > 0
+
+
+def play(policy: Policy, config: EggRiseConfig, seed: int, frames: int) -> float:
+    random.seed(seed)
+
+    egg = Egg(0, 0, EGG_RADIUS, EGG_COLOR, Vector2D(0, 0))
+    generator = PlatformGenerator(5, True, config, seed)
+    model = EggRiseModel("Egg Rise", config.width, config.height, FPS,
+                         egg, 3, generator.max, generator, generator.is_infinite, config)
+    model.start_game()
+
+    while model.frame_count < frames and not model.is_game_over:
+        model.update()
+
+        if policy.should_jump(model):
+            model.jump(config.jump_force)
+
+    # Platforms reached per egg, the egg still alive counts as used
+    eggs_used = model.max_eggs - model.eggs_left + (0 if model.is_game_over else 1)
+    return model.score / max(eggs_used, 1)
+
+
+def evaluate(task: tuple[np.ndarray, EggRiseConfig, list[int], int]) -> float:
+    weights, config, seeds, frames = task
+    policy = Policy(weights)
+
+    return sum(play(policy, config, seed, frames) for seed in seeds) / len(seeds)
+
+
+def save_checkpoint(path: str, generation: int, population: np.ndarray, best: np.ndarray, best_fitness: float) -> None:
+    with atomic_write(path) as file:
+        np.savez(file, generation=generation, population=population,
+                 best=best, best_fitness=best_fitness)
+
+
+def train(args: argparse.Namespace, config: EggRiseConfig = DEFAULT_CONFIG) -> None:
+    rng = np.random.default_rng(args.seed)
+    generation = 0
+    population = rng.normal(0, 1, (args.population, NUM_WEIGHTS))
+    best, best_fitness = population[0], float("-inf")
+
+    if args.resume and os.path.exists(args.checkpoint):
+        checkpoint = np.load(args.checkpoint)
+        generation = int(checkpoint["generation"])
+        population = checkpoint["population"]
+        best, best_fitness = checkpoint["best"], float(checkpoint["best_fitness"])
+        print(f"Resumed from generation {generation}")
+
+        # Don't replay the levels of the generations before the checkpoint
+        rng = np.random.default_rng([args.seed, generation])
+
+    num_elites = max(1, args.population // 10)
+
+    with multiprocessing.Pool(args.processes) as pool:
+        while generation < args.generations:
+            # Every policy in a generation plays the same levels
+            seeds = [int(seed) for seed in rng.integers(0, 2**31, args.episodes)]
+            tasks = [(weights, config, seeds, args.frames) for weights in population]
+            fitness = np.array(pool.map(evaluate, tasks))
+
+            order = np.argsort(fitness)[::-1]
+            if fitness[order[0]] > best_fitness:
+                best, best_fitness = population[order[0]].copy(), float(fitness[order[0]])
+
+            generation += 1
+            print(f"Generation {generation}: best {fitness[order[0]]:.2f}, "
+                  f"mean {fitness.mean():.2f}, all time {best_fitness:.2f}")
+
+            # Keep the elites, refill with mutated copies of the top half
+            parents = population[order[:max(num_elites, args.population // 2)]]
+            children = parents[rng.integers(0, len(parents), args.population - num_elites)]
+            children = children + rng.normal(0, args.sigma, children.shape)
+            population = np.concatenate([population[order[:num_elites]], children])
+
+            save_checkpoint(args.checkpoint, generation, population, best, best_fitness)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Evolve an Egg Rise jump policy on headless models")
+    parser.add_argument("--generations", type=int, default=50)
+    parser.add_argument("--population", type=int, default=64)
+    parser.add_argument("--episodes", type=int, default=4,
+                        help="levels played per policy each generation")
+    parser.add_argument("--frames", type=int, default=FPS * 60,
+                        help="frame limit per level")
+    parser.add_argument("--sigma", type=float, default=0.2,
+                        help="mutation strength")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--checkpoint", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "jump_policy.npz"))
+    parser.add_argument("--resume", action="store_true")
+
+    train(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
 import pyxel
-import math
 
 from dataclasses import dataclass
-from constants import (
-    PADDLE_SPEED,
-    HEIGHT,
-    SECTION_HEIGHT,
-    BALL_SPEED
-)
+from typing import Optional
+
+import paths
+from common.fixed import quantize
+from common.inputs import InputSnapshot
+from common.response import ResponseCurve, compile_curve
+from config import PongConfig, DEFAULT_CONFIG
 
 
 @dataclass
@@ -17,35 +17,32 @@ class Vector2D:
 
 
 class Ball:
-    def __init__(self, x: float, y: float, radius: float, color: int) -> None:
+    def __init__(self, x: float, y: float, radius: float, color: int, config: PongConfig = DEFAULT_CONFIG) -> None:
         self.x = x
         self.y = y
         self.radius = radius
         self.color = color
+        self.config = config
 
         # Velocity vector
-        self.velocity = Vector2D(BALL_SPEED, 0)
+        self.velocity = Vector2D(config.ball_speed, 0)
 
     def move(self) -> None:
         self.x += self.velocity.x
         self.y += self.velocity.y
 
-    def bounce(self, section: int, angle: float, direction: int) -> None:
-        self.velocity.x = math.cos(angle) * BALL_SPEED * direction
-        self.velocity.y = math.sin(angle) * BALL_SPEED
-        print(f"{self.velocity.x=}, {self.velocity.y}")
-
-        # Bounce up if section 1, 2
-        if section <= 2:
-            self.velocity.y = -abs(self.velocity.y)
+    def advance(self, fraction: float) -> None:
+        # Finish the rest of the frame's motion after a mid-frame bounce
+        self.x += self.velocity.x * fraction
+        self.y += self.velocity.y * fraction
 
-        # Bounce down if section 4, 5
-        elif section >= 4:
-            self.velocity.y = abs(self.velocity.y)
+        # Back onto the grid, neither the impact point nor the fraction is on it
+        if self.config.fixed_point:
+            self.x, self.y = quantize(self.x), quantize(self.y)
 
-        # Bounce straight if section 3
-        else:
-            self.velocity.y = 0
+    def bounce(self, velocity: Vector2D) -> None:
+        self.velocity.x = velocity.x
+        self.velocity.y = velocity.y
 
     def bounce_off_border(self) -> None:
         self.velocity.y *= -1
@@ -55,7 +52,7 @@ class Ball:
 
 
 class Paddle:
-    def __init__(self, x: float, y: float, width: float, height: float, color: int, key_up: int, key_down: int) -> None:
+    def __init__(self, x: float, y: float, width: float, height: float, color: int, key_up: int, key_down: int, config: PongConfig = DEFAULT_CONFIG, response: Optional[ResponseCurve] = None) -> None:
         self.x = x
         self.y = y
         self.width = width
@@ -63,35 +60,51 @@ class Paddle:
         self.color = color
         self.key_up = key_up
         self.key_down = key_down
+        self.config = config
 
         # Velocity vector
-        self.velocity = Vector2D(0, PADDLE_SPEED)
+        self.velocity = Vector2D(0, config.paddle_speed)
+        self.direction = 0  # -1 up, 1 down, for spin
+
+        # How the ball leaves the paddle, compiled to a table once
+        self.response = compile_curve(response or config.paddle_response, config.fixed_point)
+
+    def move(self, snapshot: InputSnapshot) -> None:
+        self.direction = 0
 
-    def move(self) -> None:
         # Move up
-        if pyxel.btn(self.key_up) and self.y >= 0:
+        if snapshot.is_held(self.key_up) and self.y >= 0:
             self.y -= self.velocity.y
+            self.direction = -1
 
         # Move down
-        elif pyxel.btn(self.key_down) and self.y + self.height <= HEIGHT:
+        elif snapshot.is_held(self.key_down) and self.y + self.height <= self.config.height:
             self.y += self.velocity.y
+            self.direction = 1
 
     def get_bounce_section(self, ball_y: float) -> int:
         relative_y = ball_y - self.y
-        section = int(relative_y // SECTION_HEIGHT) + 1
+        section = int(relative_y // self.config.section_height) + 1
 
         return max(1, min(5, section))
 
-    def get_bounce_angle(self, section: int) -> float:
-        angle_map = {
-            1: 4*math.pi / 6,
-            2: 5*math.pi / 6,
-            3: math.pi,
-            4: 7*math.pi / 6,
-            5: 8*math.pi / 6
-        }
+    def get_offset(self, ball_y: float) -> float:
+        # -1 at the top end, 1 at the bottom end
+        return (ball_y - self.y) / (self.height / 2) - 1
+
+    def get_bounce_velocity(self, ball_y: float, direction: int) -> Vector2D:
+        # direction is where the ball was heading, it leaves the other way
+        response = self.response
+        index = response.get_index(self.get_offset(ball_y))
+        speed = self.config.ball_speed
+
+        velocity = Vector2D(-direction * response.away[index] * speed,
+                            response.along[index] * speed + response.spin * self.direction * self.velocity.y)
+
+        if self.config.fixed_point:
+            velocity.x, velocity.y = quantize(velocity.x), quantize(velocity.y)
 
-        return angle_map[section]
+        return velocity
 
     def draw(self) -> None:
         pyxel.rect(self.x, self.y, self.width, self.height, self.color)
@@ -0,0 +1,42 @@
+from dataclasses import dataclass, replace
+import paths
+from common.fixed import quantize
+from common.response import ResponseCurve
+from constants import (
+    WIDTH,
+    HEIGHT,
+    FPS,
+    BALL_SPEED,
+    PADDLE_SPEED,
+    SECTION_HEIGHT,
+    PADDLE_MAX_ANGLE,
+    PADDLE_SPEED_UP,
+    PADDLE_SPIN,
+)
+
+
+@dataclass(frozen=True)
+class PongConfig:
+    # Window
+    width: int = WIDTH
+    height: int = HEIGHT
+    fps: int = FPS
+
+    # Physics
+    ball_speed: float = BALL_SPEED
+    paddle_speed: float = PADDLE_SPEED
+    section_height: float = SECTION_HEIGHT
+    paddle_response: ResponseCurve = ResponseCurve(
+        PADDLE_MAX_ANGLE, speed_up=PADDLE_SPEED_UP, spin=PADDLE_SPIN)
+
+    # Integer fixed-point physics, see common/fixed.py
+    fixed_point: bool = False
+
+    def with_fixed_point(self) -> "PongConfig":
+        return replace(self, fixed_point=True,
+                       ball_speed=quantize(self.ball_speed),
+                       paddle_speed=quantize(self.paddle_speed),
+                       section_height=quantize(self.section_height))
+
+
+DEFAULT_CONFIG = PongConfig()
@@ -21,3 +21,14 @@ PADDLE_COLOR = 7
 PADDLE_OFFSET = 5
 PADDLE_SECTIONS = 5
 SECTION_HEIGHT = PADDLE_HEIGHT // PADDLE_SECTIONS
+
+# Paddle response curve, see common/response.py
+PADDLE_MAX_ANGLE = 75  # Degrees from straight back at the paddle ends
+PADDLE_SPEED_UP = 0.0
+PADDLE_SPIN = 0.0
+
+# Telemetry database, relative to the game folder
+TELEMETRY_PATH = "telemetry.db"
+
+# High scores, relative to the game folder, without extension
+LEADERBOARD_PATH = "leaderboard"
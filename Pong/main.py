@@ -1,28 +1,50 @@
+import os
+import atexit
 import pyxel
 import random
+import argparse
 
+from typing import Optional
+
+import paths
+from common.collision import sweep_circle_rect
+from common.inputs import InputSnapshot
+from common.latency import LatencyProbe
+from common.services import Services, add_arguments, open_simulation_services, open_window_services
+from common.simworker import SimWorker
 from classes import Paddle, Ball
+from config import PongConfig, DEFAULT_CONFIG
 from constants import (
-    WIDTH,
-    HEIGHT,
     MID_HEIGHT,
     MID_WIDTH,
-    FPS,
     BALL_COLOR,
     BALL_RADIUS,
-    BALL_SPEED,
     PADDLE_COLOR,
     PADDLE_WIDTH,
     PADDLE_HEIGHT,
     PADDLE_OFFSET,
     SCORE_OFFSET,
+    TELEMETRY_PATH,
+    LEADERBOARD_PATH,
 )
 
 
+# What the simulation worker publishes for the window to draw
+STATE_LAYOUT = {
+    "ball": 2,
+    "paddles": 2,
+    "scores": 2,
+}
+
+
 class Game:
-    def __init__(self, title: str, p1: Paddle, p2: Paddle, ball: Ball) -> None:
+    def __init__(self, title: str, p1: Paddle, p2: Paddle, ball: Ball, config: PongConfig = DEFAULT_CONFIG, services: Optional[Services] = None, worker: Optional[SimWorker] = None) -> None:
+        self.config = config
+        self.services = services if services is not None else Services()
+        self.worker = worker  # Simulates in another process, this one only draws
+
         # Setup game window
-        pyxel.init(WIDTH, HEIGHT, title=title, fps=FPS)
+        pyxel.init(config.width, config.height, title=title, fps=config.fps)
 
         # Game Objects
         self.p1 = p1
@@ -34,33 +56,72 @@ class Game:
         self.p2_score = 0
 
         self.round_end_time = None
+        self.round_start_time = pyxel.frame_count
+
+        # Pong never ends, the scores go on the leaderboard when the window closes
+        if self.services.leaderboard is not None:
+            atexit.register(self.submit_scores)
+
+        # Frames from pressing a paddle key until a paddle visibly moves
+        self.input_keys = (p1.key_up, p1.key_down, p2.key_up, p2.key_down)
+        self.latency_probe = LatencyProbe(
+            self.input_keys, lambda: (round(self.p1.y), round(self.p2.y)))
 
         # Run game
-        pyxel.run(self.update, self.draw)
+        pyxel.run(*self.services.wrap(self.update if self.worker is None else self.update_worker, self.draw))
 
     def update(self) -> None:
+        self.update_round()
+
+        if self.services.state_hash is not None:
+            self.services.state_hash.update(self.state_values())
+
+    def update_round(self) -> None:
         if self.round_end_time is not None:
             self.reset()
 
-            if pyxel.frame_count - self.round_end_time >= FPS * 1:
+            if pyxel.frame_count - self.round_end_time >= self.config.fps * 1:
                 self.round_end_time = None
+                self.round_start_time = pyxel.frame_count
 
             return
 
         if not self.is_round_over():
-            self.p1.move()
-            self.p2.move()
+            # Sample input once at the start of the tick
+            snapshot = InputSnapshot.sample(self.input_keys)
+            self.latency_probe.on_input(pyxel.frame_count, snapshot)
+
+            self.p1.move(snapshot)
+            self.p2.move(snapshot)
+
+            # Remember where the ball started so the whole frame's motion is checked
+            start_x, start_y = self.ball.x, self.ball.y
             self.ball.move()
 
-            self.handle_paddle_collisions()
+            self.handle_paddle_collisions(start_x, start_y)
             self.handle_border_collisions()
+
+            latency = self.latency_probe.on_tick_end(pyxel.frame_count)
+            if latency is not None:
+                self.record("input_latency", value=latency)
         else:
             winner = self.get_winner()
             self.update_score(winner)
 
             self.round_end_time = pyxel.frame_count
+            self.record("point", winner)
+            self.record("round_length", value=self.round_end_time - self.round_start_time)
+
+    def update_worker(self) -> None:
+        # Hand this tick's input to the worker, draw() picks up its state
+        self.worker.step(InputSnapshot.sample(self.input_keys).held)
 
     def draw(self) -> None:
+        if self.worker is not None:
+            state = self.worker.latest()
+            if state is not None:
+                self.load_state(state)
+
         # Clear screen
         pyxel.cls(0)
 
@@ -69,37 +130,45 @@ class Game:
         self.ball.draw()
         self.display_score()
 
-    def handle_paddle_collisions(self) -> None:
-        # Right paddle
-        if self.ball.x >= self.p2.x:
-            if self.ball.y - BALL_RADIUS >= self.p2.y \
-                    and self.ball.y + BALL_RADIUS <= self.p2.y + PADDLE_HEIGHT:
-                section = self.p2.get_bounce_section(self.ball.y)
-                angle = self.p2.get_bounce_angle(section)
+        if self.services.capture is not None:
+            self.services.capture.capture()
 
-                self.ball.bounce(section, angle, 1)
+    def handle_paddle_collisions(self, start_x: float, start_y: float) -> None:
+        # Right paddle when moving right, left paddle when moving left
+        if self.ball.velocity.x > 0:
+            self.handle_paddle_collision(self.p2, 1, start_x, start_y)
+        elif self.ball.velocity.x < 0:
+            self.handle_paddle_collision(self.p1, -1, start_x, start_y)
 
-        # Left paddle
-        elif self.ball.x <= self.p1.x + PADDLE_WIDTH:
-            if self.ball.y - BALL_RADIUS >= self.p1.y \
-                    and self.ball.y + BALL_RADIUS <= self.p1.y + PADDLE_HEIGHT:
-                section = self.p1.get_bounce_section(self.ball.y)
-                angle = self.p1.get_bounce_angle(section)
+    def handle_paddle_collision(self, paddle: Paddle, direction: int, start_x: float, start_y: float) -> None:
+        hit = sweep_circle_rect(start_x, start_y, self.ball.x, self.ball.y, self.ball.radius,
+                                paddle.x, paddle.y, paddle.width, paddle.height)
 
-                self.ball.bounce(section, angle, -1)
+        # Only the face towards the ball bounces, ignore hits from behind
+        if hit is None or hit.normal_x * direction >= 0:
+            return
+
+        section = paddle.get_bounce_section(hit.y)
+
+        # Bounce from the impact point and finish the frame's motion
+        self.ball.x, self.ball.y = hit.x, hit.y
+        self.ball.bounce(paddle.get_bounce_velocity(hit.y, direction))
+        self.ball.advance(1 - hit.t)
+        self.record("paddle_section", section)
 
     def handle_border_collisions(self) -> None:
-        if self.ball.y - BALL_RADIUS <= 0 or self.ball.y + BALL_RADIUS >= HEIGHT:
+        if self.ball.y - self.ball.radius <= 0 or self.ball.y + self.ball.radius >= self.config.height:
             self.ball.bounce_off_border()
 
     def reset(self) -> None:
         # Reset paddles
-        self.p1.y = MID_HEIGHT - PADDLE_HEIGHT//2
-        self.p2.y = MID_HEIGHT - PADDLE_HEIGHT//2
+        mid_height = self.config.height//2
+        self.p1.y = mid_height - self.p1.height//2
+        self.p2.y = mid_height - self.p2.height//2
 
         # Reset ball
-        self.ball.x = MID_WIDTH
-        self.ball.y = MID_HEIGHT
+        self.ball.x = self.config.width//2
+        self.ball.y = mid_height
         self.ball.velocity.x *= random.choice([1, -1])
         self.ball.velocity.y *= random.choice([1, -1])
 
@@ -114,37 +183,111 @@ class Game:
         return 1 if self.ball.velocity.x > 0 else 2
 
     def is_round_over(self) -> bool:
-        return self.ball.x + BALL_RADIUS >= WIDTH or self.ball.x - BALL_RADIUS <= 0
+        return self.ball.x + self.ball.radius >= self.config.width or self.ball.x - self.ball.radius <= 0
 
     def display_score(self) -> None:
-        pyxel.text(WIDTH//3 - len(str(self.p1_score)) * 4 //
+        pyxel.text(self.config.width//3 - len(str(self.p1_score)) * 4 //
                    2, SCORE_OFFSET, str(self.p1_score), 7)
 
-        pyxel.text(WIDTH//3 * 2 - len(str(self.p2_score)) * 4 //
+        pyxel.text(self.config.width//3 * 2 - len(str(self.p2_score)) * 4 //
                    2, SCORE_OFFSET, str(self.p2_score), 7)
 
+    def submit_scores(self) -> None:
+        leaderboard = self.services.leaderboard
+        if leaderboard is None or leaderboard.is_closed:
+            return
+
+        # Each side's points count as one entry, empty sessions don't
+        for score in (self.p1_score, self.p2_score):
+            if score > 0:
+                leaderboard.submit(score)
+
+    def record(self, kind: str, key: Optional[int] = None, value: Optional[float] = None) -> None:
+        self.services.record(pyxel.frame_count, kind, key, value)
+
+    def save_state(self, state: dict) -> None:
+        state["ball"][:] = (self.ball.x, self.ball.y)
+        state["paddles"][:] = (self.p1.y, self.p2.y)
+        state["scores"][:] = (self.p1_score, self.p2_score)
+
+    def load_state(self, state: dict) -> None:
+        self.ball.x, self.ball.y = float(state["ball"][0]), float(state["ball"][1])
+        self.p1.y, self.p2.y = float(state["paddles"][0]), float(state["paddles"][1])
+        self.p1_score, self.p2_score = int(state["scores"][0]), int(state["scores"][1])
+
+    def state_values(self) -> tuple[float, ...]:
+        ball = self.ball
+        return (ball.x, ball.y, ball.velocity.x, ball.velocity.y,
+                self.p1.y, self.p2.y, self.p1_score, self.p2_score)
+
+    def close(self) -> None:
+        self.submit_scores()
+        self.services.close()
+
+
+def create_paddles(config: PongConfig = DEFAULT_CONFIG) -> tuple[Paddle, Paddle]:
+    mid_height = config.height//2
 
-if __name__ == "__main__":
     p1 = Paddle(
         PADDLE_OFFSET,
-        MID_HEIGHT - PADDLE_HEIGHT//2,
+        mid_height - PADDLE_HEIGHT//2,
         PADDLE_WIDTH,
         PADDLE_HEIGHT,
         PADDLE_COLOR,
         pyxel.KEY_W,
-        pyxel.KEY_S
+        pyxel.KEY_S,
+        config
     )
 
     p2 = Paddle(
-        WIDTH - PADDLE_OFFSET - PADDLE_WIDTH,
-        MID_HEIGHT - PADDLE_HEIGHT//2,
+        config.width - PADDLE_OFFSET - PADDLE_WIDTH,
+        mid_height - PADDLE_HEIGHT//2,
         PADDLE_WIDTH,
         PADDLE_HEIGHT,
         PADDLE_COLOR,
         pyxel.KEY_UP,
-        pyxel.KEY_DOWN
+        pyxel.KEY_DOWN,
+        config
     )
 
-    ball = Ball(MID_WIDTH, MID_HEIGHT, BALL_RADIUS, BALL_COLOR)
+    return p1, p2
 
-    Game("Pong", p1, p2, ball)
+
+def build_simulation(config: PongConfig, args: argparse.Namespace) -> Game:
+    # Runs inside the worker, against the headless pyxel
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    p1, p2 = create_paddles(config)
+    ball = Ball(config.width//2, config.height//2, BALL_RADIUS, BALL_COLOR, config)
+
+    return Game("Pong", p1, p2, ball, config, open_services(args))
+
+
+def open_services(args: argparse.Namespace) -> Services:
+    folder = os.path.dirname(os.path.abspath(__file__))
+    return open_simulation_services(args, "Pong", os.path.join(folder, TELEMETRY_PATH),
+                                    os.path.join(folder, LEADERBOARD_PATH))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pong")
+    add_arguments(parser)
+    parser.add_argument("--seed", type=int, default=None,
+                        help="serve the same way every time, for comparable hashes")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    config = DEFAULT_CONFIG.with_fixed_point() if args.fixed_point else DEFAULT_CONFIG
+    p1, p2 = create_paddles(config)
+    ball = Ball(MID_WIDTH, MID_HEIGHT, BALL_RADIUS, BALL_COLOR, config)
+
+    # The worker owns the game state, the telemetry, the state hashes and the leaderboard
+    if args.worker:
+        worker = SimWorker("main", "build_simulation", STATE_LAYOUT, (config, args))
+        Game("Pong", p1, p2, ball, config, open_window_services(args, config.width, config.height, config.fps), worker)
+    else:
+        services = open_window_services(args, config.width, config.height, config.fps, open_services(args))
+        Game("Pong", p1, p2, ball, config, services)
@@ -0,0 +1,10 @@
+# Puts the repo root on sys.path so the game's modules can import common/, the
+# same way whether a game script runs from its folder or a tool imports it.
+# Every module that imports from common imports this first.
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
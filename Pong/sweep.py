@@ -0,0 +1,62 @@
+import random
+
+import paths
+from common import headless, sweep
+
+# Must happen before the game modules import pyxel
+headless.install()
+
+from main import Game
+from classes import Paddle, Ball
+from config import PongConfig, DEFAULT_CONFIG
+from tournament import Tracker, move_keys
+from constants import (
+    BALL_COLOR,
+    BALL_RADIUS,
+    PADDLE_COLOR,
+    PADDLE_WIDTH,
+    PADDLE_HEIGHT,
+    PADDLE_OFFSET,
+)
+
+
+class SweepGame(Game):
+    def __init__(self, p1: Paddle, p2: Paddle, ball: Ball, config: PongConfig) -> None:
+        self.hits = 0
+        super().__init__("Pong", p1, p2, ball, config)
+
+    def handle_paddle_collision(self, paddle: Paddle, direction: int, start_x: float, start_y: float) -> None:
+        velocity_x = self.ball.velocity.x
+        super().handle_paddle_collision(paddle, direction, start_x, start_y)
+
+        if self.ball.velocity.x != velocity_x:
+            self.hits += 1
+
+
+def evaluate(config: PongConfig, frames: int, seed: int) -> dict:
+    random.seed(seed)
+
+    mid_height = config.height//2
+    p1 = Paddle(PADDLE_OFFSET, mid_height - PADDLE_HEIGHT//2, PADDLE_WIDTH, PADDLE_HEIGHT,
+                PADDLE_COLOR, headless.KEY_W, headless.KEY_S, config)
+    p2 = Paddle(config.width - PADDLE_OFFSET - PADDLE_WIDTH, mid_height - PADDLE_HEIGHT//2, PADDLE_WIDTH,
+                PADDLE_HEIGHT, PADDLE_COLOR, headless.KEY_UP, headless.KEY_DOWN, config)
+    ball = Ball(config.width//2, mid_height, BALL_RADIUS, BALL_COLOR, config)
+
+    headless.set_frame_limit(frames)
+    headless.set_draw_enabled(False)
+    p1_tracker, p2_tracker = Tracker(p1, ball, config), Tracker(p2, ball, config)
+    headless.set_input_source(lambda frame: move_keys(p1, p1_tracker()) + move_keys(p2, p2_tracker()))
+
+    game = SweepGame(p1, p2, ball, config)
+    points = game.p1_score + game.p2_score
+
+    return {
+        "points": points,
+        "rally_length": game.hits / max(points, 1),
+        "p1_win_rate": game.p1_score / points if points else 0.5,
+    }
+
+
+if __name__ == "__main__":
+    sweep.main(evaluate, DEFAULT_CONFIG)
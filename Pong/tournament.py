@@ -0,0 +1,366 @@
+# Headless Pong tournaments between paddle bots. Matches are spread across a
+# process pool, results are folded into Elo ratings in schedule order.
+#
+#     python tournament.py                          # every built-in bot, round robin
+#     python tournament.py tracker mybots:Sniper --format swiss --rounds 5
+import argparse
+import importlib
+import itertools
+import os
+import random
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Optional
+
+import paths
+from common import headless
+
+# Must happen before the game modules import pyxel
+headless.install()
+
+from main import Game, create_paddles
+from classes import Paddle, Ball
+from config import PongConfig, DEFAULT_CONFIG
+from constants import BALL_COLOR, BALL_RADIUS
+
+
+# A bot is built once per match for its paddle and returns -1 (up), 1 (down) or 0 every tick
+Bot = Callable[[], int]
+BotFactory = Callable[[Paddle, Ball, PongConfig], Bot]
+
+
+def move_towards(paddle: Paddle, target_y: float) -> int:
+    # Keep the paddle's middle on target, with a dead zone so it doesn't jitter
+    middle = paddle.y + paddle.height / 2
+
+    if target_y < middle - paddle.velocity.y:
+        return -1
+    elif target_y > middle + paddle.velocity.y:
+        return 1
+
+    return 0
+
+
+def move_keys(paddle: Paddle, move: int) -> list[int]:
+    # A bot's move as the keys the game reads for its paddle
+    if move < 0:
+        return [paddle.key_up]
+    elif move > 0:
+        return [paddle.key_down]
+
+    return []
+
+
+def is_incoming(paddle: Paddle, ball: Ball, config: PongConfig) -> bool:
+    is_left = paddle.x < config.width / 2
+    return ball.velocity.x < 0 if is_left else ball.velocity.x > 0
+
+
+class Idle:
+    def __init__(self, paddle: Paddle, ball: Ball, config: PongConfig) -> None:
+        pass
+
+    def __call__(self) -> int:
+        return 0
+
+
+class Tracker:
+    def __init__(self, paddle: Paddle, ball: Ball, config: PongConfig) -> None:
+        self.paddle = paddle
+        self.ball = ball
+        self.offset = 0.0
+        self.direction = 0
+
+    def __call__(self) -> int:
+        # Aim for a random paddle section whenever the ball changes direction
+        direction = 1 if self.ball.velocity.x > 0 else -1
+        if direction != self.direction:
+            self.offset = random.uniform(-0.45, 0.45) * self.paddle.height
+            self.direction = direction
+
+        return move_towards(self.paddle, self.ball.y - self.offset)
+
+
+class Lazy:
+    def __init__(self, paddle: Paddle, ball: Ball, config: PongConfig) -> None:
+        self.paddle = paddle
+        self.ball = ball
+        self.config = config
+
+    def __call__(self) -> int:
+        # Follow the ball only while it comes this way, otherwise drift back to the middle
+        if is_incoming(self.paddle, self.ball, self.config):
+            return move_towards(self.paddle, self.ball.y)
+
+        return move_towards(self.paddle, self.config.height / 2)
+
+
+class Predictor:
+    def __init__(self, paddle: Paddle, ball: Ball, config: PongConfig) -> None:
+        self.paddle = paddle
+        self.ball = ball
+        self.config = config
+        self.offset = 0.0
+        self.direction = 0
+
+    def __call__(self) -> int:
+        ball, paddle, config = self.ball, self.paddle, self.config
+
+        if not is_incoming(paddle, ball, config):
+            self.direction = 0
+            return move_towards(paddle, config.height / 2)
+
+        # Pick an edge once per rally to send the ball back at an angle
+        if self.direction == 0:
+            self.direction = 1
+            self.offset = random.choice([-0.35, 0.35]) * paddle.height
+
+        # Where the ball reaches the paddle's face, folding in wall bounces
+        face_x = paddle.x + paddle.width if paddle.x < config.width / 2 else paddle.x
+        frames = (face_x - ball.x) / ball.velocity.x
+        span = config.height - ball.radius * 2
+        y = (ball.y - ball.radius + ball.velocity.y * frames) % (span * 2)
+        y = (y if y <= span else span * 2 - y) + ball.radius
+
+        return move_towards(paddle, y - self.offset)
+
+
+class Jitter:
+    def __init__(self, paddle: Paddle, ball: Ball, config: PongConfig) -> None:
+        self.move = 0
+        self.frames_left = 0
+
+    def __call__(self) -> int:
+        # Hold a random move for a random while
+        if self.frames_left <= 0:
+            self.move = random.choice([-1, 0, 1])
+            self.frames_left = random.randint(5, 30)
+
+        self.frames_left -= 1
+        return self.move
+
+
+BOTS: dict[str, BotFactory] = {
+    "idle": Idle,
+    "jitter": Jitter,
+    "lazy": Lazy,
+    "tracker": Tracker,
+    "predictor": Predictor,
+}
+
+
+def load_bot(spec: str) -> BotFactory:
+    # Built-in name or "module:Class" for bots living elsewhere
+    if spec in BOTS:
+        return BOTS[spec]
+
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(
+            f"Unknown bot [{spec}], expected one of {list(BOTS)} or module:Class")
+
+    return getattr(importlib.import_module(module), name)
+
+
+class MatchGame(Game):
+    def __init__(self, p1: Paddle, p2: Paddle, ball: Ball, config: PongConfig, points: int) -> None:
+        self.points = points
+        super().__init__("Pong", p1, p2, ball, config)
+
+    def update_score(self, winner: int) -> None:
+        super().update_score(winner)
+
+        # First to the target ends the match
+        if max(self.p1_score, self.p2_score) >= self.points:
+            headless.quit()
+
+
+@dataclass(frozen=True)
+class Match:
+    left: str
+    right: str
+    seed: int
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    match: Match
+    left_score: int
+    right_score: int
+    frames: int
+
+
+def play(match: Match, config: PongConfig = DEFAULT_CONFIG, points: int = 5, frames: int = 60 * 60 * 5) -> MatchResult:
+    random.seed(match.seed)
+
+    p1, p2 = create_paddles(config)
+    ball = Ball(config.width//2, config.height//2, BALL_RADIUS, BALL_COLOR, config)
+    left = load_bot(match.left)(p1, ball, config)
+    right = load_bot(match.right)(p2, ball, config)
+
+    headless.set_frame_limit(frames)
+    headless.set_draw_enabled(False)
+    headless.set_input_source(lambda frame: move_keys(p1, left()) + move_keys(p2, right()))
+
+    game = MatchGame(p1, p2, ball, config, points)
+
+    return MatchResult(match, game.p1_score, game.p2_score, headless.frame_count)
+
+
+@dataclass
+class Standing:
+    name: str
+    rating: float
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    points_for: int = 0
+    points_against: int = 0
+    opponents: set[str] = field(default_factory=set)
+
+    @property
+    def score(self) -> float:
+        return self.wins + self.draws / 2
+
+
+class Tournament:
+    def __init__(self, bots: list[str], games: int = 2, seed: int = 0, k_factor: float = 32,
+                 initial_rating: float = 1500, play_match: Callable[[Match], MatchResult] = play) -> None:
+        self.bots = bots
+        self.games = games  # Per pairing, sides alternate
+        self.k_factor = k_factor
+        self.play_match = play_match
+        self.random = random.Random(seed)
+
+        self.standings = {bot: Standing(bot, initial_rating) for bot in bots}
+        self.results: list[MatchResult] = []
+
+    def pairing_matches(self, left: str, right: str) -> list[Match]:
+        matches = []
+
+        for game in range(self.games):
+            seed = self.random.randrange(2**31)
+            matches.append(Match(left, right, seed) if game % 2 == 0 else Match(right, left, seed))
+
+        return matches
+
+    def round_robin(self) -> list[Match]:
+        # Everyone meets everyone, all in a single batch
+        return [match for left, right in itertools.combinations(self.bots, 2)
+                for match in self.pairing_matches(left, right)]
+
+    def swiss_round(self) -> list[Match]:
+        # Pair neighbours in the standings, skipping rematches when possible
+        order = sorted(self.standings.values(),
+                       key=lambda standing: (standing.score, standing.rating), reverse=True)
+        unpaired = [standing.name for standing in order]
+        matches = []
+
+        while len(unpaired) > 1:
+            left = unpaired.pop(0)
+            opponents = self.standings[left].opponents
+            right = next((name for name in unpaired if name not in opponents), unpaired[0])
+            unpaired.remove(right)
+            matches += self.pairing_matches(left, right)
+
+        # An odd player out sits the round
+        return matches
+
+    def run(self, rounds: Optional[int] = None, processes: Optional[int] = None) -> None:
+        # rounds is None for round robin, else the number of swiss rounds
+        with ProcessPoolExecutor(processes) as pool:
+            if rounds is None:
+                self.play_batch(pool, self.round_robin(), processes)
+                return
+
+            for _ in range(rounds):
+                self.play_batch(pool, self.swiss_round(), processes)
+
+    def play_batch(self, pool: ProcessPoolExecutor, matches: list[Match], processes: Optional[int]) -> None:
+        chunksize = max(1, len(matches) // ((processes or 4) * 4))
+
+        # Ratings are folded in schedule order so a rerun gives the same table
+        for result in pool.map(self.play_match, matches, chunksize=chunksize):
+            self.add_result(result)
+
+    def add_result(self, result: MatchResult) -> None:
+        left = self.standings[result.match.left]
+        right = self.standings[result.match.right]
+        self.results.append(result)
+
+        if result.left_score > result.right_score:
+            outcome = 1.0
+            left.wins, right.losses = left.wins + 1, right.losses + 1
+        elif result.left_score < result.right_score:
+            outcome = 0.0
+            left.losses, right.wins = left.losses + 1, right.wins + 1
+        else:
+            outcome = 0.5
+            left.draws, right.draws = left.draws + 1, right.draws + 1
+
+        left.points_for += result.left_score
+        left.points_against += result.right_score
+        right.points_for += result.right_score
+        right.points_against += result.left_score
+        left.opponents.add(right.name)
+        right.opponents.add(left.name)
+
+        # Elo, both sides move by the same amount
+        expected = 1 / (1 + 10 ** ((right.rating - left.rating) / 400))
+        change = self.k_factor * (outcome - expected)
+        left.rating += change
+        right.rating -= change
+
+    def report(self, seconds: float, processes: int) -> str:
+        lines = [f"{'bot':<20} {'rating':>7} {'W':>4} {'D':>4} {'L':>4} {'for':>5} {'against':>8}"]
+
+        for standing in sorted(self.standings.values(), key=lambda standing: standing.rating, reverse=True):
+            lines.append(f"{standing.name:<20} {standing.rating:>7.0f} {standing.wins:>4} {standing.draws:>4} "
+                         f"{standing.losses:>4} {standing.points_for:>5} {standing.points_against:>8}")
+
+        matches = len(self.results)
+        frames = sum(result.frames for result in self.results)
+        lines.append(f"{matches} matches, {frames} frames in {seconds:.2f}s on {processes} processes: "
+                     f"{matches / seconds:.1f} matches/s, {frames / seconds:.0f} frames/s")
+
+        return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Play headless Pong tournaments between bots across a process pool")
+    parser.add_argument("bots", nargs="*", default=list(BOTS),
+                        help=f"built-in bots {list(BOTS)} or module:Class")
+    parser.add_argument("--format", choices=["round-robin", "swiss"], default="round-robin")
+    parser.add_argument("--rounds", type=int, default=None,
+                        help="swiss rounds, defaults to log2 of the field")
+    parser.add_argument("--games", type=int, default=2,
+                        help="matches per pairing, sides alternate")
+    parser.add_argument("--points", type=int, default=5,
+                        help="points needed to win a match")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    for bot in args.bots:
+        load_bot(bot)  # Fail here, not inside a worker
+
+    rounds = None
+    if args.format == "swiss":
+        rounds = args.rounds or max(1, (len(args.bots) - 1).bit_length())
+
+    tournament = Tournament(args.bots, args.games, args.seed,
+                            play_match=partial(play, points=args.points))
+    processes = args.processes or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    tournament.run(rounds, processes)
+
+    print(tournament.report(time.perf_counter() - start, processes))
+
+
+if __name__ == "__main__":
+    main()
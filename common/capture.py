@@ -0,0 +1,316 @@
+# Frame capture. draw() copies the palette-indexed screen into a ring of
+# shared memory slots, and an encoder process drains the ring into a GIF, an
+# APNG or raw RGB video. Nothing is encoded on the pyxel thread; when the
+# encoder falls behind and the ring is full, frames are dropped and counted.
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+import numpy as np
+import pyxel
+
+from multiprocessing import shared_memory
+from typing import BinaryIO, Optional
+
+from common.closing import close_at_exit
+
+
+FORMATS = ("gif", "apng", "raw")
+
+# Header counters, each written by one side only
+WRITE_COUNT, READ_COUNT, DROPPED, IS_CLOSED = range(4)
+HEADER_SIZE = 4 * 8
+
+
+class FrameRing:
+    def __init__(self, width: int, height: int, slots: int, name: Optional[str] = None) -> None:
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.is_owner = name is None
+
+        size = HEADER_SIZE + slots * 8 + slots * width * height
+        self.memory = shared_memory.SharedMemory(name=name, create=self.is_owner, size=size)
+
+        # Counters, the tick of every slot, then the pixels
+        self.header = np.ndarray((4,), np.int64, self.memory.buf, 0)
+        self.frames = np.ndarray((slots,), np.int64, self.memory.buf, HEADER_SIZE)
+        self.pixels = np.ndarray((slots, height, width), np.uint8,
+                                 self.memory.buf, HEADER_SIZE + slots * 8)
+
+        if self.is_owner:
+            self.header[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def push(self, frame: int, screen: np.ndarray) -> bool:
+        # Producer side: drop rather than wait when the encoder is a full ring behind
+        written = int(self.header[WRITE_COUNT])
+        if written - int(self.header[READ_COUNT]) >= self.slots:
+            self.header[DROPPED] += 1
+            return False
+
+        slot = written % self.slots
+        np.copyto(self.pixels[slot], screen)
+        self.frames[slot] = frame
+
+        # Publish only after the pixels are in place
+        self.header[WRITE_COUNT] = written + 1
+        return True
+
+    def pending(self) -> int:
+        return int(self.header[WRITE_COUNT]) - int(self.header[READ_COUNT])
+
+    def peek(self) -> tuple[int, np.ndarray]:
+        # Consumer side: the oldest unread frame, valid until pop()
+        slot = int(self.header[READ_COUNT]) % self.slots
+        return int(self.frames[slot]), self.pixels[slot]
+
+    def pop(self) -> None:
+        self.header[READ_COUNT] += 1
+
+    def close(self) -> None:
+        # Views keep the buffer exported, drop them before closing
+        self.header = self.frames = self.pixels = None
+        self.memory.close()
+
+        if self.is_owner:
+            self.memory.unlink()
+
+
+def png_chunk(tag: bytes, body: bytes) -> bytes:
+    return (struct.pack(">I", len(body)) + tag + body +
+            struct.pack(">I", zlib.crc32(tag + body) & 0xFFFFFFFF))
+
+
+class GifWriter:
+    def __init__(self, file: BinaryIO, width: int, height: int, palette: list[int], fps: int) -> None:
+        self.file = file
+        self.fps = fps
+        self.delay_error = 0.0
+        self.last_frame: Optional[int] = None
+        self.pending: Optional[np.ndarray] = None
+
+        # 16 color global table, looping forever
+        colors = [(color >> 16 & 0xFF, color >> 8 & 0xFF, color & 0xFF) for color in palette[:16]]
+        colors += [(0, 0, 0)] * (16 - len(colors))
+
+        file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF3, 0, 0))
+        file.write(bytes(channel for color in colors for channel in color))
+        file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+        self.width = width
+        self.height = height
+
+    def write(self, frame: int, pixels: np.ndarray) -> None:
+        # A frame's delay is only known once the next one arrives
+        if self.pending is not None:
+            self.write_frame(self.pending, frame - self.last_frame)
+
+        self.pending = pixels.copy()
+        self.last_frame = frame
+
+    def write_frame(self, pixels: np.ndarray, ticks: int) -> None:
+        # Delays are in hundredths of a second, carry the rounding to the next frame
+        delay = ticks * 100 / self.fps + self.delay_error
+        centiseconds = max(1, round(delay))
+        self.delay_error = delay - centiseconds
+
+        self.file.write(b"\x21\xF9\x04\x00" + struct.pack("<H", centiseconds) + b"\x00\x00")
+        self.file.write(b"\x2C" + struct.pack("<HHHHB", 0, 0, self.width, self.height, 0))
+        self.file.write(b"\x04")  # Minimum code size for 16 colors
+
+        data = self.encode(pixels)
+        for start in range(0, len(data), 255):
+            block = data[start:start + 255]
+            self.file.write(bytes([len(block)]) + block)
+
+        self.file.write(b"\x00")
+
+    def encode(self, pixels: np.ndarray) -> bytes:
+        # LZW without building a dictionary: a clear code before every 12 pixels keeps
+        # every code 5 bits wide, so the whole frame packs with a few array ops
+        clear, end = 16, 17
+        indices = (pixels.ravel() & 0x0F).astype(np.uint8)
+        padding = -len(indices) % 12
+
+        groups = np.concatenate([indices, np.zeros(padding, np.uint8)]).reshape(-1, 12)
+        codes = np.concatenate([np.full((len(groups), 1), clear, np.uint8), groups], axis=1).ravel()
+        codes = np.concatenate([codes[:len(codes) - padding], [end]]).astype(np.uint8)
+
+        # 5 bits per code, least significant bit first
+        bits = np.unpackbits(codes[:, None], axis=1, count=5, bitorder="little")
+        return np.packbits(bits.ravel(), bitorder="little").tobytes()
+
+    def close(self) -> None:
+        if self.pending is not None:
+            self.write_frame(self.pending, 1)
+
+        self.file.write(b"\x3B")
+
+
+class ApngWriter:
+    def __init__(self, file: BinaryIO, width: int, height: int, palette: list[int], fps: int) -> None:
+        self.file = file
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.sequence = 0
+        self.count = 0
+        self.last_frame: Optional[int] = None
+        self.pending: Optional[np.ndarray] = None
+
+        plte = bytes(channel for color in palette
+                     for channel in (color >> 16 & 0xFF, color >> 8 & 0xFF, color & 0xFF))
+
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)))
+        file.write(png_chunk(b"PLTE", plte))
+
+        # Frame count is patched in on close
+        self.actl_position = file.tell()
+        file.write(png_chunk(b"acTL", struct.pack(">II", 0, 0)))
+
+    def write(self, frame: int, pixels: np.ndarray) -> None:
+        if self.pending is not None:
+            self.write_frame(self.pending, frame - self.last_frame)
+
+        self.pending = pixels.copy()
+        self.last_frame = frame
+
+    def write_frame(self, pixels: np.ndarray, ticks: int) -> None:
+        # Filter byte 0 in front of every row
+        rows = np.concatenate([np.zeros((self.height, 1), np.uint8), pixels], axis=1)
+        data = zlib.compress(rows.tobytes(), 6)
+
+        self.file.write(png_chunk(b"fcTL", struct.pack(
+            ">IIIIIHHBB", self.sequence, self.width, self.height, 0, 0, ticks, self.fps, 0, 0)))
+        self.sequence += 1
+
+        if self.count == 0:
+            self.file.write(png_chunk(b"IDAT", data))
+        else:
+            self.file.write(png_chunk(b"fdAT", struct.pack(">I", self.sequence) + data))
+            self.sequence += 1
+
+        self.count += 1
+
+    def close(self) -> None:
+        if self.pending is not None:
+            self.write_frame(self.pending, 1)
+
+        self.file.write(png_chunk(b"IEND", b""))
+
+        self.file.seek(self.actl_position)
+        self.file.write(png_chunk(b"acTL", struct.pack(">II", self.count, 0)))
+
+
+class RawWriter:
+    def __init__(self, file: BinaryIO, width: int, height: int, palette: list[int], fps: int) -> None:
+        # Plain rgb24 frames back to back, for ffmpeg -f rawvideo
+        self.file = file
+        self.palette = np.array([(color >> 16 & 0xFF, color >> 8 & 0xFF, color & 0xFF)
+                                 for color in palette], np.uint8)
+        self.last_frame: Optional[int] = None
+        self.last_rgb: Optional[bytes] = None
+
+    def write(self, frame: int, pixels: np.ndarray) -> None:
+        # Hold the last frame over skipped ticks so the video keeps real time,
+        # the same frame the other formats stretch with a longer delay
+        if self.last_rgb is not None:
+            for _ in range(frame - self.last_frame - 1):
+                self.file.write(self.last_rgb)
+
+        self.last_rgb = self.palette[pixels].tobytes()
+        self.file.write(self.last_rgb)
+        self.last_frame = frame
+
+    def close(self) -> None:
+        pass
+
+
+WRITERS = {"gif": GifWriter, "apng": ApngWriter, "raw": RawWriter}
+
+
+def encoder_main(name: str, width: int, height: int, slots: int, path: str, format: str, palette: list[int], fps: int) -> None:
+    ring = FrameRing(width, height, slots, name)
+
+    with open(path, "wb") as file:
+        writer = WRITERS[format](file, width, height, palette, fps)
+
+        while True:
+            if ring.pending():
+                frame, pixels = ring.peek()
+                writer.write(frame, pixels)
+                ring.pop()
+            elif ring.header[IS_CLOSED]:
+                break
+            else:
+                time.sleep(0.002)
+
+        writer.close()
+
+    ring.close()
+
+
+class FrameCapture:
+    def __init__(self, path: str, width: int, height: int, fps: int, format: Optional[str] = None, slots: int = 120) -> None:
+        # Format comes from the extension unless given: .gif, .png/.apng or .raw
+        if format is None:
+            extension = os.path.splitext(path)[1].lower().lstrip(".")
+            format = {"png": "apng"}.get(extension, extension)
+
+        if format not in FORMATS:
+            raise ValueError(f"Unknown capture format [{format}], expected one of {list(FORMATS)}")
+
+        self.path = path
+        self.width = width
+        self.height = height
+        self.ring = FrameRing(self.width, self.height, slots)
+        self.captured = 0
+
+        palette = list(pyxel.colors.to_list())
+
+        # Spawn, not fork, the capturing process has a live pyxel window
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(
+            target=encoder_main, name="capture", daemon=True,
+            args=(self.ring.name, self.width, self.height, slots, path, format, palette, fps))
+        self.process.start()
+        self.is_closed = False
+
+        # Prints how many frames were captured and dropped
+        close_at_exit(self)
+
+    @property
+    def dropped(self) -> int:
+        return int(self.ring.header[DROPPED]) if not self.is_closed else self.final_dropped
+
+    def capture(self) -> None:
+        # Call at the end of draw(), costs one copy of the screen
+        if self.is_closed:
+            return
+
+        screen = np.ctypeslib.as_array(
+            pyxel.screen.data_ptr(), shape=(self.height, self.width))
+
+        if self.ring.push(pyxel.frame_count, screen):
+            self.captured += 1
+
+    def close(self) -> Optional[str]:
+        # Returns a summary of the capture, the first time only
+        if self.is_closed:
+            return None
+
+        # The encoder finishes what is in the ring, then stops
+        self.ring.header[IS_CLOSED] = 1
+        self.process.join()
+
+        self.final_dropped = int(self.ring.header[DROPPED])
+        self.is_closed = True
+        self.ring.close()
+
+        return f"Captured {self.captured} frames to {self.path}, dropped {self.final_dropped}"
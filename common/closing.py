@@ -0,0 +1,21 @@
+# Shutting down per-run services. pyxel may exit without returning from run(),
+# so whatever holds a thread, a process or an open file registers itself here
+# and is closed at exit. A close() that returns text has a summary for the
+# player, frames captured or how a hash check went, and it gets printed.
+import atexit
+
+from typing import Optional, Protocol
+
+
+class Closable(Protocol):
+    def close(self) -> Optional[str]: ...
+
+
+def close(service: Closable) -> None:
+    summary = service.close()
+    if summary:
+        print(summary)
+
+
+def close_at_exit(service: Closable) -> None:
+    atexit.register(close, service)
@@ -0,0 +1,95 @@
+# Continuous collision between a moving circle (the ball) and a resting
+# axis-aligned rectangle (a paddle). The ball's motion over one frame is treated
+# as a straight segment, so fast balls can't tunnel through thin paddles.
+import math
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class Hit:
+    t: float  # Fraction of the frame's motion before impact, 0..1
+    x: float  # Ball center at impact
+    y: float
+    normal_x: float  # Surface normal of the side that was hit
+    normal_y: float
+
+
+def sweep_circle_rect(start_x: float, start_y: float, end_x: float, end_y: float, radius: float,
+                      rect_x: float, rect_y: float, rect_w: float, rect_h: float) -> Optional[Hit]:
+    dx = end_x - start_x
+    dy = end_y - start_y
+
+    # Sweep the center point against the rect grown by the radius (slab test)
+    t_enter, t_exit = 0.0, 1.0
+    normal_x, normal_y = 0.0, 0.0
+
+    for start, delta, low, high, axis in ((start_x, dx, rect_x - radius, rect_x + rect_w + radius, 0),
+                                          (start_y, dy, rect_y - radius, rect_y + rect_h + radius, 1)):
+        if delta == 0:
+            # Moving parallel to this slab, so we must already be inside it
+            if start < low or start > high:
+                return None
+            continue
+
+        t1 = (low - start) / delta
+        t2 = (high - start) / delta
+        sign = -1.0
+
+        if t1 > t2:
+            t1, t2 = t2, t1
+            sign = 1.0
+
+        # Touching the face at the start still counts, the slab ordering means we move into it
+        if t1 >= t_enter:
+            t_enter = t1
+            normal_x, normal_y = (sign, 0.0) if axis == 0 else (0.0, sign)
+
+        t_exit = min(t_exit, t2)
+
+        if t_enter > t_exit:
+            return None
+
+    # Already overlapping at the start of the frame, not an incoming hit
+    if normal_x == 0 and normal_y == 0:
+        return None
+
+    hit_x = start_x + dx * t_enter
+    hit_y = start_y + dy * t_enter
+
+    # The grown rect has rounded corners, check the corner circle if we entered there
+    corner_x = rect_x if hit_x < rect_x else rect_x + rect_w if hit_x > rect_x + rect_w else None
+    corner_y = rect_y if hit_y < rect_y else rect_y + rect_h if hit_y > rect_y + rect_h else None
+
+    if corner_x is not None and corner_y is not None:
+        return sweep_circle_point(start_x, start_y, dx, dy, radius, corner_x, corner_y)
+
+    return Hit(t_enter, hit_x, hit_y, normal_x, normal_y)
+
+
+def sweep_circle_point(start_x: float, start_y: float, dx: float, dy: float, radius: float,
+                       point_x: float, point_y: float) -> Optional[Hit]:
+    # Solve |start + d*t - point| = radius for the first t in 0..1
+    mx = start_x - point_x
+    my = start_y - point_y
+
+    a = dx * dx + dy * dy
+    b = mx * dx + my * dy
+    c = mx * mx + my * my - radius * radius
+
+    if a == 0 or c < 0:
+        return None
+
+    discriminant = b * b - a * c
+    if discriminant < 0:
+        return None
+
+    t = (-b - math.sqrt(discriminant)) / a
+    if t < 0 or t > 1:
+        return None
+
+    hit_x = start_x + dx * t
+    hit_y = start_y + dy * t
+
+    return Hit(t, hit_x, hit_y, (hit_x - point_x) / radius, (hit_y - point_y) / radius)
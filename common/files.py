@@ -0,0 +1,21 @@
+# Files that must never be left half written. The data goes to a temporary file
+# next to the target, which then replaces it in one rename: after a crash the
+# old file or the new one is there, never a mix of both.
+import os
+
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+
+@contextmanager
+def atomic_write(path: str, sync: bool = False) -> Iterator[BinaryIO]:
+    # sync waits for the disk as well, so the new file also survives a power cut
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        yield file
+
+        if sync:
+            file.flush()
+            os.fsync(file.fileno())
+
+    os.replace(temp_path, path)
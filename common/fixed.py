@@ -0,0 +1,60 @@
+# Fixed-point physics. In fixed-point mode every physics value is a whole
+# number of 1/65536 pixel steps. Values stay Python floats so drawing and
+# collision code doesn't change, but they are always exact multiples of the
+# step: sums of them are exact, and anything else (products, square roots,
+# sines) is computed or rounded back onto the grid with integer math. The same
+# inputs then give bit-identical state on every machine, with no libm involved.
+import math
+
+
+FRACTION_BITS = 16
+ONE = 1 << FRACTION_BITS
+
+# Extra bits carried through series so the final rounding is the only error
+GUARD_BITS = 16
+
+
+def to_fixed(value: float) -> int:
+    return round(value * ONE)
+
+
+def from_fixed(value: int) -> float:
+    return value / ONE
+
+
+def quantize(value: float) -> float:
+    # Nearest grid value, halves go to even
+    return round(value * ONE) / ONE
+
+
+def shift_round(value: int, bits: int) -> int:
+    # Integer divide by 2**bits, rounding to nearest
+    return (value + (1 << (bits - 1))) >> bits
+
+
+def sqrt(value: float) -> float:
+    return math.isqrt(to_fixed(value) << FRACTION_BITS) / ONE
+
+
+def sin_cos(angle: float) -> tuple[float, float]:
+    # Taylor series in integers, fine for the small angles paddles use
+    bits = FRACTION_BITS + GUARD_BITS
+    one = 1 << bits
+    x = round(abs(angle) * one)  # Odd sine, even cosine, so only floor positive terms
+
+    sin, cos = 0, 0
+    term, power = one, 0
+
+    while term:
+        sign = -1 if power % 4 >= 2 else 1
+        if power % 2:
+            sin += sign * term
+        else:
+            cos += sign * term
+
+        # x^(n+1)/(n+1)! from x^n/n!
+        power += 1
+        term = term * x // one // power
+
+    sin = math.copysign(from_fixed(shift_round(sin, GUARD_BITS)), angle)
+    return sin, from_fixed(shift_round(cos, GUARD_BITS))
@@ -0,0 +1,80 @@
+# Frame pacing governor. Measures update/draw time against the frame budget and
+# trades visuals for simulation: first optional layers are switched off one by
+# one, then draw frames are skipped, while update keeps running every tick.
+# Quality comes back step by step once there is headroom again.
+import time
+
+from typing import Callable
+
+
+class FrameGovernor:
+    def __init__(self, fps: int, layers: list[str], max_frame_skip: int = 2,
+                 high_load: float = 0.9, low_load: float = 0.5, patience: int = 30) -> None:
+        self.budget = 1 / fps
+        self.layers = layers  # Optional layers, first one is shed first
+        self.max_frame_skip = max_frame_skip
+        self.high_load = high_load
+        self.low_load = low_load
+        self.patience = patience
+
+        # 0 is full quality, each level sheds one more layer or skips more draws
+        self.level = 0
+        self.max_level = len(layers) + max_frame_skip
+
+        self.update_time = 0.0
+        self.draw_time = 0.0
+        self.load = 0.0
+        self.over_frames = 0
+        self.under_frames = 0
+        self.frame = 0
+
+    def wrap(self, update: Callable[[], None], draw: Callable[[], None]) -> tuple[Callable[[], None], Callable[[], None]]:
+        def timed_update() -> None:
+            start = time.perf_counter()
+            update()
+            self.update_time = time.perf_counter() - start
+
+        def timed_draw() -> None:
+            # Skipped frames keep showing the last drawn screen
+            if not self.should_draw():
+                self.adjust()
+                return
+
+            start = time.perf_counter()
+            draw()
+            self.draw_time = time.perf_counter() - start
+            self.adjust()
+
+        return timed_update, timed_draw
+
+    def is_enabled(self, layer: str) -> bool:
+        return self.layers.index(layer) >= self.level
+
+    def frame_skip(self) -> int:
+        return max(0, self.level - len(self.layers))
+
+    def should_draw(self) -> bool:
+        self.frame += 1
+        return self.frame % (self.frame_skip() + 1) == 0
+
+    def adjust(self) -> None:
+        # Smoothed share of the budget used, skipped draws cost their share too
+        cost = self.update_time + self.draw_time / (self.frame_skip() + 1)
+        self.load += (cost / self.budget - self.load) * 0.1
+
+        if self.load > self.high_load:
+            self.over_frames += 1
+            self.under_frames = 0
+        elif self.load < self.low_load:
+            self.under_frames += 1
+            self.over_frames = 0
+        else:
+            self.over_frames = self.under_frames = 0
+
+        # Degrade quickly, restore slowly so we don't flicker between levels
+        if self.over_frames >= self.patience and self.level < self.max_level:
+            self.level += 1
+            self.over_frames = 0
+        elif self.under_frames >= self.patience * 4 and self.level > 0:
+            self.level -= 1
+            self.under_frames = 0
@@ -0,0 +1,309 @@
+# Headless stand-in for the subset of pyxel the games use (cls, rect, circ, text,
+# btn/btnp, frame_count, init/run/quit). Drawing goes into a NumPy uint8
+# framebuffer of palette indices that can be hashed or saved for golden frames.
+#
+# Usage (before any game module imports pyxel):
+#     from common import headless
+#     headless.install()
+#     headless.set_frame_limit(600)
+import ctypes
+import hashlib
+import math
+import struct
+import sys
+import zlib
+
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+
+# Default pyxel palette
+DEFAULT_COLORS = [
+    0x000000, 0x2B335F, 0x7E2072, 0x19959C, 0x8B4852, 0x395C98, 0xA9C1FF, 0xEEEEEE,
+    0xD4186C, 0xD38441, 0xE9C35B, 0x70C6A9, 0x7696DE, 0xA3A3A3, 0xFF9798, 0xEDC7B0,
+]
+NUM_COLORS = len(DEFAULT_COLORS)
+
+# Built-in pyxel font, one 24 bit glyph per char from ' ' to '\x7f', 4x6 px each
+FONT_WIDTH = 4
+FONT_HEIGHT = 6
+MIN_FONT_CODE = 32
+FONT_DATA = [
+    0x000000, 0x444040, 0xAA0000, 0xAEAEA0, 0x6C6C40, 0x824820, 0x4A4AC0, 0x440000, 0x244420,
+    0x844480, 0xA4E4A0, 0x04E400, 0x000480, 0x00E000, 0x000040, 0x224880, 0x6AAAC0, 0x4C4440,
+    0xC248E0, 0xC242C0, 0xAAE220, 0xE8C2C0, 0x68EAE0, 0xE24880, 0xEAEAE0, 0xEAE2C0, 0x040400,
+    0x040480, 0x248420, 0x0E0E00, 0x842480, 0xE24040, 0x4AA860, 0x4AEAA0, 0xCACAC0, 0x688860,
+    0xCAAAC0, 0xE8E8E0, 0xE8E880, 0x68EA60, 0xAAEAA0, 0xE444E0, 0x222A40, 0xAACAA0, 0x8888E0,
+    0xAEEAA0, 0xCAAAA0, 0x4AAA40, 0xCAC880, 0x4AAE60, 0xCAECA0, 0x6842C0, 0xE44440, 0xAAAA60,
+    0xAAAA40, 0xAAEEA0, 0xAA4AA0, 0xAA4440, 0xE248E0, 0x644460, 0x884220, 0xC444C0, 0x4A0000,
+    0x0000E0, 0x840000, 0x06AA60, 0x8CAAC0, 0x068860, 0x26AA60, 0x06AC60, 0x24E440, 0x06AE24,
+    0x8CAAA0, 0x404440, 0x2022A4, 0x8ACCA0, 0xC444E0, 0x0EEEA0, 0x0CAAA0, 0x04AA40, 0x0CAAC8,
+    0x06AA62, 0x068880, 0x06C6C0, 0x4E4460, 0x0AAA60, 0x0AAA40, 0x0AAEE0, 0x0A44A0, 0x0AA624,
+    0x0E24E0, 0x64C460, 0x444440, 0xC464C0, 0x6C0000, 0xEEEEE0,
+]
+
+# Key codes, same values as pyxel so recorded inputs stay interchangeable
+KEY_SPACE = 32
+KEY_RETURN = 13
+KEY_ESCAPE = 27
+KEY_RIGHT = 1073741903
+KEY_LEFT = 1073741904
+KEY_DOWN = 1073741905
+KEY_UP = 1073741906
+
+for _idx in range(26):
+    globals()[f"KEY_{chr(65 + _idx)}"] = 97 + _idx
+
+for _idx in range(10):
+    globals()[f"KEY_{_idx}"] = 48 + _idx
+
+
+def _round(value: float) -> int:
+    # pyxel rounds half away from zero, unlike python's round()
+    return int(math.floor(abs(value) + 0.5)) * (1 if value >= 0 else -1)
+
+
+def _build_glyphs() -> list[np.ndarray]:
+    glyphs = []
+
+    for data in FONT_DATA:
+        bits = [(data >> (23 - i)) & 1 for i in range(FONT_WIDTH * FONT_HEIGHT)]
+        glyphs.append(np.array(bits, dtype=bool).reshape(
+            FONT_HEIGHT, FONT_WIDTH))
+
+    return glyphs
+
+
+class Framebuffer:
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.data = np.zeros((height, width), dtype=np.uint8)
+        self.palette = np.array([[(c >> 16) & 0xFF, (c >> 8) & 0xFF, c & 0xFF]
+                                 for c in DEFAULT_COLORS], dtype=np.uint8)
+
+        self.glyphs = _build_glyphs()
+        self.circle_masks: dict[int, np.ndarray] = {}
+
+    def cls(self, col: int) -> None:
+        self.data.fill(col)
+
+    def rect(self, x: float, y: float, w: float, h: float, col: int) -> None:
+        x = _round(x)
+        y = _round(y)
+        self.fill(x, y, np.ones((max(_round(h), 0), max(_round(w), 0)), dtype=bool), col)
+
+    def circ(self, x: float, y: float, r: float, col: int) -> None:
+        radius = max(_round(r), 0)
+        mask = self.get_circle_mask(radius)
+        self.fill(_round(x) - radius, _round(y) - radius, mask, col)
+
+    def text(self, x: float, y: float, s: str, col: int) -> None:
+        x = start_x = _round(x)
+        y = _round(y)
+
+        for char in s:
+            if char == "\n":
+                x = start_x
+                y += FONT_HEIGHT
+                continue
+
+            code = ord(char) - MIN_FONT_CODE
+            if code < 0 or code >= len(self.glyphs):
+                continue
+
+            self.fill(x, y, self.glyphs[code], col)
+            x += FONT_WIDTH
+
+    def fill(self, x: int, y: int, mask: np.ndarray, col: int) -> None:
+        # Clip the mask against the screen and write it with one slice
+        h, w = mask.shape
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + w, self.width), min(y + h, self.height)
+
+        if left >= right or top >= bottom:
+            return
+
+        region = mask[top - y:bottom - y, left - x:right - x]
+        target = self.data[top:bottom, left:right]
+
+        if region.all():
+            target.fill(col)
+        else:
+            target[region] = col
+
+    def get_circle_mask(self, radius: int) -> np.ndarray:
+        if radius in self.circle_masks:
+            return self.circle_masks[radius]
+
+        # Same spans as pyxel's filled circle, mirrored over both axes
+        size = radius * 2 + 1
+        mask = np.zeros((size, size), dtype=bool)
+
+        for xi in range(radius + 1):
+            dy = radius * math.sqrt(1 - xi * xi / (radius * radius)) if radius > 0 else 0
+            x1, x2 = _round(-xi - 0.01), _round(xi + 0.01)
+            y1, y2 = _round(-dy - 0.01), _round(dy + 0.01)
+
+            mask[radius + y1:radius + y2 + 1, radius + x1] = True
+            mask[radius + y1:radius + y2 + 1, radius + x2] = True
+            mask[radius + x1, radius + y1:radius + y2 + 1] = True
+            mask[radius + x2, radius + y1:radius + y2 + 1] = True
+
+        self.circle_masks[radius] = mask
+        return mask
+
+    def data_ptr(self) -> "ctypes._Pointer":
+        # Same raw access as pyxel.screen.data_ptr() for batched pixel writes
+        return self.data.ctypes.data_as(ctypes.POINTER(ctypes.c_uint8))
+
+    def to_rgb(self) -> np.ndarray:
+        return self.palette[self.data]
+
+    def hash(self) -> str:
+        return hashlib.sha1(self.data.tobytes()).hexdigest()
+
+    def save(self, path: str) -> None:
+        # Write an 8-bit RGB png without needing an imaging library
+        rgb = self.to_rgb()
+        raw = b"".join(b"\x00" + row.tobytes() for row in rgb)
+
+        def chunk(tag: bytes, body: bytes) -> bytes:
+            return (struct.pack(">I", len(body)) + tag + body +
+                    struct.pack(">I", zlib.crc32(tag + body) & 0xFFFFFFFF))
+
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+
+        with open(path, "wb") as file:
+            file.write(b"\x89PNG\r\n\x1a\n")
+            file.write(chunk(b"IHDR", header))
+            file.write(chunk(b"IDAT", zlib.compress(raw)))
+            file.write(chunk(b"IEND", b""))
+
+
+class Colors(list):
+    def to_list(self) -> list[int]:
+        return list(self)
+
+
+# Module state mirroring pyxel's globals
+screen: Optional[Framebuffer] = None
+colors = Colors(DEFAULT_COLORS)
+width = 0
+height = 0
+frame_count = 0
+
+_frame_limit: Optional[int] = None
+_is_drawing = True
+_is_quitting = False
+_held_keys: set[int] = set()
+_prev_keys: set[int] = set()
+_input_source: Optional[Callable[[int], Iterable[int]]] = None
+
+
+def install() -> None:
+    # Make every later `import pyxel` resolve to this module
+    sys.modules["pyxel"] = sys.modules[__name__]
+
+
+def init(w: int, h: int, title: str = "", fps: int = 30, **kwargs) -> None:
+    global screen, width, height, frame_count, _is_quitting
+
+    screen = Framebuffer(w, h)
+    width = w
+    height = h
+    frame_count = 0
+    _is_quitting = False
+    _held_keys.clear()
+    _prev_keys.clear()
+
+
+def set_frame_limit(frames: Optional[int]) -> None:
+    # run() returns after this many frames, None runs until quit()
+    global _frame_limit
+    _frame_limit = frames
+
+
+def set_draw_enabled(is_enabled: bool) -> None:
+    # Skip draw() in run() for pure simulation, e.g. parameter sweeps
+    global _is_drawing
+    _is_drawing = is_enabled
+
+
+def set_input_source(source: Optional[Callable[[int], Iterable[int]]]) -> None:
+    # source(frame_count) returns the keys held during that frame
+    global _input_source
+    _input_source = source
+
+
+def set_keys(keys: Iterable[int]) -> None:
+    _held_keys.clear()
+    _held_keys.update(keys)
+
+
+def step(update: Callable[[], None], draw: Optional[Callable[[], None]] = None) -> None:
+    global frame_count
+
+    _prev_keys.clear()
+    _prev_keys.update(_held_keys)
+
+    if _input_source is not None:
+        set_keys(_input_source(frame_count))
+
+    update()
+
+    if draw is not None:
+        draw()
+
+    frame_count += 1
+
+
+def run(update: Callable[[], None], draw: Callable[[], None]) -> None:
+    while not _is_quitting and (_frame_limit is None or frame_count < _frame_limit):
+        step(update, draw if _is_drawing else None)
+
+
+def quit() -> None:
+    global _is_quitting
+    _is_quitting = True
+
+
+def btn(key: int) -> bool:
+    return key in _held_keys
+
+
+def btnp(key: int, hold: int = 0, repeat: int = 0) -> bool:
+    return key in _held_keys and key not in _prev_keys
+
+
+def btnr(key: int) -> bool:
+    return key in _prev_keys and key not in _held_keys
+
+
+def cls(col: int) -> None:
+    screen.cls(col)
+
+
+def rect(x: float, y: float, w: float, h: float, col: int) -> None:
+    screen.rect(x, y, w, h, col)
+
+
+def circ(x: float, y: float, r: float, col: int) -> None:
+    screen.circ(x, y, r, col)
+
+
+def text(x: float, y: float, s: str, col: int) -> None:
+    screen.text(x, y, s, col)
+
+
+def pget(x: float, y: float) -> int:
+    return int(screen.data[_round(y), _round(x)])
+
+
+def frame_hash() -> str:
+    return screen.hash()
+
+
+def save_frame(path: str) -> None:
+    screen.save(path)
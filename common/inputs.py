@@ -0,0 +1,24 @@
+# Input sampled once at the start of a tick, so everything in that tick sees
+# the same buttons and a press can act on the very frame it happens.
+import pyxel
+
+from dataclasses import dataclass
+from typing import Iterable
+
+
+@dataclass(frozen=True)
+class InputSnapshot:
+    held: frozenset[int]
+    pressed: frozenset[int]
+
+    @classmethod
+    def sample(cls, keys: Iterable[int]) -> "InputSnapshot":
+        keys = tuple(keys)
+        return cls(frozenset(key for key in keys if pyxel.btn(key)),
+                   frozenset(key for key in keys if pyxel.btnp(key)))
+
+    def is_held(self, key: int) -> bool:
+        return key in self.held
+
+    def is_pressed(self, key: int) -> bool:
+        return key in self.pressed
@@ -0,0 +1,43 @@
+# Measures input latency in ticks: from the tick a watched key goes down to the
+# first tick where the visible game state differs from when it was pressed.
+from collections import deque
+from typing import Callable, Hashable, Iterable, Optional
+
+from common.inputs import InputSnapshot
+
+
+class LatencyProbe:
+    def __init__(self, keys: Iterable[int], get_visible_state: Callable[[], Hashable], timeout: int = 30) -> None:
+        self.keys = frozenset(keys)
+        self.get_visible_state = get_visible_state
+        self.timeout = timeout  # Presses with no visible effect by then are dropped
+
+        self.pending_frame: Optional[int] = None
+        self.pending_state: Hashable = None
+        self.samples: deque[int] = deque(maxlen=256)
+
+    def on_input(self, frame: int, snapshot: InputSnapshot) -> None:
+        # Call at the start of the tick, before the input is applied
+        if self.pending_frame is None and self.keys & snapshot.pressed:
+            self.pending_frame = frame
+            self.pending_state = self.get_visible_state()
+
+    def on_tick_end(self, frame: int) -> Optional[int]:
+        # Call once the tick's state is final, returns a latency when one was measured
+        if self.pending_frame is None:
+            return None
+
+        latency = frame - self.pending_frame
+
+        if self.get_visible_state() != self.pending_state:
+            self.pending_frame = None
+            self.samples.append(latency)
+            return latency
+
+        if latency >= self.timeout:
+            self.pending_frame = None
+
+        return None
+
+    def mean(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
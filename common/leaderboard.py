@@ -0,0 +1,330 @@
+# Persistent high scores. Every score is appended to a log of small checksummed
+# records, so a crash loses at most the record being written and a torn tail is
+# cut off on the next load. Once the log holds enough scores it is compacted
+# into a snapshot of (score, count) pairs plus the top entries, which stays
+# small however many games are played. Compacting writes and syncs two files,
+# so it happens when the board closes at exit, never on a game over. In memory each distinct score keeps a count, with a Fenwick
+# tree over the counts for ranks, and the top entries are a small heap, so the
+# game over screen never waits on the disk or on a scan.
+#
+# Show a leaderboard from the repo root with:
+#     python -m common.leaderboard Arkanoid/leaderboard
+import argparse
+import bisect
+import heapq
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+from common.closing import close_at_exit
+from common.files import atomic_write
+
+
+LOG_MAGIC = b"LBLG"
+SNAPSHOT_MAGIC = b"LBSN"
+
+# Magic, generation. A snapshot names the log generation it already folded in
+LOG_HEADER = struct.Struct("<4sI")
+
+# Score, unix time, CRC32 of the two
+RECORD = struct.Struct("<qdI")
+RECORD_BODY = struct.Struct("<qd")
+
+# Magic, folded log generation, distinct scores, top entries
+SNAPSHOT_HEADER = struct.Struct("<4sIII")
+
+
+@dataclass(frozen=True)
+class Entry:
+    score: int
+    time: float
+
+
+class RankIndex:
+    def __init__(self, keys: Optional[array] = None, counts: Optional[array] = None) -> None:
+        # Distinct scores ascending, how often each was scored, and how many there are in all
+        self.keys = keys if keys is not None else array("q")
+        self.counts = counts if counts is not None else array("q")
+        self.total = sum(self.counts)
+
+        # Fenwick tree over the counts, node i (1-based) at tree[i - 1]
+        self.tree = np.zeros(0, np.int64)
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        # Each level adds the finished nodes into their parents, one strided slice per level
+        tree = np.array(self.counts, np.int64)
+        step = 1
+        while step < len(tree):
+            parents = tree[2 * step - 1::2 * step]
+            parents += tree[step - 1::2 * step][:len(parents)]
+            step *= 2
+
+        self.tree = tree
+
+    def add(self, score: int) -> None:
+        position = bisect.bisect_left(self.keys, score)
+        self.total += 1
+
+        # A new score shifts every key after it, only then is the tree rebuilt
+        if position == len(self.keys) or self.keys[position] != score:
+            self.keys.insert(position, score)
+            self.counts.insert(position, 1)
+            self.rebuild()
+            return
+
+        self.counts[position] += 1
+
+        node, tree = position + 1, self.tree
+        while node <= len(tree):
+            tree[node - 1] += 1
+            node += node & -node
+
+    def extend(self, scores: list[int]) -> None:
+        # Many scores at once, one merge and one rebuild
+        if not scores:
+            return
+
+        merged = np.concatenate((np.frombuffer(self.keys, np.int64), np.array(scores, np.int64)))
+        weights = np.concatenate((np.frombuffer(self.counts, np.int64), np.ones(len(scores), np.int64)))
+        keys, inverse = np.unique(merged, return_inverse=True)
+        counts = np.zeros(len(keys), np.int64)
+        np.add.at(counts, inverse, weights)
+
+        self.keys, self.counts = array("q", keys.tobytes()), array("q", counts.tobytes())
+        self.total += len(scores)
+        self.rebuild()
+
+    def rank(self, score: int) -> int:
+        # One more than the scores above it, ties share the better rank
+        node, tree = bisect.bisect_right(self.keys, score), self.tree
+        at_or_below = 0
+        while node > 0:
+            at_or_below += tree[node - 1]
+            node -= node & -node
+
+        return self.total - int(at_or_below) + 1
+
+
+class Leaderboard:
+    def __init__(self, path: str, top: int = 10, compact_every: int = 1000) -> None:
+        # path without extension, the log and the snapshot live next to each other
+        self.log_path = path + ".log"
+        self.snapshot_path = path + ".snapshot"
+        self.top_size = top
+        self.compact_every = compact_every
+
+        # How often every score was scored, for ranks
+        self.index = RankIndex()
+
+        # Min heap of the best entries, the worst of them on top
+        self.best: list[tuple[int, float]] = []
+
+        self.generation = 0
+        self.appended = 0  # Records in the current log
+        self.load()
+
+        self.log = open(self.log_path, "ab")
+        self.is_closed = False
+        close_at_exit(self)
+
+    def __len__(self) -> int:
+        return self.index.total
+
+    def load(self) -> None:
+        try:
+            folded = self.load_snapshot()
+        except (ValueError, struct.error):
+            # A broken snapshot mustn't keep the game from starting, the log may still hold scores
+            set_aside(self.snapshot_path)
+            self.index, self.best = RankIndex(), []
+            folded = 0
+
+        pending: list[tuple[int, float]] = []
+        generation, valid_size, size = None, 0, 0
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as file:
+                data = file.read()
+
+            size = len(data)
+            try:
+                generation, pending, valid_size = parse_log(data)
+            except ValueError:
+                set_aside(self.log_path)
+
+        # A log the snapshot already holds is left over from a compaction cut short
+        if generation is not None and generation != folded:
+            self.generation = generation
+
+            # Cut off a torn tail
+            if valid_size != size:
+                self.rewrite_log(pending)
+        else:
+            # Missing, empty, cut short inside its header or already folded in: start the next one
+            pending = []
+            self.generation = folded + 1
+            self.rewrite_log([])
+
+        # Snapshot scores arrive as counts already, the log's are merged in at once
+        self.index.extend([score for score, _ in pending])
+        for entry in pending:
+            self.add_best(entry)
+
+        self.appended = len(pending)
+
+    def load_snapshot(self) -> int:
+        if not os.path.exists(self.snapshot_path):
+            return 0
+
+        with open(self.snapshot_path, "rb") as file:
+            data = file.read()
+
+        magic, folded, distinct, top = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a leaderboard snapshot [{self.snapshot_path}]")
+
+        offset = SNAPSHOT_HEADER.size
+        scores, counts = array("q"), array("q")
+        scores.frombytes(data[offset:offset + distinct * 8])
+        offset += distinct * 8
+        counts.frombytes(data[offset:offset + distinct * 8])
+        offset += distinct * 8
+
+        self.index = RankIndex(scores, counts)
+
+        for index in range(top):
+            self.best.append(RECORD_BODY.unpack_from(data, offset + index * RECORD_BODY.size))
+
+        heapq.heapify(self.best)
+        while len(self.best) > self.top_size:
+            heapq.heappop(self.best)
+
+        return folded
+
+    def rewrite_log(self, records: list[tuple[int, float]]) -> None:
+        with atomic_write(self.log_path, sync=True) as file:
+            file.write(LOG_HEADER.pack(LOG_MAGIC, self.generation))
+
+            for score, when in records:
+                file.write(pack_record(score, when))
+
+    def add_best(self, entry: tuple[int, float]) -> None:
+        score = entry[0]
+        if len(self.best) < self.top_size:
+            heapq.heappush(self.best, entry)
+        elif score > self.best[0][0]:
+            heapq.heapreplace(self.best, entry)
+
+    def submit(self, score: int) -> int:
+        # Returns the new score's rank, 1 is the best
+        score = int(score)
+        when = time.time()
+
+        # Reaches the OS before anything else, a crash of the game can't lose it
+        self.log.write(pack_record(score, when))
+        self.log.flush()
+        self.appended += 1
+
+        self.index.add(score)
+        self.add_best((score, when))
+
+        return self.rank(score)
+
+    def rank(self, score: int) -> int:
+        return self.index.rank(score)
+
+    def top(self, count: Optional[int] = None) -> list[Entry]:
+        # Best first, earlier entries win ties
+        entries = sorted(self.best, key=lambda entry: (-entry[0], entry[1]))
+        return [Entry(score, when) for score, when in entries[:count]]
+
+    def compact(self) -> None:
+        scores, counts = self.index.keys, self.index.counts
+
+        # The snapshot lands first, naming the log it replaces
+        with atomic_write(self.snapshot_path, sync=True) as file:
+            file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.generation, len(scores), len(self.best)))
+            file.write(scores.tobytes())
+            file.write(counts.tobytes())
+
+            for score, when in self.best:
+                file.write(RECORD_BODY.pack(score, when))
+
+        # Then a fresh, empty log of the next generation
+        self.log.close()
+        self.generation += 1
+        self.rewrite_log([])
+        self.log = open(self.log_path, "ab")
+        self.appended = 0
+
+    def close(self) -> None:
+        if self.is_closed:
+            return
+
+        self.is_closed = True
+
+        if self.appended >= self.compact_every:
+            self.compact()
+
+        self.log.close()
+
+
+def set_aside(path: str) -> None:
+    # Keep a file we can't read for a look later, and start over without it
+    os.replace(path, path + ".bad")
+
+
+def pack_record(score: int, when: float) -> bytes:
+    body = RECORD_BODY.pack(score, when)
+    return body + struct.pack("<I", zlib.crc32(body))
+
+
+def parse_log(data: bytes) -> tuple[Optional[int], list[tuple[int, float]], int]:
+    # Generation, every intact record, and how many bytes of the file are good
+    if len(data) < LOG_HEADER.size:
+        return None, [], 0
+
+    magic, generation = LOG_HEADER.unpack_from(data)
+    if magic != LOG_MAGIC:
+        raise ValueError("Not a leaderboard log")
+
+    records = []
+    offset = LOG_HEADER.size
+
+    # Stop at a torn or corrupt tail, everything before it is kept
+    while offset + RECORD.size <= len(data):
+        score, when, checksum = RECORD.unpack_from(data, offset)
+        if zlib.crc32(data[offset:offset + RECORD_BODY.size]) != checksum:
+            break
+
+        records.append((score, when))
+        offset += RECORD.size
+
+    return generation, records, offset
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Show a leaderboard")
+    parser.add_argument("path", help="leaderboard path without the .log/.snapshot extension")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    leaderboard = Leaderboard(args.path, top=args.top)
+    print(f"{len(leaderboard)} scores")
+
+    for rank, entry in enumerate(leaderboard.top(), 1):
+        played = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.time))
+        print(f"{rank:>3}. {entry.score:>10}  {played}")
+
+    leaderboard.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# In-game profiling without an external profiler. A background thread samples
+# the pyxel thread's stack while update() or draw() runs and counts collapsed
+# stacks, so CPU time is attributed to the games' own methods at a cost of a
+# stack walk per sample. Optionally tracemalloc runs from the start of update()
+# to the end of draw(): the snapshot taken then holds exactly what the frame
+# allocated and kept, so it is that frame's diff without comparing whole heaps,
+# and it is charged to the lines that allocated it. The peak each update()/draw()
+# call allocated on the way is tracked too.
+#
+# Both are written as collapsed stacks, one "frame;frame;frame count" per line,
+# ready for flamegraph.pl, speedscope or inferno:
+#     flamegraph.pl profile-cpu.folded > cpu.svg
+import ast
+import linecache
+import os
+import sys
+import threading
+import tracemalloc
+
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Optional
+
+from common.closing import close_at_exit
+
+
+# Frames from here up are the games', everything else is library code
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def is_game_file(filename: str) -> bool:
+    return filename.startswith(ROOT) and filename != __file__
+
+
+def frame_label(filename: str, name: str) -> str:
+    # Game files by their path in the repo, libraries by file name
+    if filename.startswith(ROOT):
+        filename = os.path.relpath(filename, ROOT)
+    else:
+        filename = os.path.basename(filename)
+
+    return f"{filename}:{name}"
+
+
+@lru_cache(maxsize=None)
+def function_spans(filename: str) -> list[tuple[int, int, str]]:
+    # (first line, last line, qualname) of every function in a file, tracemalloc only knows lines
+    try:
+        tree = ast.parse("".join(linecache.getlines(filename)))
+    except (SyntaxError, ValueError):
+        return []
+
+    spans = []
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                visit(child, f"{prefix}{child.name}.")
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                spans.append((child.lineno, child.end_lineno, prefix + child.name))
+                visit(child, f"{prefix}{child.name}.<locals>.")
+            else:
+                visit(child, prefix)
+
+    visit(tree, "")
+    return spans
+
+
+@lru_cache(maxsize=None)
+def function_at(filename: str, lineno: int) -> str:
+    # Innermost function around the line, named like co_qualname
+    name, start = "<module>", 0
+    for first, last, qualname in function_spans(filename):
+        if first <= lineno <= last and first > start:
+            name, start = qualname, first
+
+    return name
+
+
+class FrameProfiler:
+    def __init__(self, prefix: str, interval: float = 0.002, trace_allocations: bool = False,
+                 snapshot_every: int = 1, traceback_depth: int = 12) -> None:
+        self.prefix = prefix  # Output goes to <prefix>-cpu.folded and <prefix>-alloc.folded
+        self.interval = interval
+        self.trace_allocations = trace_allocations
+        self.snapshot_every = snapshot_every
+
+        # Collapsed stack -> samples, and allocating stack -> bytes kept
+        self.samples: Counter[str] = Counter()
+        self.allocations: Counter[str] = Counter()
+
+        # Most bytes a single update()/draw() allocated at once
+        self.peaks = {"update": 0, "draw": 0}
+
+        # What the pyxel thread is running, read by the sampler
+        self.phase: Optional[str] = None
+        self.thread_id = threading.get_ident()
+        self.frame = 0
+
+        self.traceback_depth = traceback_depth
+
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.sample_loop, name="profiler", daemon=True)
+        self.thread.start()
+        self.is_closed = False
+
+        # Prints where the stacks went and the peak allocations
+        close_at_exit(self)
+
+    def wrap(self, update: Callable[[], None], draw: Callable[[], None]) -> tuple[Callable[[], None], Callable[[], None]]:
+        def profiled_update() -> None:
+            self.run("update", update)
+
+        def profiled_draw() -> None:
+            self.run("draw", draw)
+            self.end_frame()
+
+        return profiled_update, profiled_draw
+
+    def run(self, phase: str, callback: Callable[[], None]) -> None:
+        # Traced frames start with an empty trace, whatever is in it at the end is the frame's
+        if phase == "update" and self.trace_allocations and self.frame % self.snapshot_every == 0:
+            tracemalloc.start(self.traceback_depth)
+
+        is_tracing = tracemalloc.is_tracing()
+        if is_tracing:
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+
+        self.phase = phase
+        try:
+            callback()
+        finally:
+            self.phase = None
+
+        if is_tracing:
+            self.peaks[phase] = max(self.peaks[phase], tracemalloc.get_traced_memory()[1] - start)
+
+    def sample_loop(self) -> None:
+        run_code = FrameProfiler.run.__code__
+
+        while not self.stopped.wait(self.interval):
+            phase = self.phase
+            frame = sys._current_frames().get(self.thread_id)
+            if phase is None or frame is None:
+                continue
+
+            # Innermost first, up to the callback run() made
+            labels = []
+            while frame is not None and frame.f_code is not run_code:
+                code = frame.f_code
+                labels.append(frame_label(code.co_filename, code.co_qualname))
+                frame = frame.f_back
+
+            # The sample came in between phases
+            if frame is None:
+                continue
+
+            labels.append(phase)
+            self.samples[";".join(reversed(labels))] += 1
+
+    def end_frame(self) -> None:
+        self.frame += 1
+
+        if not tracemalloc.is_tracing():
+            return
+
+        # Stopping drops the traces, so the next traced frame starts clean
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        for stat in snapshot.statistics("traceback"):
+            # Stacks start below run(), the pyxel loop above it is the same every time
+            frames = list(stat.traceback)
+            ours = [index for index, frame in enumerate(frames) if frame.filename == __file__]
+            if ours:
+                frames = frames[ours[-1] + 1:]
+
+            # What is left without a game frame is the sampler thread's own
+            if not any(is_game_file(frame.filename) for frame in frames):
+                continue
+
+            # Functions like the CPU stacks, the innermost one also keeps the line that allocated
+            labels = [frame_label(frame.filename, function_at(frame.filename, frame.lineno)) for frame in frames]
+            if labels:
+                labels[-1] += f":{frames[-1].lineno}"
+
+            self.allocations[";".join(labels)] += stat.size
+
+    def close(self) -> Optional[str]:
+        # Returns a summary of what was written, the first time only
+        if self.is_closed:
+            return None
+
+        self.is_closed = True
+        self.stopped.set()
+        self.thread.join()
+
+        write_folded(self.prefix + "-cpu.folded", self.samples)
+        summary = f"Profiled {self.frame} frames, {sum(self.samples.values())} samples to {self.prefix}-cpu.folded"
+
+        if self.trace_allocations:
+            tracemalloc.stop()
+            write_folded(self.prefix + "-alloc.folded", self.allocations)
+            summary += (f"\nKept {sum(self.allocations.values())} bytes over {self.frame} frames to {self.prefix}-alloc.folded, "
+                        f"peak per call: update {self.peaks['update']} bytes, draw {self.peaks['draw']} bytes")
+
+        return summary
+
+
+def write_folded(path: str, stacks: Counter) -> None:
+    with open(path, "w") as file:
+        for stack, count in stacks.most_common():
+            file.write(f"{stack} {count}\n")
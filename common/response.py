@@ -0,0 +1,68 @@
+# Paddle response curves. A curve says how a paddle sends the ball back
+# depending on where along the paddle it was hit, from -1 at one end to 1 at
+# the other. Curves are compiled once into tables of velocity components, so
+# a bounce is a single lookup instead of trig on every hit.
+import math
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from common import fixed
+
+
+@dataclass(frozen=True)
+class ResponseCurve:
+    max_angle: float = 75  # Degrees away from straight back at the very ends
+    exponent: float = 1.0  # Above 1 keeps the middle flatter, below 1 steeper
+    dead_zone: float = 0.0  # Offsets closer to the middle than this go straight back
+    speed_up: float = 0.0  # Extra speed at the ends, 0.2 is 20% faster
+    spin: float = 0.0  # Share of the paddle's own speed added along the paddle
+    resolution: int = 256  # Table entries across the paddle
+
+
+class ResponseTable:
+    def __init__(self, curve: ResponseCurve, fixed_point: bool = False) -> None:
+        self.curve = curve
+        self.spin = curve.spin
+        self.last_index = curve.resolution - 1
+
+        # Unit speed components for every offset, along the paddle and away from it
+        self.angles: list[float] = []
+        self.along: list[float] = []
+        self.away: list[float] = []
+
+        for index in range(curve.resolution):
+            offset = index / self.last_index * 2 - 1
+            angle = self.get_angle(offset)
+            speed = 1 + curve.speed_up * abs(offset)
+
+            if fixed_point:
+                # Same table on every machine, see common/fixed.py
+                angle, speed = fixed.quantize(angle), fixed.quantize(speed)
+                sin, cos = fixed.sin_cos(angle)
+                along, away = fixed.quantize(sin * speed), fixed.quantize(cos * speed)
+            else:
+                along, away = math.sin(angle) * speed, math.cos(angle) * speed
+
+            self.angles.append(angle)
+            self.along.append(along)
+            self.away.append(away)
+
+    def get_angle(self, offset: float) -> float:
+        curve = self.curve
+        distance = (abs(offset) - curve.dead_zone) / (1 - curve.dead_zone)
+
+        if distance <= 0:
+            return 0.0
+
+        return math.copysign(math.radians(curve.max_angle) * distance ** curve.exponent, offset)
+
+    def get_index(self, offset: float) -> int:
+        index = round((offset + 1) / 2 * self.last_index)
+        return max(0, min(self.last_index, index))
+
+
+@lru_cache(maxsize=None)
+def compile_curve(curve: ResponseCurve, fixed_point: bool = False) -> ResponseTable:
+    # Paddles sharing a curve share its table
+    return ResponseTable(curve, fixed_point)
@@ -0,0 +1,79 @@
+# Per-run services a game can be started with: telemetry, state hashes for
+# desync checks, the leaderboard, frame capture and the profiler. A game takes
+# them as one Services object, and every game's command line gets the same
+# flags for them from add_arguments().
+import argparse
+
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from common import closing
+from common.capture import FrameCapture
+from common.leaderboard import Leaderboard
+from common.profiler import FrameProfiler
+from common.statehash import StateHash, open_state_hash
+from common.telemetry import Telemetry
+
+
+@dataclass
+class Services:
+    telemetry: Optional[Telemetry] = None
+    state_hash: Optional[StateHash] = None  # Fingerprints every tick for desync checks
+    leaderboard: Optional[Leaderboard] = None
+    capture: Optional[FrameCapture] = None  # Records every drawn frame
+    profiler: Optional[FrameProfiler] = None  # Samples update/draw from the outside
+
+    def record(self, frame: int, kind: str, key: Optional[object] = None, value: Optional[float] = None) -> None:
+        if self.telemetry is not None:
+            self.telemetry.event(frame, kind, key, value)
+
+    def wrap(self, update: Callable[[], None], draw: Callable[[], None]) -> tuple[Callable[[], None], Callable[[], None]]:
+        if self.profiler is None:
+            return update, draw
+
+        return self.profiler.wrap(update, draw)
+
+    def close(self) -> None:
+        # A worker closes its simulation itself, so summaries are shown from here as well as at exit
+        for service in (self.telemetry, self.state_hash, self.leaderboard, self.capture, self.profiler):
+            if service is not None:
+                closing.close(service)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--worker", action="store_true",
+                        help="run the simulation in a separate process; a slow worker slows the game down "
+                             "rather than dropping frames")
+    parser.add_argument("--capture", default=None,
+                        help="record the session to a .gif, .png (APNG) or .raw file")
+    parser.add_argument("--fixed-point", action="store_true",
+                        help="run the physics in integer fixed point, identical on every machine")
+    parser.add_argument("--record-hashes", default=None,
+                        help="write a state hash per tick to this file")
+    parser.add_argument("--check-hashes", default=None,
+                        help="compare every tick's state hash against a recorded file")
+    parser.add_argument("--profile", default=None, metavar="PREFIX",
+                        help="sample update/draw into PREFIX-cpu.folded flamegraph data")
+    parser.add_argument("--trace-allocations", action="store_true",
+                        help="with --profile, diff tracemalloc snapshots every frame into PREFIX-alloc.folded")
+
+
+def open_simulation_services(args: argparse.Namespace, game: str, telemetry_path: str, leaderboard_path: str) -> Services:
+    # What the simulating process owns, the worker in worker mode
+    return Services(telemetry=Telemetry(telemetry_path, game),
+                    state_hash=open_state_hash(args.record_hashes, args.check_hashes),
+                    leaderboard=Leaderboard(leaderboard_path))
+
+
+def open_window_services(args: argparse.Namespace, width: int, height: int, fps: int,
+                         services: Optional[Services] = None) -> Services:
+    # What the window process owns, also in worker mode: what is drawn and how long it takes
+    services = services if services is not None else Services()
+
+    if args.capture:
+        services.capture = FrameCapture(args.capture, width, height, fps)
+
+    if args.profile:
+        services.profiler = FrameProfiler(args.profile, trace_allocations=args.trace_allocations)
+
+    return services
@@ -0,0 +1,188 @@
+# Runs a game's simulation in a worker process. Every tick the window process
+# sends its held keys down a pipe; the worker runs one update against the
+# headless pyxel and publishes the state into a double-buffered shared memory
+# block. The window only asks for a tick once the last one is published, so at
+# most one tick is in flight and the worker never writes the buffer the
+# renderer is reading: draw() can use the latest buffer in place, without a
+# lock or a copy. While the worker is behind, held keys are folded into the
+# next tick it gets, so a slow worker slows the game down rather than dropping frames.
+#
+# The worker is a fresh interpreter running this module, not a multiprocessing
+# child: those import the game script again before the target runs, binding the
+# game to the real pyxel. Here the headless one is installed before anything of
+# the game is imported, and the build arguments are unpickled after that.
+import importlib
+import os
+import secrets
+import subprocess
+import sys
+import numpy as np
+
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Iterable, Optional, Union
+
+from common.closing import close_at_exit
+
+
+# Field name -> shape, every value is a float64
+Layout = dict[str, Union[int, tuple[int, ...]]]
+
+HEADER_SIZE = 8  # Sequence number of the last published tick
+
+
+class SharedState:
+    def __init__(self, layout: Layout, name: Optional[str] = None) -> None:
+        self.layout = layout
+        self.slot_size = sum(int(np.prod(shape)) for shape in layout.values()) * 8
+        self.is_owner = name is None
+
+        self.memory = shared_memory.SharedMemory(
+            name=name, create=self.is_owner, size=HEADER_SIZE + self.slot_size * 2)
+
+        # The worker's interpreter would unlink the block it attached to when it exits
+        if not self.is_owner and os.name == "posix":
+            resource_tracker.unregister(self.memory._name, "shared_memory")
+
+        # Even sequence numbers live in slot 0, odd ones in slot 1
+        self.sequence = np.ndarray((1,), np.int64, self.memory.buf, 0)
+        self.slots = [self.map_slot(HEADER_SIZE + self.slot_size * slot) for slot in range(2)]
+
+        if self.is_owner:
+            self.sequence[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def map_slot(self, offset: int) -> dict[str, np.ndarray]:
+        views = {}
+
+        for field, shape in self.layout.items():
+            views[field] = np.ndarray(shape, np.float64, self.memory.buf, offset)
+            offset += int(np.prod(shape)) * 8
+
+        return views
+
+    def back(self) -> dict[str, np.ndarray]:
+        # The slot the next tick is written into
+        return self.slots[(int(self.sequence[0]) + 1) % 2]
+
+    def publish(self) -> None:
+        # A single aligned store, the renderer sees the old or the new slot
+        self.sequence[0] += 1
+
+    def latest(self) -> Optional[dict[str, np.ndarray]]:
+        sequence = int(self.sequence[0])
+        return self.slots[sequence % 2] if sequence else None
+
+    def close(self) -> None:
+        # Views keep the buffer exported, drop them before closing
+        self.slots = []
+        self.sequence = None
+        self.memory.close()
+
+        if self.is_owner:
+            self.memory.unlink()
+
+
+class SimWorker:
+    def __init__(self, module: str, build: str, layout: Layout, args: tuple = ()) -> None:
+        # build(*args) is looked up in module inside the worker and returns the
+        # simulation: update(), save_state(state) and close()
+        self.state = SharedState(layout)
+
+        # The worker gets the parent's sys.path, the game folders are put there at runtime
+        authkey = secrets.token_bytes(16)
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+        with Listener(authkey=authkey) as listener:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "common.simworker", str(listener.address)],
+                env=environment, stdin=subprocess.PIPE)
+            self.process.stdin.write(authkey)
+            self.process.stdin.close()
+
+            self.connection = listener.accept()
+
+        self.connection.send((module, build, args, layout, self.state.name))
+        self.is_closed = False
+
+        # Ticks sent so far, and keys held while the worker was still busy
+        self.sent = 0
+        self.pending: set[int] = set()
+
+        close_at_exit(self)
+
+    def step(self, keys: Iterable[int]) -> None:
+        self.pending.update(keys)
+
+        # The last tick isn't published yet, a second one would be written into the slot being drawn
+        if int(self.state.sequence[0]) < self.sent:
+            return
+
+        self.connection.send(tuple(self.pending))
+        self.pending.clear()
+        self.sent += 1
+
+    def latest(self) -> Optional[dict[str, np.ndarray]]:
+        return self.state.latest()
+
+    def close(self) -> None:
+        if self.is_closed:
+            return
+
+        self.is_closed = True
+
+        # The worker may already be gone if the simulation crashed
+        try:
+            self.connection.send(None)
+        except BrokenPipeError:
+            pass
+
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+        self.connection.close()
+        self.state.close()
+
+
+def worker_main(connection: Connection) -> None:
+    from common import headless
+    headless.install()
+
+    # Constructors that enter pyxel.run return right away
+    headless.set_frame_limit(0)
+    headless.set_draw_enabled(False)
+
+    # Unpickling may import the game's config module, so only now
+    module, build, args, layout, name = connection.recv()
+
+    simulation = getattr(importlib.import_module(module), build)(*args)
+    state = SharedState(layout, name)
+
+    while True:
+        # The window process went away without closing us
+        try:
+            keys = connection.recv()
+        except EOFError:
+            break
+
+        if keys is None:
+            break
+
+        headless.set_input_source(lambda frame: keys)
+        headless.step(simulation.update)
+
+        simulation.save_state(state.back())
+        state.publish()
+
+    simulation.close()
+    state.close()
+
+
+if __name__ == "__main__":
+    address = sys.argv[1]
+    worker_main(Client(address, authkey=sys.stdin.buffer.read()))
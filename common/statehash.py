@@ -0,0 +1,113 @@
+# Per-tick state hashes for desync detection. Every tick a game folds its
+# physics state into a rolling CRC32, so each hash covers the whole run up to
+# that tick and two runs can be compared four bytes per tick instead of by
+# diffing full state. A recorded run's hashes are written to a file, a replay
+# or a peer checks its own against them and reports the first tick that differs.
+#
+# Compare two recorded runs from the repo root with:
+#     python -m common.statehash run-a.hashes run-b.hashes
+import argparse
+import struct
+import zlib
+
+from array import array
+from typing import Iterable, Optional
+
+from common.closing import close_at_exit
+from common.files import atomic_write
+
+
+def load_hashes(path: str) -> array:
+    hashes = array("I")
+
+    with open(path, "rb") as file:
+        hashes.frombytes(file.read())
+
+    return hashes
+
+
+def save_hashes(path: str, hashes: array) -> None:
+    with atomic_write(path) as file:
+        hashes.tofile(file)
+
+
+def first_divergence(hashes: array, expected: array) -> Optional[int]:
+    # First tick where the runs differ, a shorter run only differs where it stops
+    for tick, (value, expected_value) in enumerate(zip(hashes, expected)):
+        if value != expected_value:
+            return tick
+
+    return None
+
+
+class StateHash:
+    def __init__(self, record_path: Optional[str] = None, check_path: Optional[str] = None) -> None:
+        self.record_path = record_path
+        self.value = 0
+        self.hashes = array("I")
+
+        # Hashes of the run this one should match
+        self.expected = load_hashes(check_path) if check_path is not None else None
+        self.desync_tick: Optional[int] = None
+
+        self.is_closed = False
+        close_at_exit(self)
+
+    def update(self, values: Iterable[float]) -> int:
+        # Doubles pack bit for bit, fixed-point values have a single representation
+        values = tuple(values)
+        self.value = zlib.crc32(struct.pack(f"<{len(values)}d", *values), self.value)
+
+        tick = len(self.hashes)
+        self.hashes.append(self.value)
+
+        expected = self.expected
+        if (self.desync_tick is None and expected is not None and
+                tick < len(expected) and expected[tick] != self.value):
+            self.desync_tick = tick
+
+        return self.value
+
+    def close(self) -> Optional[str]:
+        # Returns how the check went, if there was one, the first time only
+        if self.is_closed:
+            return None
+
+        self.is_closed = True
+
+        if self.record_path is not None:
+            save_hashes(self.record_path, self.hashes)
+
+        if self.expected is None:
+            return None
+
+        return describe(self.desync_tick, min(len(self.hashes), len(self.expected)))
+
+
+def describe(desync_tick: Optional[int], ticks: int) -> str:
+    if desync_tick is not None:
+        return f"State desync at tick {desync_tick}"
+
+    return f"State hashes match for {ticks} ticks"
+
+
+def open_state_hash(record_path: Optional[str], check_path: Optional[str]) -> Optional[StateHash]:
+    # None when neither recording nor checking, so games skip hashing entirely
+    if record_path is None and check_path is None:
+        return None
+
+    return StateHash(record_path, check_path)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Find the first tick where two recorded runs differ")
+    parser.add_argument("hashes", help="hashes recorded with --record-hashes")
+    parser.add_argument("expected", help="hashes of the run it should match")
+    args = parser.parse_args(argv)
+
+    hashes, expected = load_hashes(args.hashes), load_hashes(args.expected)
+    print(describe(first_divergence(hashes, expected), min(len(hashes), len(expected))))
+
+
+if __name__ == "__main__":
+    main()
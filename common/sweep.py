@@ -0,0 +1,100 @@
+# Parameter sweeps over frozen config dataclasses. Each game provides an
+# evaluate(config, frames, seed) -> dict function that plays headless, and the
+# grid of configs is spread across a process pool.
+import argparse
+import csv
+import itertools
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, replace
+from functools import partial
+from typing import Any, Callable, Optional, get_type_hints
+
+
+def grid(base: Any, axes: dict[str, list]) -> list:
+    # Every combination of the axes, applied on top of the base config
+    names = list(axes)
+    configs = []
+
+    for values in itertools.product(*axes.values()):
+        config = replace(base, **dict(zip(names, values)))
+
+        # Quantized the same way the game's --fixed-point does it, swept values included
+        if getattr(config, "fixed_point", False):
+            config = config.with_fixed_point()
+
+        configs.append(config)
+
+    return configs
+
+
+def parse_bool(value: str) -> bool:
+    # bool("False") is True
+    lowered = value.strip().lower()
+
+    if lowered in ("true", "1"):
+        return True
+
+    if lowered in ("false", "0"):
+        return False
+
+    raise ValueError(f"Expected true, false, 1 or 0, got [{value}]")
+
+
+PARSERS: dict[type, Callable[[str], Any]] = {int: int, float: float, bool: parse_bool}
+
+
+def parse_axes(base: Any, specs: list[str]) -> dict[str, list]:
+    # "gravity=0.2,0.3" -> {"gravity": [0.2, 0.3]}, cast to the field's annotated type
+    # so a float field with an int default still takes 5.5
+    hints = get_type_hints(type(base))
+    types = {field.name: hints[field.name] for field in fields(base)}
+    axes = {}
+
+    for spec in specs:
+        name, _, values = spec.partition("=")
+
+        if name not in types:
+            raise ValueError(
+                f"Unknown config field [{name}], expected one of {list(types)}")
+
+        if types[name] not in PARSERS:
+            raise ValueError(
+                f"Config field [{name}] is a {types[name].__name__}, only int, float and bool fields can be swept")
+
+        axes[name] = [PARSERS[types[name]](value) for value in values.split(",")]
+
+    return axes
+
+
+def run_sweep(evaluate: Callable[[Any], dict], configs: list, processes: Optional[int] = None) -> list[dict]:
+    # Larger chunks keep workers busy when single evaluations are short
+    chunksize = max(1, len(configs) // ((processes or 4) * 8))
+
+    with ProcessPoolExecutor(processes) as pool:
+        return list(pool.map(evaluate, configs, chunksize=chunksize))
+
+
+def main(evaluate: Callable[..., dict], base: Any, argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Evaluate a grid of configs headless across a process pool")
+    parser.add_argument("axes", nargs="*",
+                        help="config field and values to sweep, e.g. gravity=0.2,0.3")
+    parser.add_argument("--frames", type=int, default=60 * 60,
+                        help="frames simulated per config")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    axes = parse_axes(base, args.axes)
+    configs = grid(base, axes)
+    results = run_sweep(partial(evaluate, frames=args.frames, seed=args.seed),
+                        configs, args.processes)
+
+    # One csv row per config, swept fields first then the metrics
+    writer = csv.writer(sys.stdout)
+    writer.writerow(list(axes) + list(results[0]) if results else list(axes))
+
+    for config, result in zip(configs, results):
+        writer.writerow([getattr(config, name) for name in axes] + list(result.values()))
@@ -0,0 +1,109 @@
+# Cooperative async tasks inside pyxel's frame loop. pyxel.run owns the main
+# loop, so instead of running an asyncio loop in a thread we step a private one
+# from update(): after the game's own update, ready callbacks run in a few
+# short passes until the time left in the frame budget (going by last frame's
+# draw) is used up, then control goes back to pyxel. Sockets and timers are
+# polled without blocking, so coroutines can do I/O as long as they await
+# often. Frames with no spawned tasks skip the loop entirely.
+#
+#     async def sync_scores(): ...
+#     self.tasks.spawn(sync_scores())
+import asyncio
+import time
+
+from typing import Any, Callable, Coroutine
+
+from common.closing import close_at_exit
+
+
+class FrameExecutor:
+    def __init__(self, fps: int, headroom: float = 0.002, min_slice: float = 0.0005, passes: int = 8) -> None:
+        self.budget = 1 / fps
+        self.headroom = headroom  # Left free for pyxel itself and timing noise
+        self.min_slice = min_slice  # Tasks still move on in frames that run long
+        self.passes = passes  # Most loop passes per frame, each runs whatever is ready
+
+        self.loop = asyncio.new_event_loop()
+        self.frame = 0
+        self.frame_waiters: list[asyncio.Future] = []
+
+        # Spawned tasks that haven't finished
+        self.tasks: set[asyncio.Task] = set()
+
+        self.update_time = 0.0
+        self.draw_time = 0.0
+        self.task_time = 0.0
+
+        self.is_closed = False
+        close_at_exit(self)
+
+    def wrap(self, update: Callable[[], None], draw: Callable[[], None]) -> tuple[Callable[[], None], Callable[[], None]]:
+        def update_with_tasks() -> None:
+            start = time.perf_counter()
+            update()
+            self.update_time = time.perf_counter() - start
+
+            remaining = self.budget - self.update_time - self.draw_time - self.headroom
+            self.run_for(max(self.min_slice, remaining))
+
+        def timed_draw() -> None:
+            start = time.perf_counter()
+            draw()
+            self.draw_time = time.perf_counter() - start
+
+        return update_with_tasks, timed_draw
+
+    def spawn(self, coroutine: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        task = self.loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def next_frame(self) -> asyncio.Future:
+        # Await it to give up the rest of this frame, for long running work
+        waiter = self.loop.create_future()
+        self.frame_waiters.append(waiter)
+        return waiter
+
+    def run_for(self, seconds: float) -> None:
+        self.frame += 1
+
+        # Nothing to run, don't pay for a loop pass
+        if self.is_closed or not self.tasks:
+            self.task_time = 0.0
+            return
+
+        start = time.perf_counter()
+        deadline = start + seconds
+
+        # Whoever waited for this frame goes first
+        waiters, self.frame_waiters = self.frame_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(self.frame)
+
+        # One pass polls I/O without blocking, moves due timers and runs what is ready
+        for _ in range(self.passes):
+            self.loop.call_soon(self.loop.stop)
+            self.loop.run_forever()
+
+            if not self.tasks or time.perf_counter() >= deadline:
+                break
+
+        self.task_time = time.perf_counter() - start
+
+    def close(self) -> None:
+        if self.is_closed:
+            return
+
+        self.is_closed = True
+
+        # Give cancelled tasks a chance to clean up, then drop the loop
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+        self.loop.close()
@@ -0,0 +1,170 @@
+# Gameplay telemetry. Games push small event tuples onto an in-memory queue,
+# which never blocks the frame loop, and a background thread writes them to a
+# WAL-mode SQLite file in batched transactions.
+#
+# Aggregate a database from the repo root with:
+#     python -m common.telemetry Arkanoid/telemetry.db
+import argparse
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from typing import Optional
+
+from common.closing import close_at_exit
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    game TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended REAL,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    session TEXT NOT NULL,
+    frame INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS events_kind ON events (kind, key);
+"""
+
+# Marker telling the writer thread to finish
+_STOP = object()
+
+
+def connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class Telemetry:
+    def __init__(self, path: str, game: str, meta: Optional[dict] = None,
+                 batch_size: int = 512, flush_interval: float = 1.0) -> None:
+        self.path = path
+        self.game = game
+        self.session = uuid.uuid4().hex
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # Unbounded so put() never waits on the writer
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.is_closed = False
+
+        self.queue.put(("session", self.session, game, time.time(),
+                        json.dumps(meta) if meta else None))
+
+        self.thread = threading.Thread(
+            target=self.write_loop, name="telemetry", daemon=True)
+        self.thread.start()
+
+        close_at_exit(self)
+
+    def event(self, frame: int, kind: str, key: Optional[object] = None, value: Optional[float] = None) -> None:
+        self.queue.put(("event", self.session, frame, kind,
+                        None if key is None else str(key), value))
+
+    def close(self) -> None:
+        if self.is_closed:
+            return
+
+        self.is_closed = True
+        self.queue.put(("end", self.session, time.time()))
+        self.queue.put(_STOP)
+        self.thread.join()
+
+    def write_loop(self) -> None:
+        connection = connect(self.path)
+        is_running = True
+
+        while is_running:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+
+            # Collect until the batch is full or the flush interval passes
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get(
+                        timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+                if item is _STOP:
+                    is_running = False
+                    break
+
+                batch.append(item)
+
+            if batch:
+                self.write_batch(connection, batch)
+
+        connection.close()
+
+    def write_batch(self, connection: sqlite3.Connection, batch: list[tuple]) -> None:
+        events = [item[1:] for item in batch if item[0] == "event"]
+
+        # One transaction per batch
+        with connection:
+            for item in batch:
+                if item[0] == "session":
+                    connection.execute(
+                        "INSERT INTO sessions (id, game, started, meta) VALUES (?, ?, ?, ?)", item[1:])
+                elif item[0] == "end":
+                    connection.execute(
+                        "UPDATE sessions SET ended = ? WHERE id = ?", (item[2], item[1]))
+
+            connection.executemany(
+                "INSERT INTO events (session, frame, kind, key, value) VALUES (?, ?, ?, ?, ?)", events)
+
+
+def report(path: str, game: Optional[str] = None, kind: Optional[str] = None) -> list[tuple]:
+    connection = connect(path)
+    query = """
+        SELECT s.game, e.kind, e.key, COUNT(*), AVG(e.value), MIN(e.value), MAX(e.value)
+        FROM events e JOIN sessions s ON s.id = e.session
+        WHERE (? IS NULL OR s.game = ?) AND (? IS NULL OR e.kind = ?)
+        GROUP BY s.game, e.kind, e.key
+        ORDER BY s.game, e.kind, CAST(e.key AS INTEGER), e.key
+    """
+    rows = connection.execute(query, (game, game, kind, kind)).fetchall()
+    connection.close()
+
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aggregate gameplay telemetry")
+    parser.add_argument("path", help="telemetry database")
+    parser.add_argument("--game", default=None)
+    parser.add_argument("--kind", default=None,
+                        help="only this event kind, e.g. paddle_section")
+    args = parser.parse_args()
+
+    connection = connect(args.path)
+    sessions = connection.execute(
+        "SELECT game, COUNT(*) FROM sessions GROUP BY game").fetchall()
+    connection.close()
+
+    for game, count in sessions:
+        print(f"{game}: {count} sessions")
+
+    print(f"{'game':<10} {'kind':<16} {'key':<6} {'count':>8} {'avg':>9} {'min':>9} {'max':>9}")
+
+    def fmt(value: Optional[float]) -> str:
+        return f"{value:>9.2f}" if value is not None else f"{'-':>9}"
+
+    for game, kind, key, count, avg, low, high in report(args.path, args.game, args.kind):
+        print(f"{game:<10} {kind:<16} {key or '-':<6} {count:>8} {fmt(avg)} {fmt(low)} {fmt(high)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Everything runs against the headless pyxel, installed before any game module
+# imports the real one. The games import their own modules by plain name from
+# their folder (config, constants, classes), so a test loads a game's module
+# through load_game_module(), which puts that folder first and forgets modules
+# another game loaded under the same names.
+import importlib
+import os
+import sys
+
+from types import ModuleType
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAME_FOLDERS = [os.path.join(ROOT, folder) for folder in ("Arkanoid", "Pong", "Egg Rise")]
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from common import headless
+
+headless.install()
+
+
+def load_game_module(folder: str, name: str) -> ModuleType:
+    path = os.path.join(ROOT, folder)
+
+    if sys.path[0] != path:
+        sys.path[:] = [entry for entry in sys.path if entry not in GAME_FOLDERS]
+        sys.path.insert(0, path)
+
+        # Anything loaded from another game's folder goes
+        for module_name, module in list(sys.modules.items()):
+            module_file = getattr(module, "__file__", None) or ""
+            if os.path.dirname(module_file) in GAME_FOLDERS and os.path.dirname(module_file) != path:
+                del sys.modules[module_name]
+
+    return importlib.import_module(name)
@@ -0,0 +1,95 @@
+import io
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from common.capture import ApngWriter, GifWriter, RawWriter
+
+WIDTH, HEIGHT, FPS = 7, 5, 30
+PALETTE = [0x000000, 0xFF0000, 0x00FF00, 0x0000FF] + [0x101010 * index for index in range(4, 16)]
+RGB = np.array([(color >> 16 & 0xFF, color >> 8 & 0xFF, color & 0xFF) for color in PALETTE], np.uint8)
+
+
+def frames(count: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(3)
+    return [rng.integers(0, 16, (HEIGHT, WIDTH), dtype=np.uint8) for _ in range(count)]
+
+
+def encode(writer_class: type, ticks: list[int], pixels: list[np.ndarray]) -> bytes:
+    file = io.BytesIO()
+    writer = writer_class(file, WIDTH, HEIGHT, PALETTE, FPS)
+    for tick, frame in zip(ticks, pixels):
+        writer.write(tick, frame)
+    writer.close()
+
+    return file.getvalue()
+
+
+def png_chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks, position = [], 8
+
+    while position < len(data):
+        length, = struct.unpack(">I", data[position:position + 4])
+        tag, body = data[position + 4:position + 8], data[position + 8:position + 8 + length]
+        crc, = struct.unpack(">I", data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(tag + body) & 0xFFFFFFFF
+        chunks.append((tag, body))
+        position += 12 + length
+
+    return chunks
+
+
+def test_apng_frames_and_delays() -> None:
+    pixels = frames(3)
+    chunks = png_chunks(encode(ApngWriter, [0, 1, 4], pixels))
+    tags = [tag for tag, _ in chunks]
+
+    assert tags == [b"IHDR", b"PLTE", b"acTL", b"fcTL", b"IDAT", b"fcTL", b"fdAT", b"fcTL", b"fdAT", b"IEND"]
+    assert struct.unpack(">II", chunks[2][1]) == (3, 0)
+
+    # Delays in ticks over fps, the last frame shows for one tick
+    delays = [struct.unpack(">HH", body[20:24]) for tag, body in chunks if tag == b"fcTL"]
+    assert delays == [(1, FPS), (3, FPS), (1, FPS)]
+
+    # Every frame decodes back to its palette indices
+    data = [body if tag == b"IDAT" else body[4:] for tag, body in chunks if tag in (b"IDAT", b"fdAT")]
+    for expected, compressed in zip(pixels, data):
+        rows = np.frombuffer(zlib.decompress(compressed), np.uint8).reshape(HEIGHT, WIDTH + 1)
+        assert np.all(rows[:, 0] == 0)
+        assert np.array_equal(rows[:, 1:], expected)
+
+
+def test_raw_holds_frames_over_skipped_ticks() -> None:
+    pixels = frames(2)
+    data = encode(RawWriter, [10, 13], pixels)
+    rgb = np.frombuffer(data, np.uint8).reshape(-1, HEIGHT, WIDTH, 3)
+
+    # Tick 10 shows until 13, like its delay in a GIF
+    assert len(rgb) == 4
+    assert all(np.array_equal(frame, RGB[pixels[0]]) for frame in rgb[:3])
+    assert np.array_equal(rgb[3], RGB[pixels[1]])
+
+
+def test_gif_header_and_trailer() -> None:
+    data = encode(GifWriter, [0, 2], frames(2))
+
+    assert data[:6] == b"GIF89a"
+    assert struct.unpack("<HH", data[6:10]) == (WIDTH, HEIGHT)
+    assert data[-1:] == b"\x3B"
+
+
+def test_gif_decodes_to_the_frames() -> None:
+    Image = pytest.importorskip("PIL.Image")
+    pixels = frames(3)
+    image = Image.open(io.BytesIO(encode(GifWriter, [0, 3, 4], pixels)))
+
+    assert image.n_frames == 3
+
+    # 3 ticks at 30 fps is 10 hundredths, then one tick each with the rounding carried over
+    for index, expected in enumerate(pixels):
+        image.seek(index)
+        assert np.array_equal(np.array(image.convert("RGB")), RGB[expected])
+        assert image.info["duration"] == [100, 30, 40][index]
@@ -0,0 +1,59 @@
+import pytest
+
+from common.collision import sweep_circle_rect
+
+# Paddle at x 0..100, y 100..104, ball radius 3
+RECT = (0, 100, 100, 4)
+RADIUS = 3
+
+
+def sweep(start_x: float, start_y: float, end_x: float, end_y: float):
+    return sweep_circle_rect(start_x, start_y, end_x, end_y, RADIUS, *RECT)
+
+
+def test_falling_onto_the_top() -> None:
+    hit = sweep(50, 90, 50, 99)
+
+    assert hit is not None
+    assert hit.t == pytest.approx(7 / 9)
+    assert (hit.x, hit.y) == (50, pytest.approx(97))
+    assert (hit.normal_x, hit.normal_y) == (0, -1)
+
+
+def test_fast_ball_does_not_tunnel() -> None:
+    hit = sweep(50, 50, 50, 150)
+
+    assert hit is not None and hit.normal_y == -1
+    assert hit.y == pytest.approx(97)
+
+
+def test_starting_exactly_on_the_face_hits() -> None:
+    hit = sweep(50, 97, 50, 105)
+
+    assert hit is not None
+    assert hit.t == 0
+    assert (hit.normal_x, hit.normal_y) == (0, -1)
+
+
+def test_already_overlapping_is_not_a_hit() -> None:
+    assert sweep(50, 101, 50, 103) is None
+
+
+def test_passing_beside_misses() -> None:
+    assert sweep(110, 90, 110, 110) is None
+
+
+def test_side_hit_has_a_sideways_normal() -> None:
+    hit = sweep(-10, 102, 10, 102)
+
+    assert hit is not None
+    assert (hit.normal_x, hit.normal_y) == (-1, 0)
+
+
+def test_rounded_corner() -> None:
+    # Stops inside the grown rect's square corner but outside its rounded one
+    assert sweep(110, 97.5, 102.5, 97.5) is None
+
+    hit = sweep(101, 90, 101, 99)
+    assert hit is not None and hit.normal_y < 0
+    assert (hit.x - 100) ** 2 + (hit.y - 100) ** 2 == pytest.approx(RADIUS ** 2)
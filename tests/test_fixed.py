@@ -0,0 +1,61 @@
+import math
+
+import pytest
+
+from common import fixed, headless
+from common.services import Services
+from common.statehash import StateHash
+from conftest import load_game_module
+
+arkanoid = load_game_module("Arkanoid", "arkanoid")
+config = load_game_module("Arkanoid", "config").DEFAULT_CONFIG.with_fixed_point()
+
+
+def on_grid(value: float) -> bool:
+    return value * fixed.ONE == int(value * fixed.ONE)
+
+
+@pytest.mark.parametrize("angle", [0.0, 0.3, -1.1, math.pi / 3, 1.5])
+def test_sin_cos_is_on_the_grid_and_close(angle: float) -> None:
+    sin, cos = fixed.sin_cos(fixed.quantize(angle))
+
+    assert on_grid(sin) and on_grid(cos)
+    assert sin == pytest.approx(math.sin(angle), abs=2 / fixed.ONE)
+    assert cos == pytest.approx(math.cos(angle), abs=2 / fixed.ONE)
+
+
+def test_sqrt_is_exact_on_squares_and_floors_otherwise() -> None:
+    assert fixed.sqrt(fixed.quantize(2.25)) == 1.5
+
+    root = fixed.sqrt(17.0)
+    assert on_grid(root) and root <= math.sqrt(17.0) < root + 1 / fixed.ONE
+
+
+def play(frames: int, state_hash: StateHash) -> "arkanoid.Game":
+    headless.set_frame_limit(frames)
+    headless.set_draw_enabled(False)
+
+    # The autopilot keeps the rally going, so every tick after the first drop is bounces
+    try:
+        ball = arkanoid.Ball(config.width//2, config.height//2, 3, 7, config)
+        paddle = arkanoid.create_paddle(config, ball, autopilot=True)
+        return arkanoid.Game("Arkanoid", paddle, ball, config, Services(state_hash=state_hash))
+    finally:
+        headless.set_frame_limit(None)
+
+
+def test_fixed_point_runs_hash_the_same(tmp_path) -> None:
+    path = str(tmp_path / "run.hashes")
+    first = StateHash(record_path=path)
+    game = play(1500, first)
+    first.close()
+
+    # Every physics value stays on the grid
+    assert game.score > 0
+    assert all(on_grid(value) for value in game.state_values())
+
+    second = StateHash(check_path=path)
+    play(1500, second)
+
+    assert second.hashes == first.hashes
+    assert second.close() == "State hashes match for 1500 ticks"
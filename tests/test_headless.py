@@ -0,0 +1,81 @@
+import random
+
+from conftest import load_game_module
+from common import headless
+
+
+def test_primitives_write_palette_indices() -> None:
+    headless.init(16, 12)
+    headless.cls(1)
+    headless.rect(2, 3, 4, 2, 7)
+    headless.circ(12, 6, 1, 8)
+
+    assert headless.pget(0, 0) == 1
+    assert headless.pget(2, 3) == 7 and headless.pget(5, 4) == 7
+    assert headless.pget(6, 3) == 1 and headless.pget(2, 5) == 1
+
+    # A radius 1 circle is a plus sign
+    assert [headless.pget(x, 6) for x in (10, 11, 12, 13, 14)] == [1, 8, 8, 8, 1]
+    assert headless.pget(11, 5) == 1 and headless.pget(12, 5) == 8
+
+
+def test_drawing_is_clipped_to_the_screen() -> None:
+    headless.init(8, 8)
+    headless.cls(0)
+    headless.rect(-4, 6, 20, 10, 3)
+    headless.text(6, -2, "A", 9)
+
+    assert int((headless.screen.data == 3).sum()) == 8 * 2
+
+
+def test_text_uses_the_pyxel_font() -> None:
+    headless.init(8, 8)
+    headless.cls(0)
+    headless.text(0, 0, "I", 7)
+
+    # 'I' is a full width bar on top and bottom, one column in between
+    rows = ["".join("#" if headless.pget(x, y) else "." for x in range(4)) for y in range(5)]
+    assert rows == ["###.", ".#..", ".#..", ".#..", "###."]
+
+
+def test_frame_hash_changes_with_content() -> None:
+    headless.init(8, 8)
+    headless.cls(0)
+    empty = headless.frame_hash()
+    headless.rect(0, 0, 1, 1, 5)
+
+    assert headless.frame_hash() != empty
+
+
+# Golden frame: a seeded Pong rally drawn after a fixed number of frames.
+# Update this only for an intended change to Pong's simulation or drawing
+PONG_GOLDEN_FRAMES = 240
+PONG_GOLDEN_HASH = "958bf454649c82d71da7ca10a9dd9c9c39416c85"
+
+
+def run_pong_frames() -> str:
+    main = load_game_module("Pong", "main")
+    classes = load_game_module("Pong", "classes")
+    config = load_game_module("Pong", "config").DEFAULT_CONFIG
+
+    random.seed(7)
+    headless.set_frame_limit(PONG_GOLDEN_FRAMES)
+    headless.set_draw_enabled(True)
+    headless.set_input_source(lambda frame: [headless.KEY_W] if frame % 40 < 20 else [headless.KEY_DOWN])
+
+    try:
+        p1, p2 = main.create_paddles(config)
+        main.Game("Pong", p1, p2, classes.Ball(config.width//2, config.height//2, 3, 7, config), config)
+    finally:
+        headless.set_input_source(None)
+        headless.set_frame_limit(None)
+
+    return headless.frame_hash()
+
+
+def test_pong_golden_frame() -> None:
+    assert run_pong_frames() == PONG_GOLDEN_HASH
+
+
+def test_pong_frames_are_reproducible() -> None:
+    assert run_pong_frames() == run_pong_frames()
@@ -0,0 +1,134 @@
+import bisect
+import os
+import random
+
+from common.leaderboard import LOG_HEADER, RECORD, Leaderboard, RankIndex
+
+
+def open_board(tmp_path, **kwargs) -> Leaderboard:
+    return Leaderboard(str(tmp_path / "board"), **kwargs)
+
+
+def test_rank_and_top(tmp_path) -> None:
+    board = open_board(tmp_path, top=3)
+
+    assert board.submit(50) == 1
+    assert board.submit(70) == 1
+    assert board.submit(50) == 2  # Ties share the better rank
+    assert board.submit(10) == 4
+
+    assert [entry.score for entry in board.top()] == [70, 50, 50]
+    board.close()
+
+
+def test_rank_index_matches_a_sorted_list() -> None:
+    rng = random.Random(3)
+    index, scores = RankIndex(), []
+
+    def check() -> None:
+        for score in range(-1, 302, 7):
+            assert index.rank(score) == len(scores) - bisect.bisect_right(scores, score) + 1
+
+    for _ in range(500):
+        score = rng.randrange(0, 300)
+        index.add(score)
+        bisect.insort(scores, score)
+        check()
+
+    extra = [rng.randrange(100, 400) for _ in range(200)]
+    index.extend(extra)
+    scores = sorted(scores + extra)
+    check()
+
+    assert index.total == len(scores)
+    assert list(index.keys) == sorted(set(scores))
+
+
+def test_scores_survive_a_restart(tmp_path) -> None:
+    board = open_board(tmp_path, compact_every=4)
+    for score in range(10):
+        board.submit(score)
+    board.close()
+
+    board = open_board(tmp_path)
+    assert len(board) == 10
+    assert board.rank(9) == 1 and board.rank(0) == 10
+    board.close()
+
+
+def test_compaction_waits_for_close(tmp_path) -> None:
+    board = open_board(tmp_path, compact_every=3)
+    for score in range(5):
+        board.submit(score)
+
+    # Submitting only appends
+    assert not os.path.exists(str(tmp_path / "board.snapshot"))
+    assert os.path.getsize(str(tmp_path / "board.log")) == LOG_HEADER.size + RECORD.size * 5
+    board.close()
+
+    assert os.path.exists(str(tmp_path / "board.snapshot"))
+    assert os.path.getsize(str(tmp_path / "board.log")) == LOG_HEADER.size
+    assert len(open_board(tmp_path)) == 5
+
+
+def test_torn_tail_is_cut_off(tmp_path) -> None:
+    board = open_board(tmp_path)
+    for score in (1, 2, 3):
+        board.submit(score)
+    board.close()
+
+    # A crash in the middle of the last record
+    log_path = str(tmp_path / "board.log")
+    with open(log_path, "r+b") as file:
+        file.truncate(LOG_HEADER.size + RECORD.size * 2 + 5)
+
+    board = open_board(tmp_path)
+    assert len(board) == 2
+    board.submit(4)
+    board.close()
+
+    assert os.path.getsize(log_path) == LOG_HEADER.size + RECORD.size * 3
+    assert len(open_board(tmp_path)) == 3
+
+
+def test_interrupted_compaction_does_not_double_count(tmp_path) -> None:
+    board = open_board(tmp_path)
+    for score in (5, 6, 7):
+        board.submit(score)
+
+    # Crash after the snapshot landed but before the log was replaced
+    with open(str(tmp_path / "board.log"), "rb") as file:
+        old_log = file.read()
+    board.compact()
+    board.close()
+
+    with open(str(tmp_path / "board.log"), "wb") as file:
+        file.write(old_log)
+
+    board = open_board(tmp_path)
+    assert len(board) == 3
+    board.close()
+
+
+def test_empty_log_gets_a_header(tmp_path) -> None:
+    open(str(tmp_path / "board.log"), "wb").close()
+
+    board = open_board(tmp_path)
+    board.submit(3)
+    board.close()
+
+    assert len(open_board(tmp_path)) == 1
+
+
+def test_unreadable_files_are_set_aside(tmp_path) -> None:
+    with open(str(tmp_path / "board.log"), "wb") as file:
+        file.write(b"not a leaderboard at all")
+    with open(str(tmp_path / "board.snapshot"), "wb") as file:
+        file.write(b"xx")
+
+    board = open_board(tmp_path)
+    assert len(board) == 0
+    board.close()
+
+    assert os.path.exists(str(tmp_path / "board.log.bad"))
+    assert os.path.exists(str(tmp_path / "board.snapshot.bad"))
@@ -0,0 +1,38 @@
+import numpy as np
+
+from common import headless
+from conftest import load_game_module
+
+particles = load_game_module("Arkanoid", "particles")
+
+
+def make_pool(capacity: int = 4) -> "particles.ParticlePool":
+    headless.init(16, 16)
+    return particles.ParticlePool(capacity, 16, 16, gravity=0.5)
+
+
+def test_dead_slots_stay_put() -> None:
+    pool = make_pool()
+    pool.emit(8, 8, 1, speed=1.0, life=2, color=7)
+
+    for _ in range(100):
+        pool.update()
+
+    # The one live particle only moved while alive, the unused slots never did
+    assert pool.count() == 0
+    assert np.all(pool.vy[1:] == 0) and np.all(pool.y[1:] == 0)
+    assert abs(pool.vy[0]) <= 1.0 + 2 * 0.5
+
+
+def test_draw_floors_positions() -> None:
+    pool = make_pool(2)
+    pool.emit(0, 0, 2, speed=1.0, life=5, color=7)
+    pool.x[:] = (-0.5, 3.7)
+    pool.y[:] = (2.0, 2.9)
+
+    headless.cls(0)
+    pool.draw()
+
+    # Just left of the screen isn't column 0, 3.7 is pixel 3
+    assert headless.pget(0, 2) == 0
+    assert headless.pget(3, 2) == 7
@@ -0,0 +1,103 @@
+import pytest
+
+from conftest import load_game_module
+
+classes = load_game_module("Egg Rise", "classes")
+eggrise = load_game_module("Egg Rise", "eggrise")
+config = load_game_module("Egg Rise", "config").DEFAULT_CONFIG
+constants = load_game_module("Egg Rise", "constants")
+
+
+def stepped(x: float, speed: float, direction: int, travel: float, ticks: int) -> list[tuple[float, int]]:
+    # Moving and reflecting off the walls one tick at a time
+    positions = [(x, direction)]
+    for _ in range(ticks):
+        x += speed * direction
+        if x >= travel:
+            x, direction = 2 * travel - x, -1
+        elif x <= 0:
+            x, direction = -x, 1
+        positions.append((x, direction))
+
+    return positions
+
+
+@pytest.mark.parametrize("x, speed, direction", [
+    (0, 1.0, 1),
+    (25, 0.75, 1),
+    (25, 0.75, -1),
+    (60, 2.5, -1),
+])
+def test_x_at_is_the_stepped_triangle_wave(x: float, speed: float, direction: int) -> None:
+    clock = classes.Clock()
+    clock.tick = 17  # Platforms made mid-game start from the clock's tick
+    platform = classes.Platform(0, x, 100, config.platform_width, 5, 7,
+                                classes.Vector2D(speed, 0), direction, config, clock)
+
+    for tick, (expected_x, expected_direction) in enumerate(stepped(x, speed, direction, platform.travel, 600)):
+        assert platform.x_at(17 + tick) == pytest.approx(expected_x)
+
+        # Exactly on a wall the direction is already the next one
+        if 0 < expected_x < platform.travel:
+            assert platform.direction_at(17 + tick) == expected_direction
+
+
+def test_x_follows_the_clock() -> None:
+    clock = classes.Clock()
+    platform = classes.Platform(0, 10, 100, config.platform_width, 5, 7,
+                                classes.Vector2D(2, 0), 1, config, clock)
+
+    clock.tick = 5
+    assert platform.x == 20 and platform.direction == 1
+
+
+def test_full_width_platform_stays_put() -> None:
+    platform = classes.Platform(0, 0, 100, config.width, 5, 7, classes.Vector2D(2, 0), 1, config)
+
+    assert platform.x_at(0) == platform.x_at(123) == 0
+
+
+def still_platform(index: int, x: float, y: float, clock: "classes.Clock") -> "classes.Platform":
+    return classes.Platform(index, x, y, 40, config.platform_height, 7, classes.Vector2D(0, 0), 1, config, clock)
+
+
+def test_index_query_is_world_space_and_highest_first() -> None:
+    clock = classes.Clock()
+    platforms = [still_platform(index, 0, y, clock) for index, y in enumerate([200, 150, 100, 50])]
+    index = classes.PlatformIndex()
+    index.rebuild(platforms, camera_y=0)
+
+    assert [platform.index for platform in index.query(90, 160)] == [2, 1]
+
+    # The camera scrolling moves platforms and camera_y together, world positions hold
+    for platform in platforms:
+        platform.y += 30
+
+    assert [platform.index for platform in index.query(90, 160)] == [2, 1]
+    assert index.query(201, 300) == []
+
+
+def test_falling_egg_lands_on_a_platform_other_than_its_own() -> None:
+    generator = classes.PlatformGenerator(5, False, config, seed=0)
+    egg = classes.Egg(0, 0, 4, 7, classes.Vector2D(0, 0))
+    model = eggrise.EggRiseModel("Egg Rise", constants.WIDTH, constants.HEIGHT, constants.FPS, egg, 3, 5,
+                                 generator, False, config)
+    model.start_game()
+
+    # Two platforms stacked under the egg, the egg stood on neither
+    clock = generator.clock
+    model.platforms = [still_platform(0, 100, 220, clock), still_platform(3, 20, 160, clock),
+                       still_platform(4, 20, 120, clock)]
+    model.platform_index.rebuild(model.platforms, model.camera_y)
+    model.current_platform = model.platforms[0]
+
+    # Falling past platform 4's top this tick, platform 3 is further down
+    egg.x, egg.y = 40, 120 - egg.radius - 1
+    egg.velocity.x, egg.velocity.y = 0, 3
+    egg.is_grounded = False
+    model.update()
+
+    assert model.current_platform.index == 4
+    # Standing on it, after the camera started following
+    assert egg.is_grounded and egg.y == model.current_platform.y - egg.radius
+    assert model.score == 4
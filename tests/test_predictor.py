@@ -0,0 +1,48 @@
+import pytest
+
+from conftest import load_game_module
+
+arkanoid = load_game_module("Arkanoid", "arkanoid")
+predictor = load_game_module("Arkanoid", "predictor")
+config = load_game_module("Arkanoid", "config").DEFAULT_CONFIG
+
+PADDLE_Y = config.height - 20
+
+
+def step_until_landing(ball, target: float) -> tuple[float, float]:
+    # When, in ticks, the real ball crosses target and where its center is then
+    for ticks in range(1, 10_000):
+        start_x, start_y = ball.x, ball.y
+        ball.update()
+        if ball.y >= target:
+            t = (target - start_y) / (ball.y - start_y)
+            return ticks - 1 + t, start_x + (ball.x - start_x) * t
+
+    raise AssertionError("ball never came down")
+
+
+@pytest.mark.parametrize("x, y, velocity_x, velocity_y", [
+    (config.width / 2, config.height / 2, 0, 0),  # Restart drop
+    (40, 100, 1.5, -3),  # Up and across
+    (10, 150, -2.25, 0.5),  # Straight into the left wall
+    (config.width - 8, 60, 2.75, -2),  # Off the right wall
+    (30, 30, 3.5, -6),  # Off the top border
+    (config.width / 3, 120, -7.5, -4),  # Several wall crossings
+])
+def test_matches_stepping_the_ball(x: float, y: float, velocity_x: float, velocity_y: float) -> None:
+    ball = arkanoid.Ball(x, y, 3, 7, config)
+    ball.velocity.x, ball.velocity.y = velocity_x, velocity_y
+    target = PADDLE_Y - ball.radius
+
+    landing = predictor.predict_landing(x, y, velocity_x, velocity_y, ball.radius, PADDLE_Y, config)
+    moment, landing_x = step_until_landing(ball, target)
+
+    # Compared as a moment, a landing right on a tick boundary can round to either tick
+    assert landing is not None
+    assert landing.ticks - 1 + landing.t == pytest.approx(moment)
+    assert landing.x == pytest.approx(landing_x)
+    assert landing.velocity_x == pytest.approx(ball.velocity.x)
+
+
+def test_below_the_paddle_has_no_landing() -> None:
+    assert predictor.predict_landing(50, PADDLE_Y, 1, 2, 3, PADDLE_Y, config) is None
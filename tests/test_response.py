@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from common.response import ResponseCurve, compile_curve
+from conftest import load_game_module
+
+arkanoid = load_game_module("Arkanoid", "arkanoid")
+config = load_game_module("Arkanoid", "config").DEFAULT_CONFIG
+
+
+def test_table_is_symmetric() -> None:
+    table = compile_curve(ResponseCurve(60, exponent=1.5, dead_zone=0.1, speed_up=0.2))
+
+    for index in range(table.last_index + 1):
+        mirror = table.last_index - index
+        assert table.along[index] == pytest.approx(-table.along[mirror])
+        assert table.away[index] == pytest.approx(table.away[mirror])
+
+
+def test_dead_zone_goes_straight_back() -> None:
+    table = compile_curve(ResponseCurve(dead_zone=0.5))
+
+    assert table.angles[table.get_index(0.3)] == 0
+    assert table.angles[table.get_index(-0.49)] == 0
+    assert table.angles[table.get_index(0.75)] > 0
+
+
+def test_compiled_once_per_curve() -> None:
+    assert compile_curve(ResponseCurve(45)) is compile_curve(ResponseCurve(45))
+
+
+@pytest.mark.parametrize("section, velocity_x", [
+    (0, -2 * math.sin(math.radians(60))),  # 1.73 px/frame to the left
+    (1, -1.0),
+    (2, 0.0),
+    (3, 1.0),
+    (4, 2 * math.sin(math.radians(60))),
+])
+def test_section_centres_on_the_default_paddle(section: int, velocity_x: float) -> None:
+    paddle = arkanoid.create_paddle(config, ball=None)
+    section_width = paddle.width / config.paddle_sections
+    ball_x = paddle.x + section_width * (section + 0.5)
+
+    assert paddle.get_section(ball_x) == section
+    assert paddle.get_bounce_velocity(ball_x) == pytest.approx(velocity_x, abs=0.02)
@@ -0,0 +1,54 @@
+from dataclasses import dataclass, replace
+
+import pytest
+
+from common.sweep import grid, parse_axes
+
+
+@dataclass(frozen=True)
+class Config:
+    speed: float = 3  # Float field with an int default
+    sections: int = 5
+    name: str = "a"
+    fixed_point: bool = False
+
+    def with_fixed_point(self) -> "Config":
+        return replace(self, fixed_point=True, speed=round(self.speed))
+
+
+def test_axes_cast_to_the_annotated_type() -> None:
+    axes = parse_axes(Config(), ["speed=2.5,3", "sections=3,7"])
+
+    assert axes == {"speed": [2.5, 3.0], "sections": [3, 7]}
+    assert all(isinstance(value, float) for value in axes["speed"])
+
+
+def test_unknown_field() -> None:
+    with pytest.raises(ValueError, match="Unknown config field"):
+        parse_axes(Config(), ["gravity=1"])
+
+
+def test_bool_axes_parse_false() -> None:
+    assert parse_axes(Config(), ["fixed_point=False,true,0,1"]) == {"fixed_point": [False, True, False, True]}
+
+    with pytest.raises(ValueError, match="Expected true, false"):
+        parse_axes(Config(), ["fixed_point=yes"])
+
+
+def test_only_number_and_bool_fields_sweep() -> None:
+    with pytest.raises(ValueError, match=r"\[name\] is a str"):
+        parse_axes(Config(), ["name=b"])
+
+
+def test_fixed_point_configs_match_the_game() -> None:
+    configs = grid(Config(), {"speed": [2.6], "fixed_point": [False, True]})
+
+    assert configs == [Config(speed=2.6), Config(speed=3, fixed_point=True)]
+
+
+def test_grid_is_every_combination_over_the_base() -> None:
+    configs = grid(Config(name="base"), {"speed": [1.0, 2.0], "sections": [3, 5, 7]})
+
+    assert len(configs) == 6
+    assert configs[0] == Config(1.0, 3, "base")
+    assert configs[-1] == Config(2.0, 7, "base")
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from common.tasks import FrameExecutor
+
+
+def test_spawned_work_runs_across_frames() -> None:
+    executor = FrameExecutor(60)
+    seen = []
+
+    async def work() -> str:
+        seen.append("start")
+        frame = await executor.next_frame()
+        seen.append(frame)
+        return "done"
+
+    task = executor.spawn(work())
+    executor.run_for(0.01)
+    assert seen == ["start"]
+
+    executor.run_for(0.01)
+    assert seen == ["start", 2]
+    assert task.result() == "done" and not executor.tasks
+    executor.close()
+
+
+def test_busy_work_stays_inside_the_slice() -> None:
+    executor = FrameExecutor(60)
+    chunks = []
+
+    async def crunch() -> None:
+        # A millisecond of work at a time, yielding in between
+        while True:
+            end = time.perf_counter() + 0.001
+            while time.perf_counter() < end:
+                pass
+            chunks.append(1)
+            await asyncio.sleep(0)
+
+    executor.spawn(crunch())
+    for _ in range(5):
+        executor.run_for(0.004)
+
+        # At most the pass that crosses the deadline runs over
+        assert executor.task_time < 0.004 + 0.003
+
+    assert chunks
+    executor.close()
+
+
+def test_wrapped_callbacks_give_tasks_what_the_frame_leaves() -> None:
+    executor = FrameExecutor(60)
+    calls = []
+    update, draw = executor.wrap(lambda: calls.append("update"), lambda: calls.append("draw"))
+
+    ran = []
+
+    async def once() -> None:
+        ran.append(True)
+
+    executor.spawn(once())
+    update()
+    draw()
+
+    assert calls == ["update", "draw"] and ran == [True]
+
+    # Nothing left to run, the next frame skips the loop
+    update()
+    assert executor.task_time == 0.0
+    executor.close()
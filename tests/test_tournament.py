@@ -0,0 +1,61 @@
+import pytest
+
+from conftest import load_game_module
+
+tournament = load_game_module("Pong", "tournament")
+
+
+def result(left: str, right: str, left_score: int, right_score: int) -> "tournament.MatchResult":
+    return tournament.MatchResult(tournament.Match(left, right, 0), left_score, right_score, 100)
+
+
+def test_elo_moves_both_sides_by_the_same_amount() -> None:
+    cup = tournament.Tournament(["a", "b"], k_factor=32)
+    cup.add_result(result("a", "b", 5, 2))
+
+    a, b = cup.standings["a"], cup.standings["b"]
+    assert a.rating == pytest.approx(1516) and b.rating == pytest.approx(1484)
+    assert (a.wins, a.losses, b.wins, b.losses) == (1, 0, 0, 1)
+    assert (a.points_for, a.points_against) == (5, 2)
+
+    # The favourite gains less for beating the same opponent again
+    cup.add_result(result("b", "a", 1, 5))
+    assert a.rating - 1516 < 16
+
+
+def test_draw_between_equals_changes_nothing() -> None:
+    cup = tournament.Tournament(["a", "b"])
+    cup.add_result(result("a", "b", 3, 3))
+
+    assert cup.standings["a"].rating == cup.standings["b"].rating == 1500
+    assert cup.standings["a"].score == 0.5
+
+
+def test_round_robin_alternates_sides() -> None:
+    cup = tournament.Tournament(["a", "b", "c"], games=2, seed=1)
+    matches = cup.round_robin()
+
+    assert len(matches) == 6
+    assert [(match.left, match.right) for match in matches[:2]] == [("a", "b"), ("b", "a")]
+
+
+def test_swiss_avoids_rematches() -> None:
+    cup = tournament.Tournament(["a", "b", "c", "d"], games=1)
+    cup.add_result(result("a", "b", 5, 0))
+    cup.add_result(result("c", "d", 5, 0))
+
+    pairs = {frozenset((match.left, match.right)) for match in cup.swiss_round()}
+    assert pairs == {frozenset("ac"), frozenset("bd")}
+
+
+def test_unknown_bot() -> None:
+    with pytest.raises(ValueError, match="Unknown bot"):
+        tournament.load_bot("nobody")
+
+
+def test_match_is_reproducible_and_decides() -> None:
+    match = tournament.Match("predictor", "idle", seed=4)
+    first = tournament.play(match, points=2)
+
+    assert first == tournament.play(match, points=2)
+    assert first.left_score == 2 and first.right_score < 2